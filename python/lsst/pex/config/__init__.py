@@ -24,6 +24,7 @@ from .config import *
 from .rangeField import *
 from .choiceField import *
 from .listField import *
+from .numericListField import *
 from .dictField import *
 from .configField import *
 from .configChoiceField import *
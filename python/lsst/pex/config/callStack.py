@@ -25,10 +25,25 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-__all__ = ['getCallerFrame', 'getStackFrame', 'StackFrame', 'getCallStack']
+__all__ = ['getCallerFrame', 'getStackFrame', 'StackFrame', 'CallStack', 'getCallStack',
+           'getUserCallStack']
 
+import collections.abc
 import inspect
 import linecache
+import os
+import weakref
+
+_PACKAGE_PREFIX = os.path.dirname(__file__) + os.sep
+"""Prefix of the filenames of the modules in this package.
+"""
+
+_MIXIN_MODULES = frozenset(["_collections_abc", collections.abc.MutableMapping.update.__module__])
+"""Names of the modules whose methods the containers of this package
+inherit, such as ``MutableSequence.extend`` and ``MutableMapping.update``.
+The implementation of `collections.abc` is named after it in recent
+versions of Python.
+"""
 
 
 def getCallerFrame(relative=0):
@@ -144,10 +159,25 @@ class StackFrame:
         >>> import inspect
         >>> stackFrame = StackFrame.fromFrame(inspect.currentframe())
         """
-        filename = frame.f_code.co_filename
-        lineno = frame.f_lineno
-        function = frame.f_code.co_name
-        return cls(filename, lineno, function)
+        return cls.fromCode(frame.f_code, frame.f_lineno)
+
+    @classmethod
+    def fromCode(cls, code, lineno):
+        """Construct from a code object and line number.
+
+        Parameters
+        ----------
+        code : `types.CodeType`
+            Code object being executed, such as ``frame.f_code``.
+        lineno : `int`
+            Line number being executed.
+
+        Returns
+        -------
+        stackFrame : `StackFrame`
+            A `StackFrame` instance.
+        """
+        return cls(code.co_filename, lineno, code.co_name)
 
     def __repr__(self):
         return "%s(%s, %s, %s)" % (self.__class__.__name__, self.filename, self.lineno, self.function)
@@ -172,6 +202,233 @@ class StackFrame:
         return result
 
 
+class _FrameNode:
+    """A node in the process-wide tree of call stacks.
+
+    Parameters
+    ----------
+    parent : `_FrameNode` or `None`
+        The node of the calling frame; `None` for the root of the tree.
+    key : `tuple` or `None`
+        Key of this node in ``parent.children``: the ``(filename, lineno,
+        function)`` of its frame, or `None` for a node that is not in
+        ``parent.children`` (see `extend`).
+    element : object, optional
+        The stack element for this node. If `None`, a `StackFrame` is
+        looked up (or created) from ``key`` when it is first needed.
+
+    Notes
+    -----
+    Every distinct call stack is a path from the root of the tree to a node,
+    so all stacks with a common prefix share the nodes for that prefix, and
+    a `CallStack` only needs to hold the node for its innermost frame.
+
+    A node holds its parent, but only weak references to its children, so
+    the tree only keeps the nodes of the stacks that are still held (by the
+    history of a config, usually); the others are dropped with the last
+    stack that holds them.
+    """
+
+    __slots__ = ("parent", "key", "depth", "children", "_element", "__weakref__")
+
+    def __init__(self, parent, key, element=None):
+        self.parent = parent
+        self.key = key
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.children = {}
+        self._element = element
+
+    @property
+    def element(self):
+        """The stack element for this node (`StackFrame`, usually).
+        """
+        if self._element is None:
+            self._element = _internFrame(*self.key)
+        return self._element
+
+    def child(self, key, element=None):
+        """Get (or create) the child of this node for ``key``.
+        """
+        ref = self.children.get(key)
+        node = ref() if ref is not None else None
+        if node is None:
+            node = _FrameNode(self, key, element)
+            self.children[key] = _ChildRef(node, self._forget)
+        return node
+
+    def _forget(self, ref):
+        """Remove the entry of a child that is gone from ``children``.
+        """
+        if self.children.get(ref.key) is ref:
+            del self.children[ref.key]
+
+    def extend(self, elements):
+        """Get the node reached by appending ``elements`` below this node.
+
+        Parameters
+        ----------
+        elements : iterable
+            Stack elements (`StackFrame` or other objects) or other
+            `_FrameNode` instances, ordered with the most recent last.
+
+        Notes
+        -----
+        A `StackFrame` is keyed by its source location, so it shares the
+        node (and the interned `StackFrame`) of every other frame at that
+        location. Any other element gets a node of its own that is not
+        added to ``children``, so the process-wide tree only grows with the
+        number of distinct source locations.
+        """
+        node = self
+        for element in elements:
+            if isinstance(element, _FrameNode):
+                if element.key is not None:
+                    node = node.child(element.key, element._element)
+                else:
+                    node = _FrameNode(node, element.key, element._element)
+            elif isinstance(element, StackFrame):
+                key = (element.filename, element.lineno, element.function)
+                node = node.child(key, _FRAMES.setdefault(key, element))
+            else:
+                node = _FrameNode(node, None, element)
+        return node
+
+    def path(self):
+        """Get the nodes from the root (exclusive) to this node (inclusive).
+        """
+        nodes = []
+        node = self
+        while node.parent is not None:
+            nodes.append(node)
+            node = node.parent
+        nodes.reverse()
+        return nodes
+
+
+class _ChildRef(weakref.ref):
+    """A weak reference to a `_FrameNode` from its parent, which knows the
+    key of the node in ``parent.children``.
+    """
+
+    __slots__ = ("key",)
+
+    def __init__(self, node, callback):
+        super().__init__(node, callback)
+        self.key = node.key
+
+
+_ROOT = _FrameNode(None, None)
+"""Root of the tree of all recorded call stacks.
+
+It lives as long as the process, but only holds the nodes of stacks that are
+still in use (see `_FrameNode`).
+"""
+
+_FRAMES = weakref.WeakValueDictionary()
+"""Table of interned `StackFrame` instances, keyed by
+``(filename, lineno, function)``.
+
+A frame is only kept in the table while a node of the tree, or any other
+object, holds it.
+"""
+
+
+def _internFrame(filename, lineno, function):
+    """Get the shared `StackFrame` for a source location.
+    """
+    frame = _FRAMES.get((filename, lineno, function))
+    if frame is None:
+        frame = _FRAMES.setdefault((filename, lineno, function), StackFrame(filename, lineno, function))
+    return frame
+
+
+class CallStack(collections.abc.Sequence):
+    """A call stack whose `StackFrame` elements are built on demand.
+
+    Parameters
+    ----------
+    frames : iterable, optional
+        Elements of the stack (usually `StackFrame`), ordered with the most
+        recent frame last.
+
+    Notes
+    -----
+    Capturing a call stack for every change to a config is expensive if a
+    `StackFrame` is constructed for each frame, and the history is rarely
+    read. `getCallStack` therefore only records the filename, line number
+    and function name of each frame (not the frame itself, which would keep
+    all of its local variables alive), and the `StackFrame` for an element
+    is constructed the first time it is read.
+
+    All call stacks are stored in a single process-wide tree, in which each
+    node holds one frame and points to the node of its caller. A
+    ``CallStack`` only refers to the node of its most recent frame, so
+    stacks that share a common prefix (such as the frames leading to
+    ``Config.__new__`` or ``setDefaults``) share its storage, and identical
+    frames share a single `StackFrame`. The memory used by the history
+    therefore grows with the number of distinct call sites rather than with
+    the number of changes.
+
+    A ``CallStack`` can be concatenated with a `list` or another
+    ``CallStack`` using ``+`` (giving a new ``CallStack``) and extended in
+    place using ``+=``, so it can be used wherever a `list` of `StackFrame`
+    was accepted before.
+    """
+
+    __slots__ = ("_node",)
+
+    def __init__(self, frames=()):
+        self._node = _ROOT.extend(frames)
+
+    @classmethod
+    def _fromNode(cls, node):
+        """Construct from the `_FrameNode` of the most recent frame.
+        """
+        stack = cls.__new__(cls)
+        stack._node = node
+        return stack
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CallStack(self._node.path()[index])
+        depth = self._node.depth
+        if index < 0:
+            index += depth
+        if not 0 <= index < depth:
+            raise IndexError("CallStack index out of range")
+        node = self._node
+        for _ in range(depth - 1 - index):
+            node = node.parent
+        return node.element
+
+    def __len__(self):
+        return self._node.depth
+
+    def __iter__(self):
+        return (node.element for node in self._node.path())
+
+    def __add__(self, other):
+        if isinstance(other, CallStack):
+            return CallStack._fromNode(self._node.extend(other._node.path()))
+        if isinstance(other, (list, tuple)):
+            return CallStack._fromNode(self._node.extend(other))
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, (list, tuple)):
+            return CallStack._fromNode(_ROOT.extend(other).extend(self._node.path()))
+        return NotImplemented
+
+    def __iadd__(self, other):
+        if isinstance(other, CallStack):
+            other = other._node.path()
+        self._node = self._node.extend(other)
+        return self
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, list(self))
+
+
 def getCallStack(skip=0):
     """Retrieve the call stack for the caller.
 
@@ -182,17 +439,52 @@ def getCallStack(skip=0):
 
     Returns
     -------
-    output : `list` of `StackFrame`
-        The call stack. The `list` is ordered with the most recent frame to
-        last.
+    output : `CallStack`
+        The call stack, a sequence of `StackFrame`. It is ordered with the
+        most recent frame to last.
 
     Notes
     -----
     This function is excluded from the call stack.
+
+    The `StackFrame` objects are only constructed when the stack is read,
+    and are shared with all other stacks that contain the same frames (see
+    `CallStack`).
     """
     frame = getCallerFrame(skip + 1)
-    stack = []
+    keys = []
     while frame:
-        stack.append(StackFrame.fromFrame(frame))
+        code = frame.f_code
+        keys.append((code.co_filename, frame.f_lineno, code.co_name))
+        frame = frame.f_back
+    node = _ROOT
+    for key in reversed(keys):
+        node = node.child(key)
+    return CallStack._fromNode(node)
+
+
+def getUserCallStack():
+    """Retrieve the innermost frame of the call stack that is outside of
+    `lsst.pex.config`.
+
+    Returns
+    -------
+    output : `CallStack`
+        A call stack containing only the frame of the user code that called
+        into `lsst.pex.config`, or an empty stack if there is no such frame.
+        The frames of the methods that the containers of this package
+        inherit from `collections.abc` are skipped too.
+
+    Notes
+    -----
+    This is much cheaper than `getCallStack`, because only the frames within
+    this package are visited.
+    """
+    frame = getCallerFrame(0)
+    while frame and (frame.f_code.co_filename.startswith(_PACKAGE_PREFIX) or
+                     frame.f_globals.get("__name__") in _MIXIN_MODULES):
         frame = frame.f_back
-    return list(reversed(stack))
+    if frame is None:
+        return CallStack()
+    code = frame.f_code
+    return CallStack._fromNode(_ROOT.child((code.co_filename, frame.f_lineno, code.co_name)))
@@ -32,7 +32,7 @@ or `lsst.pex.config.Field._compare` implementation, as they take care of
 writing messages as well as floating-point comparisons and shortcuts.
 """
 
-__all__ = ("getComparisonName", "compareScalars", "compareConfigs")
+__all__ = ("getComparisonName", "compareScalars", "compareSequences", "compareConfigs")
 
 import numpy
 
@@ -108,6 +108,82 @@ def compareScalars(name, v1, v2, output, rtol=1E-8, atol=1E-8, dtype=None):
     return result
 
 
+def compareSequences(name, v1, v2, output, rtol=1E-8, atol=1E-8, dtype=None, keys=None, maxReport=5):
+    """Compare two sequences of scalar values of the same length, item by
+    item.
+
+    This function is a helper for the ``_compare`` methods of fields that
+    hold lists or dictionaries of values.
+
+    Parameters
+    ----------
+    name : `str`
+        Name to use when reporting differences, typically created by
+        `getComparisonName`.
+    v1 : sequence
+        Left-hand side values to compare.
+    v2 : sequence
+        Right-hand side values to compare, in the same order as ``v1``.
+    output : callable or `None`
+        A callable that takes a string, used to report inequalities (for
+        example, `print`). Set to `None` to disable output.
+    rtol : `float`, optional
+        Relative tolerance for floating point comparisons.
+    atol : `float`, optional
+        Absolute tolerance for floating point comparisons.
+    dtype : class, optional
+        Data type of the values for comparison. May be `None` if values are
+        not floating-point.
+    keys : sequence, optional
+        The index or key of each value, used when reporting differences.
+        Defaults to the position of each value.
+    maxReport : `int`, optional
+        The largest number of differing values to report.
+
+    Returns
+    -------
+    areEqual : `bool`
+        `True` if all the values are equal, `False` if any are not.
+
+    See also
+    --------
+    lsst.pex.config.compareScalars
+
+    Notes
+    -----
+    Values are compared as by `compareScalars`, but floating point values
+    are compared together, by a single `numpy.isclose` call. All the
+    differences are reported on one line, which gives the indices (or keys)
+    and values of the first ``maxReport`` of them.
+    """
+    v1 = list(v1)
+    v2 = list(v2)
+    if dtype in (float, complex) and None not in v1 and None not in v2:
+        a1 = numpy.array(v1, dtype=dtype)
+        a2 = numpy.array(v2, dtype=dtype)
+        with numpy.errstate(invalid="ignore"):
+            same = numpy.isclose(a1, a2, rtol=rtol, atol=atol) | (numpy.isnan(a1) & numpy.isnan(a2))
+        differ = numpy.flatnonzero(~same).tolist()
+    else:
+        differ = [i for i, (x1, x2) in enumerate(zip(v1, v2))
+                  if not compareScalars(name, x1, x2, output=None, rtol=rtol, atol=atol, dtype=dtype)]
+    if differ and output is not None:
+        if keys is None:
+            keys = range(len(v1))
+        shown = differ[:maxReport]
+        if len(differ) == 1:
+            i, = differ
+            output("Inequality in %s[%r]: %r != %r" % (name, keys[i], v1[i], v2[i]))
+        else:
+            more = ", ..." if len(differ) > len(shown) else ""
+            output("Inequality in %s[%s%s]: [%s%s] != [%s%s] (%d of %d items differ)" % (
+                name, ", ".join(repr(keys[i]) for i in shown), more,
+                ", ".join(repr(v1[i]) for i in shown), more,
+                ", ".join(repr(v2[i]) for i in shown), more,
+                len(differ), len(v1)))
+    return not differ
+
+
 def compareConfigs(name, c1, c2, shortcut=True, rtol=1E-8, atol=1E-8, output=None):
     """Compare two `lsst.pex.config.Config` instances for equality.
 
@@ -25,20 +25,34 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-__all__ = ("Config", "ConfigMeta", "Field", "FieldValidationError")
+__all__ = ("Config", "ConfigMeta", "Field", "FieldValidationError", "ConfigValidationError",
+           "ValidationFailure", "ValidationReport")
 
 import io
 import os
+import ast
 import re
 import sys
+import pickle
+import hashlib
+import marshal
+import importlib
 import math
 import copy
 import tempfile
 import shutil
 import warnings
+import inspect
+import functools
+import contextvars
+import types
+import weakref
+import collections
+import collections.abc
+import concurrent.futures
 
 from .comparison import getComparisonName, compareScalars, compareConfigs
-from .callStack import getStackFrame, getCallStack
+from .callStack import getStackFrame, getCallStack, getUserCallStack, CallStack
 
 
 def _joinNamePath(prefix=None, name=None, index=None):
@@ -79,6 +93,154 @@ def _autocast(x, dtype):
     return x
 
 
+_PATH_STEP = re.compile(r"(?:^|\.)([^.\[\]]+)|\[([^\[\]]+)\]")
+"""A step of a field path: an attribute or dotted name, or a bracketed item
+key.
+"""
+
+
+def _splitPath(path):
+    """Split a field path into steps.
+
+    Parameters
+    ----------
+    path : `str`
+        A path such as ``"a.b"``, ``"choice['A'].b"`` or ``"choice.A.b"``.
+
+    Returns
+    -------
+    steps : `tuple`
+        ``(isAttribute, name)`` steps, in order. ``name`` is a `str` for
+        dotted names and the literal key for bracketed items.
+
+    Raises
+    ------
+    KeyError
+        Raised if ``path`` is not a valid path.
+    """
+    steps = []
+    pos = 0
+    while pos < len(path):
+        match = _PATH_STEP.match(path, pos)
+        if match is None:
+            raise KeyError("Invalid field path %r" % path)
+        if match.group(1) is not None:
+            steps.append((True, match.group(1)))
+        else:
+            try:
+                steps.append((False, ast.literal_eval(match.group(2))))
+            except (ValueError, SyntaxError):
+                raise KeyError("Invalid item key in field path %r" % path)
+        pos = match.end()
+    if not steps:
+        raise KeyError("Invalid field path %r" % path)
+    return tuple(steps)
+
+
+def _pathKey(name, keytype):
+    """Convert a step of a field path into an item key of type ``keytype``.
+
+    Dotted paths can only spell keys as strings, so ``"d.1"`` refers to the
+    key ``1`` of a mapping with `int` keys.
+    """
+    if isinstance(name, str) and keytype in (int, float):
+        try:
+            return keytype(name)
+        except ValueError:
+            pass
+    return _autocast(name, keytype)
+
+
+_HISTORY_MODES = ("full", "shallow", "off")
+"""Allowed values of `Config.historyMode`.
+"""
+
+
+def _checkHistoryMode(mode):
+    """Raise `ValueError` if ``mode`` is not a valid `Config.historyMode`.
+    """
+    if mode not in _HISTORY_MODES:
+        raise ValueError("Invalid historyMode %r; must be one of %s" % (mode, ", ".join(_HISTORY_MODES)))
+
+
+def _checkHistoryLimit(limit):
+    """Raise `ValueError` if ``limit`` is not a valid `Config.historyLimit`.
+    """
+    if limit is not None and (not isinstance(limit, int) or limit <= 0):
+        raise ValueError("Invalid historyLimit %r; must be None or a positive integer" % (limit,))
+
+
+def _checkValidateDependencies(cls, dependencies):
+    """Raise `ValueError` if ``dependencies`` is not a valid
+    `Config.validateDependencies` for ``cls``.
+    """
+    if dependencies is None:
+        return
+    if isinstance(dependencies, str):
+        raise ValueError("Invalid validateDependencies %r; must be None or a sequence of field names"
+                         % (dependencies,))
+    for name in dependencies:
+        if name not in cls._fields:
+            raise ValueError("Invalid validateDependencies of %s; %r is not a field"
+                             % (_typeStr(cls), name))
+
+
+def _getValidateDependencies(cls):
+    """Get the fields that the ``validate`` overrides of a config class check
+    (for internal use only).
+
+    Parameters
+    ----------
+    cls : `Config`-type
+        The config class.
+
+    Returns
+    -------
+    dependencies : `set` of `str` or `None`
+        The fields declared in `Config.validateDependencies` by ``cls`` and
+        its bases, or `None` if any of them overrides ``validate`` without
+        declaring the fields it checks.
+    """
+    dependencies = set()
+    for base in cls.__mro__:
+        if base is Config:
+            break
+        declared = base.__dict__.get("validateDependencies")
+        if declared is not None:
+            dependencies.update(declared)
+        elif "validate" in base.__dict__:
+            return None
+    return dependencies
+
+
+def _truncateHistory(history, limit):
+    """Squash the oldest events of a field's history so that no more than
+    ``limit`` events remain.
+
+    Parameters
+    ----------
+    history : `list`
+        History of a field; modified in place.
+    limit : `int`
+        Maximum number of events to keep.
+
+    Notes
+    -----
+    The dropped events are replaced by a single record
+    ``(count, [], "truncated")`` at the start of the history, where ``count``
+    is the total number of events dropped so far.
+    """
+    if history and history[0][2] == "truncated":
+        dropped = history[0][0]
+        start = 1
+    else:
+        dropped = 0
+        start = 0
+    excess = len(history) - start - limit
+    if excess > 0:
+        history[0:start + excess] = [(dropped + excess, [], "truncated")]
+
+
 def _typeStr(x):
     """Generate a fully-qualified type name.
 
@@ -102,6 +264,346 @@ def _typeStr(x):
         return "%s.%s" % (xtype.__module__, xtype.__name__)
 
 
+_LOAD_CACHE = collections.OrderedDict()
+"""Compiled config override files, least recently used first
+(`collections.OrderedDict`).
+
+Keys are ``(absolute path, path, mtime, size)`` tuples, and values are
+``(code, program)`` tuples; see `_compileFile`. The entries of files that
+have changed are not removed, but are dropped as the least recently used
+once the cache is full. `Config.clearLoadCache` empties it.
+"""
+
+
+def _compileFile(filename, cacheDir=None, cacheSize=None):
+    """Compile a config override file, reusing an earlier compilation of the
+    file if it has not changed since.
+
+    Parameters
+    ----------
+    filename : `str`
+        Name of the file. It is also the file name of the code object, as
+        used in tracebacks and history.
+    cacheDir : `str`, optional
+        Directory in which to keep compiled files between processes, or
+        `None` to only keep them in memory.
+    cacheSize : `int`, optional
+        Maximum number of compiled files to keep in memory, or `None` for no
+        limit.
+
+    Returns
+    -------
+    code : `types.CodeType`
+        The compiled file.
+    program : `tuple` or `None`
+        The file parsed by `lsst.pex.config.loader.parse`, or `None` if it
+        must be executed.
+
+    Notes
+    -----
+    A file is considered unchanged if its modification time and size have
+    not changed. The compiled files written to ``cacheDir`` are
+    `marshal` files, which are specific to the Python version, like those
+    in ``__pycache__`` directories. Failing to write them is not an error.
+    """
+    stat = os.stat(filename)
+    key = (os.path.abspath(filename), filename, stat.st_mtime_ns, stat.st_size)
+    entry = _LOAD_CACHE.get(key)
+    if entry is not None:
+        try:
+            _LOAD_CACHE.move_to_end(key)
+        except KeyError:
+            # dropped by another thread
+            pass
+        return entry
+
+    code = None
+    cacheFile = None
+    if cacheDir is not None:
+        digest = hashlib.sha1(repr(key[:2]).encode()).hexdigest()[:16]
+        cacheFile = os.path.join(cacheDir, "%s.%s.%s.marshal" % (os.path.basename(filename), digest,
+                                                                 sys.implementation.cache_tag))
+        try:
+            with open(cacheFile, "rb") as f:
+                mtime, size, name, cached, program = marshal.load(f)
+            if (mtime, size, name) == (stat.st_mtime_ns, stat.st_size, filename):
+                code = cached
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+    if code is None:
+        import lsst.pex.config.loader as pexLoader
+        with open(filename, "r") as f:
+            tree = ast.parse(f.read(), filename=filename, mode="exec")
+        program = pexLoader.parse(tree)
+        code = compile(tree, filename=filename, mode="exec")
+        if cacheFile is not None:
+            try:
+                os.makedirs(cacheDir, exist_ok=True)
+                with tempfile.NamedTemporaryFile(mode="wb", dir=cacheDir, delete=False) as f:
+                    marshal.dump((stat.st_mtime_ns, stat.st_size, filename, code, program), f)
+                os.replace(f.name, cacheFile)
+            except OSError:
+                pass
+
+    _LOAD_CACHE[key] = (code, program)
+    while cacheSize is not None and len(_LOAD_CACHE) > cacheSize:
+        try:
+            _LOAD_CACHE.popitem(last=False)
+        except KeyError:
+            break
+    return code, program
+
+
+_typemapGeneration = 0
+"""Number of times a registry has gained an entry or a config class has
+gained a field after its definition. Import sets collected by
+`Config._collectImports` before that are out of date, because the configs
+of a `~lsst.pex.config.RegistryField` include every registered entry, and
+so are the default configs kept by `~lsst.pex.config.Registry` and the
+indexes of field paths built by `Config._getNameIndex`.
+"""
+
+
+def _typemapChanged():
+    """Record that a registry has gained an entry, or that a config class
+    has gained a field (for internal use only).
+    """
+    global _typemapGeneration
+    _typemapGeneration += 1
+
+
+_NO_IMPORTS = frozenset()
+"""The imports of a config that has not collected any; shared by all such
+configs, which replace it with a `set` of their own when they collect some.
+"""
+
+_NO_SHARED = frozenset()
+"""The names of the values a config shares with the config it was cloned
+from, when it shares none; replaced by a `set` when it does (see
+`Config.clone`).
+"""
+
+_NO_CACHE = types.MappingProxyType({})
+"""The cache of a config that has nothing in it (see `Config._getCached`).
+"""
+
+
+class _History(dict):
+    """The history of the fields of a config, keyed by field name (for
+    internal use only).
+
+    Parameters
+    ----------
+    fields : `dict`
+        The fields of the config class.
+    *args
+        Passed to `dict`.
+
+    Notes
+    -----
+    The list of events of a field is only made when the first event is
+    recorded, so configs that record no history hold no lists. Until then,
+    the history of the field is an empty list.
+    """
+
+    __slots__ = ("_fields",)
+
+    def __init__(self, fields, *args):
+        dict.__init__(self, *args)
+        self._fields = fields
+
+    def __missing__(self, name):
+        if name in self._fields:
+            return []
+        raise KeyError(name)
+
+
+class _PackedHistory(collections.abc.Mapping):
+    """The history of the fields of a compacted config, keyed by field name
+    (for internal use only).
+
+    Parameters
+    ----------
+    history : `_History`
+        The history to pack.
+
+    Notes
+    -----
+    The events of all fields are kept in a single flat tuple, so that a
+    compacted config holds neither a list per field nor a tuple per event.
+    The history of a field is unpacked into a tuple of events when it is
+    read, and the whole history into a `_History` when an event is recorded
+    again (see `Config._recordHistory`).
+    """
+
+    __slots__ = ("_fields", "_index", "_events")
+
+    def __init__(self, history):
+        index = []
+        events = []
+        for name, entries in history.items():
+            if entries:
+                for entry in entries:
+                    events.extend(entry)
+                index += (name, len(events))
+        self._fields = history._fields
+        # the name of each field with history, followed by the end of its
+        # events in _events
+        self._index = tuple(index)
+        self._events = tuple(events)
+
+    def __getitem__(self, name):
+        index = self._index
+        start = 0
+        for i in range(0, len(index), 2):
+            if index[i] == name:
+                events = self._events
+                return tuple(events[j:j + 3] for j in range(start, index[i + 1], 3))
+            start = index[i + 1]
+        if name in self._fields:
+            return ()
+        raise KeyError(name)
+
+    def __iter__(self):
+        return iter(self._index[::2])
+
+    def __len__(self):
+        return len(self._index) // 2
+
+    def __contains__(self, name):
+        return name in self._index[::2]
+
+    def setdefault(self, name, default=None):
+        # read-only: the default is returned, but not stored
+        return self[name] if name in self else default
+
+    def unpack(self):
+        """Get the history as a `_History` that can be recorded to.
+        """
+        return _History(self._fields, ((name, list(self[name])) for name in self))
+
+
+class _FieldDoc:
+    """A ``__doc__`` for the value classes of fields, such as `List`, that is
+    the documentation of the field for instances (for internal use only).
+
+    Parameters
+    ----------
+    doc : `str`
+        The documentation of the class.
+
+    Notes
+    -----
+    Those classes have ``__slots__``, so their instances cannot hold a
+    ``__doc__`` of their own.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.doc
+        return instance._field.doc
+
+
+def _copyDict(dict_):
+    """Copy a dictionary made by `Config.toDict`, and the dictionaries and
+    lists within it.
+
+    Parameters
+    ----------
+    dict_ : `dict`
+        The dictionary to copy.
+
+    Returns
+    -------
+    result : `dict`
+        The copy. Values of other types are not copied.
+    """
+    result = dict_.copy()
+    for k, v in result.items():
+        if type(v) is dict:
+            result[k] = _copyDict(v)
+        elif type(v) is list:
+            result[k] = [_copyDict(x) if type(x) is dict else x for x in v]
+    return result
+
+
+def _canonicalValue(value):
+    """Format a value made by `Field.toDict` for a fingerprint.
+
+    Parameters
+    ----------
+    value : object
+        A simple value, or a `list` or `dict` of them.
+
+    Returns
+    -------
+    text : `str`
+        Text that is the same for values that compare equal and of the same
+        type. NaNs are all the same, as are positive and negative zero, and
+        dictionaries are written in key order.
+    """
+    if type(value) is float:
+        return "float:nan" if math.isnan(value) else f"float:{value + 0.0!r}"
+    elif isinstance(value, list):
+        return "[" + ",".join(_canonicalValue(x) for x in value) + "]"
+    elif isinstance(value, dict):
+        items = sorted((_canonicalValue(k), _canonicalValue(v)) for k, v in value.items())
+        return "{" + ",".join(f"{k}:{v}" for k, v in items) + "}"
+    return f"{type(value).__name__}:{value!r}"
+
+
+def _isImportable(x):
+    """Test whether an object can be found again from its module and
+    qualified name, as `pickle` requires for classes and functions.
+
+    Returns
+    -------
+    `bool`
+        `True` if the object is importable.
+    """
+    module = sys.modules.get(getattr(x, "__module__", None))
+    qualname = getattr(x, "__qualname__", None)
+    if module is None or qualname is None:
+        return False
+    found = module
+    for name in qualname.split("."):
+        found = getattr(found, name, None)
+    return found is x
+
+
+def _makeDefaultTemplate(field):
+    """Make the entry for a field in `ConfigMeta`'s default template.
+
+    Parameters
+    ----------
+    field : `Field`
+        A field of the config class.
+
+    Returns
+    -------
+    entry : `tuple` or `None`
+        ``(field, default, value)``, where ``value`` is the validated value
+        that ``field.__set__`` stores for ``default``; `None` if the field's
+        default cannot be stored without calling ``field.__set__`` (because
+        it is not a simple value, or is invalid).
+    """
+    if type(field).__set__ is not Field.__set__:
+        return None
+    value = field.default
+    if value is not None:
+        value = _autocast(value, field.dtype)
+        try:
+            field._validateValue(value)
+        except Exception:
+            # Let Config.__new__ report the error
+            return None
+    return (field, field.default, value)
+
+
 class ConfigMeta(type):
     """A metaclass for `lsst.pex.config.Config`.
 
@@ -111,10 +613,40 @@ class ConfigMeta(type):
     class attributes as a class attribute called ``_fields``, and adds
     the name of each field as an instance variable of the field itself (so you
     don't have to pass the name of the field to the field constructor).
+
+    ``ConfigMeta`` also validates the defaults of simple fields once, and
+    stores them in a class attribute called ``_defaultTemplate``, so that
+    `Config.__new__` can assign them without validating them again.
+
+    Paths resolved by `Config.updateFromDict` are cached per class in a
+    class attribute called ``_pathCache``, and the paths of the fields that
+    `Config.names` reports are indexed per class in ``_nameIndex``, along
+    with the `_typemapGeneration` they were indexed at.
+
+    Config classes are given empty ``__slots__`` unless they define their
+    own, so that config instances have no ``__dict__``.
+
+    A ``validate`` method defined by a subclass, or assigned to it later, is
+    replaced by a wrapper that also takes the keyword arguments of
+    `Config.validate`, and that skips it when its class declares the fields
+    it checks in ``validateDependencies`` and none of them has changed since
+    it last succeeded (see `_wrapValidate`). This is done for every
+    such method, silently, unless it already takes those arguments or
+    ``**kwargs``.
     """
 
+    def __new__(mcs, name, bases, dict_):
+        # instances keep their state in the slots of Config, rather than in
+        # a __dict__, unless a class asks for one
+        dict_.setdefault("__slots__", ())
+        return type.__new__(mcs, name, bases, dict_)
+
     def __init__(cls, name, bases, dict_):
         type.__init__(cls, name, bases, dict_)
+        if "historyMode" in dict_:
+            _checkHistoryMode(dict_["historyMode"])
+        if "historyLimit" in dict_:
+            _checkHistoryLimit(dict_["historyLimit"])
         cls._fields = {}
         cls._source = getStackFrame()
 
@@ -134,10 +666,42 @@ class ConfigMeta(type):
         for k, v in fields.items():
             setattr(cls, k, copy.deepcopy(v))
 
+        if "validate" in dict_:
+            type.__setattr__(cls, "validate", _wrapValidate(dict_["validate"]))
+        if "validateDependencies" in dict_:
+            _checkValidateDependencies(cls, dict_["validateDependencies"])
+        cls._pathCache = {}
+        cls._nameIndex = None
+        cls._defaultTemplate = {}
+        for k, v in cls._fields.items():
+            entry = _makeDefaultTemplate(v)
+            if entry is not None:
+                cls._defaultTemplate[k] = entry
+
     def __setattr__(cls, name, value):
         if isinstance(value, Field):
             value.name = name
             cls._fields[name] = value
+            cls.__dict__.get("_pathCache", {}).clear()
+            type.__setattr__(cls, "_nameIndex", None)
+            template = cls.__dict__.get("_defaultTemplate")
+            if template is not None:
+                # the class is already defined, and its default configs
+                # may have been kept
+                _typemapChanged()
+                entry = _makeDefaultTemplate(value)
+                if entry is not None:
+                    template[name] = entry
+                else:
+                    template.pop(name, None)
+        elif name == "historyMode":
+            _checkHistoryMode(value)
+        elif name == "historyLimit":
+            _checkHistoryLimit(value)
+        elif name == "validate" and callable(value):
+            value = _wrapValidate(value)
+        elif name == "validateDependencies":
+            _checkValidateDependencies(cls, value)
         type.__setattr__(cls, name, value)
 
 
@@ -184,6 +748,13 @@ class FieldValidationError(ValueError):
         """
 
         self.configSource = config._source
+        """File and line number of the `~lsst.pex.config.Config` definition.
+        """
+
+        self.message = msg
+        """Text describing why the field was not valid (`str`).
+        """
+
         error = "%s '%s' failed validation: %s\n"\
                 "For more information see the Field definition at:\n%s"\
                 " and the Config definition at:\n%s" % \
@@ -192,6 +763,325 @@ class FieldValidationError(ValueError):
         super().__init__(error)
 
 
+class ConfigValidationError(ValueError):
+    """Raised by `Config.validate` when it has validated every field,
+    rather than stopping at the first that was not valid.
+
+    Parameters
+    ----------
+    errors : `list` of `ValueError`
+        The errors, in the order in which the fields are defined.
+    report : `ValidationReport`, optional
+        The report of the errors.
+    """
+
+    def __init__(self, errors, report=None):
+        self.errors = list(errors)
+        """The errors (`list` of `ValueError`), most of which are usually
+        `FieldValidationError` instances.
+        """
+
+        self.report = report
+        """The report of the errors (`ValidationReport` or `None`).
+        """
+
+        message = "\n".join(str(e) for e in self.errors)
+        super().__init__("%d validation errors:\n%s" % (len(self.errors), message))
+
+
+class ValidationFailure:
+    """A field that was not valid, as reported by
+    ``Config.validate(collect=True)``.
+
+    Parameters
+    ----------
+    path : `str`
+        The full name of the field.
+    fieldType : type or `None`
+        The type of the field, or `None` if the error was raised by the
+        ``validate`` method of the config that was validated.
+    value : object
+        The value of the field.
+    message : `str`
+        Text describing why the field was not valid.
+    frame : `lsst.pex.config.callStack.StackFrame` or `None`
+        Where the field was last set, if the history records it.
+    error : `ValueError`
+        The error raised by the field.
+    """
+
+    __slots__ = ("path", "fieldType", "value", "message", "frame", "error")
+
+    def __init__(self, path, fieldType, value, message, frame, error):
+        self.path = path
+        self.fieldType = fieldType
+        self.value = value
+        self.message = message
+        self.frame = frame
+        self.error = error
+
+    @classmethod
+    def _fromError(cls, config, field, error):
+        """Describe an error raised while validating a config (for internal
+        use only).
+
+        Parameters
+        ----------
+        config : `lsst.pex.config.Config`
+            The config that was being validated.
+        field : `Field` or `None`
+            The field that was being validated, or `None` if the error was
+            raised by the ``validate`` method of ``config`` itself.
+        error : `ValueError`
+            The error.
+
+        Returns
+        -------
+        failure : `ValidationFailure`
+            The description of the error.
+        """
+        if field is None:
+            return cls(config._name or "", None, config, str(error), None, error)
+        path = _joinNamePath(config._name, field.name)
+        history = config._history.get(field.name)
+        if isinstance(error, FieldValidationError):
+            message = error.message
+            if error.fullname != path:
+                # raised for a field of a subconfig by a validate method; the
+                # history of that field gives its value
+                history = error.history
+                value = history[-1][0] if history else None
+                path = error.fullname
+            else:
+                value = field.__get__(config)
+            fieldType = error.fieldType
+        else:
+            message = str(error)
+            value = field.__get__(config)
+            fieldType = type(field)
+        stack = history[-1][1] if history else None
+        return cls(path, fieldType, value, message, stack[-1] if stack else None, error)
+
+    def format(self):
+        """Describe the failure.
+
+        Returns
+        -------
+        text : `str`
+            The path, type and value of the field and the message, followed
+            by where the field was last set, if known.
+        """
+        typeName = self.fieldType.__name__ if self.fieldType is not None else "Config"
+        text = "%s (%s) = %r: %s" % (self.path, typeName, self.value, self.message)
+        if self.frame is not None:
+            text += "\n    last set at %s" % self.frame.format()
+        return text
+
+    def __repr__(self):
+        return "ValidationFailure(%r, %s)" % (self.path, self.message)
+
+
+class ValidationReport:
+    """The fields of a config that were not valid, as returned by
+    ``Config.validate(collect=True)``.
+
+    Parameters
+    ----------
+    failures : iterable of `ValidationFailure`
+        The fields that were not valid, in the order in which they are
+        defined.
+
+    Notes
+    -----
+    A report is a sequence of `ValidationFailure`, so it is empty, and
+    false, if the config is valid.
+    """
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        """The fields that were not valid (`list` of `ValidationFailure`).
+        """
+
+    def __len__(self):
+        return len(self.failures)
+
+    def __iter__(self):
+        return iter(self.failures)
+
+    def __getitem__(self, index):
+        return self.failures[index]
+
+    def paths(self):
+        """Get the full names of the fields that were not valid.
+
+        Returns
+        -------
+        paths : `list` of `str`
+            The full names, in order.
+        """
+        return [failure.path for failure in self.failures]
+
+    def raiseIfFailed(self):
+        """Raise an error if any field was not valid.
+
+        Raises
+        ------
+        lsst.pex.config.ConfigValidationError
+            Raised if the report is not empty.
+        """
+        if self.failures:
+            raise ConfigValidationError([failure.error for failure in self.failures], self)
+
+    def __str__(self):
+        if not self.failures:
+            return "No validation errors"
+        text = "\n".join(failure.format() for failure in self.failures)
+        return "%d validation errors:\n%s" % (len(self.failures), text)
+
+
+class _SubtreeInvalid(Exception):
+    """Raised by `Config.validate` when it has collected errors from the
+    fields of a config, so that the configs that hold it stop validating it
+    without collecting those errors again.
+    """
+
+
+_validationRun = contextvars.ContextVar("_validationRun", default=None)
+"""The `_ValidationRun` of the `Config.validate` call that is collecting
+errors, if any.
+"""
+
+_VALIDATE_OPTIONS = ("workers", "collect")
+"""Names of the keyword arguments of `Config.validate`.
+"""
+
+
+class _ValidationRun:
+    """The errors collected by a call to `Config.validate` (for internal use
+    only).
+
+    Parameters
+    ----------
+    executor : `concurrent.futures.Executor`, optional
+        The pool on which the fields of the first config are validated.
+    """
+
+    def __init__(self, executor=None):
+        self.executor = executor
+        self.failures = []
+
+    def validateFields(self, config, fields):
+        """Validate fields of a config.
+
+        Parameters
+        ----------
+        config : `lsst.pex.config.Config`
+            The config to validate.
+        fields : `list` of `Field`
+            The fields of the config to validate.
+
+        Raises
+        ------
+        _SubtreeInvalid
+            Raised if any errors were collected from the fields.
+
+        Notes
+        -----
+        If there is an executor, the fields that hold subconfigs are
+        validated on it, each in a context of its own. The subconfigs are
+        validated in turn by the worker, so only the first config that is
+        validated uses the executor.
+        """
+        count = len(self.failures)
+        executor, self.executor = self.executor, None
+        if executor is None:
+            for field in fields:
+                self.validateField(config, field, self.failures)
+        else:
+            results = []
+            for field in fields:
+                # this also makes or unshares the value before workers share
+                # the config
+                if not field._subconfigs(config):
+                    failures = []
+                    self.validateField(config, field, failures)
+                    results.append(failures)
+                else:
+                    context = contextvars.copy_context()
+                    results.append(executor.submit(context.run, self._validateInWorker, config, field))
+            for result in results:
+                self.failures.extend(result if isinstance(result, list) else result.result())
+        if len(self.failures) > count:
+            raise _SubtreeInvalid()
+
+    def validateField(self, config, field, failures):
+        """Validate a field, collecting its errors.
+
+        Parameters
+        ----------
+        config : `lsst.pex.config.Config`
+            The config that contains the field.
+        field : `Field`
+            The field to validate.
+        failures : `list` of `ValidationFailure`
+            The list to add the errors of the field to.
+        """
+        try:
+            field.validate(config)
+        except _SubtreeInvalid:
+            # already collected
+            pass
+        except ValueError as e:
+            failures.append(ValidationFailure._fromError(config, field, e))
+
+    @staticmethod
+    def _validateInWorker(config, field):
+        run = _ValidationRun()
+        _validationRun.set(run)
+        run.validateField(config, field, run.failures)
+        return run.failures
+
+
+def _wrapValidate(validate):
+    """Let an override of `Config.validate` take the keyword arguments of
+    the base method.
+
+    Parameters
+    ----------
+    validate : callable
+        The ``validate`` method defined by a `Config` subclass.
+
+    Returns
+    -------
+    wrapper : callable
+        A method that calls `Config.validate` when it is given any of its
+        keyword arguments, which calls ``validate`` without them in turn.
+        Otherwise ``validate`` is called, unless its class declares the
+        fields it checks and none of them has changed since the config was
+        last valid (see `Config.validateDependencies`).
+        ``validate`` itself is returned if it takes those arguments already.
+    """
+    try:
+        parameters = inspect.signature(validate).parameters.values()
+    except (TypeError, ValueError):
+        return validate
+    if any(p.kind is p.VAR_KEYWORD or p.name in _VALIDATE_OPTIONS for p in parameters):
+        return validate
+
+    @functools.wraps(validate)
+    def wrapper(self, *args, **kwargs):
+        options = {name: kwargs.pop(name) for name in _VALIDATE_OPTIONS if name in kwargs}
+        if options:
+            return Config.validate(self, *args, **options, **kwargs)
+        if args or kwargs or type(self).validate is not wrapper:
+            # called by the override of a derived class, which is the one
+            # that decides whether the config needs validating
+            return validate(self, *args, **kwargs)
+        return self._validateChanges(validate)
+
+    return wrapper
+
+
 class Field:
     """A field in a `~lsst.pex.config.Config` that supports `int`, `float`,
     `complex`, `bool`, and `str` data types.
@@ -273,6 +1163,15 @@ class Field:
     """Supported data types for field values (`set` of types).
     """
 
+    historyLimit = None
+    """Maximum number of events kept in the history of this field in each
+    config (`int` or `None`).
+
+    If `None`, `lsst.pex.config.Config.historyLimit` applies. Set this on the
+    field of a config class to override it, e.g.
+    ``MyConfig.myField.historyLimit = 10``.
+    """
+
     def __init__(self, doc, dtype, default=None, check=None, optional=False, deprecated=None):
         if dtype not in self.supportedTypes:
             raise ValueError("Unsupported Field dtype %s" % _typeStr(dtype))
@@ -418,6 +1317,171 @@ class Field:
             msg = "Value %s is not a valid value" % str(value)
             raise ValueError(msg)
 
+    def _copy(self, instance, value):
+        """Copy the value of this field for a clone of its config (for
+        internal use only).
+
+        Parameters
+        ----------
+        instance : `lsst.pex.config.Config`
+            The config instance that the copy is made for.
+        value : object
+            The value of this field in the config that was cloned.
+
+        Returns
+        -------
+        copy : object
+            The value to store in ``instance``.
+
+        Notes
+        -----
+        This method is invoked by `lsst.pex.config.Config.clone` the first
+        time a cloned value is accessed, and should not be called directly.
+
+        Values of simple fields are immutable and are returned as they are.
+        Fields that hold containers or subconfigs must override this method
+        to return a copy that belongs to ``instance``; the values of such
+        fields are shared between a config and its clones until they are
+        first accessed.
+        """
+        return value
+
+    def _reduce(self, instance):
+        """Get the value of this field in a form that can be pickled (for
+        internal use only).
+
+        Parameters
+        ----------
+        instance : `lsst.pex.config.Config`
+            The config instance that contains this field.
+
+        Returns
+        -------
+        state : object
+            A picklable representation of the value, which `_unreduce`
+            turns back into the value.
+
+        Raises
+        ------
+        pickle.PicklingError
+            Raised if the value cannot be represented. The config is then
+            pickled as Python source instead.
+
+        Notes
+        -----
+        This method is invoked by `lsst.pex.config.Config.__reduce__` and
+        should not be called directly. Fields that hold containers or
+        subconfigs must override this method and `_unreduce`.
+        """
+        value = instance._storage.get(self.name)
+        if value is not None and not isinstance(value, tuple(self.supportedTypes)):
+            raise pickle.PicklingError("Cannot reduce value %r of field %s" % (value, self.name))
+        return value
+
+    def _unreduce(self, instance, state, at):
+        """Restore the value of this field from the output of `_reduce` (for
+        internal use only).
+
+        Parameters
+        ----------
+        instance : `lsst.pex.config.Config`
+            The config instance being unpickled.
+        state : object
+            The output of `_reduce`.
+        at : `list` of `lsst.pex.config.callStack.StackFrame`
+            The call stack to record in the history.
+
+        Notes
+        -----
+        The value was validated before it was pickled, and is not validated
+        again.
+        """
+        instance._storage[self.name] = state
+        instance._recordHistory(self.name, state, at, "unpickle")
+
+    def _resolvePath(self, steps):
+        """Check the steps of a field path that follow the name of this
+        field (for internal use only).
+
+        Parameters
+        ----------
+        steps : `tuple`
+            ``(isAttribute, name)`` steps, as made by splitting a path such
+            as ``"field['a'].b"`` or ``"field.a.b"`` and removing the first
+            step.
+
+        Returns
+        -------
+        steps : `tuple`
+            The steps in the form that `Config.updateFromDict` applies to
+            the value of this field: attributes of configs are attribute
+            steps, keys of items are item steps of the key type. The steps
+            that depend on the value of the field, such as those below a
+            retargetable config, are left to be resolved against the config
+            they reach, as a final ``(None, steps)`` step.
+
+        Raises
+        ------
+        KeyError
+            Raised if the steps do not lead to a field or an item.
+
+        Notes
+        -----
+        Simple fields have no parts, so any steps are an error. Fields that
+        hold containers or subconfigs must override this method.
+        """
+        if steps:
+            raise KeyError("Field %s has no item or attribute %r" % (self.name, steps[0][1]))
+        return steps
+
+    def _indexNames(self):
+        """Get the entries of this field in the path index of its config
+        class (for internal use only).
+
+        Returns
+        -------
+        entries : `list` of `tuple`
+            ``(attrs, field, name)`` entries. ``name`` is the path of a field
+            whose name does not depend on the config instance, relative to
+            the config that contains this field. Otherwise ``name`` is `None`
+            and the names are found by calling ``field._collectNames`` on the
+            config reached from the containing config through the attributes
+            in ``attrs``.
+
+        Notes
+        -----
+        This method is invoked once per config class by `Config.names`.
+        The name of a simple field is static, unless the field is deprecated
+        (it is then omitted while it has its default value). Fields whose
+        contents depend on the instance (such as the keys of a dictionary of
+        configs or the target of a configurable) must override this method to
+        return a dynamic entry, and override `_collectNames`.
+        """
+        if self.deprecated:
+            return [((), self, None)]
+        return [((), None, self.name)]
+
+    def _collectNames(self, instance, prefix, names):
+        """Append the paths of this field and of everything it contains to
+        a list (for internal use only).
+
+        Parameters
+        ----------
+        instance : `lsst.pex.config.Config`
+            The config instance that contains this field.
+        prefix : `str`
+            The path of ``instance`` followed by a ``.``, or an empty string.
+        names : `list` of `str`
+            The list to append to.
+
+        Notes
+        -----
+        The paths are those assigned by `~lsst.pex.config.Config.save`, in
+        the same order.
+        """
+        if not (self.deprecated and self.__get__(instance) == self.default):
+            names.append(prefix + self.name)
+
     def _collectImports(self, instance, imports):
         """This function should call the _collectImports method on all config
         objects the field may own, and union them with the supplied imports
@@ -432,6 +1496,42 @@ class Field:
         """
         pass
 
+    def _subconfigs(self, instance):
+        """Get the subconfigs that are validated with this field (for
+        internal use only).
+
+        Parameters
+        ----------
+        instance : `lsst.pex.config.Config`
+            The config that contains this field.
+
+        Returns
+        -------
+        configs : iterable of `lsst.pex.config.Config`
+            The configs that `validate` validates in turn. Fields that hold
+            subconfigs should override this method.
+        """
+        return ()
+
+    def _compact(self, instance):
+        """Store the value of this field in a frozen config compactly (for
+        internal use only).
+
+        Parameters
+        ----------
+        instance : `lsst.pex.config.Config`
+            The frozen config that contains this field.
+
+        Notes
+        -----
+        This is called by `lsst.pex.config.Config.freeze` when asked to
+        compact the config. Fields holding containers should replace them
+        with immutable ones. The base implementation compacts the subconfigs
+        returned by `_subconfigs`.
+        """
+        for config in self._subconfigs(instance):
+            config._compact()
+
     def save(self, outfile, instance):
         """Save this field to a file (for internal use only).
 
@@ -460,13 +1560,57 @@ class Field:
             return
 
         # write full documentation string as comment lines
-        # (i.e. first character is #)
-        doc = "# " + str(self.doc).replace("\n", "\n# ")
-        if isinstance(value, float) and (math.isinf(value) or math.isnan(value)):
+        # (i.e. first character is #), formatted once per field
+        doc = self.__dict__.get("_docComment")
+        if doc is None:
+            doc = self._docComment = "# " + str(self.doc).replace("\n", "\n# ")
+        if isinstance(value, float) and not math.isfinite(value):
             # non-finite numbers need special care
-            outfile.write(u"{}\n{}=float('{!r}')\n\n".format(doc, fullname, value))
+            outfile.write(f"{doc}\n{fullname}=float('{value!r}')\n\n")
         else:
-            outfile.write(u"{}\n{}={!r}\n\n".format(doc, fullname, value))
+            outfile.write(f"{doc}\n{fullname}={value!r}\n\n")
+
+    def _iterSave(self, outfile, instance, baseline=None, skipUnselected=False):
+        """Save this field to a file, pausing after each part (for internal
+        use only).
+
+        Parameters
+        ----------
+        outfile : file-like object
+            A writeable field handle.
+        instance : `Config`
+            The `Config` instance that contains this field.
+        baseline : `Config`, optional
+            A config of the same type. If given, only the parts of the field
+            whose values differ from those in ``baseline`` are saved, so that
+            loading the output into ``baseline`` reproduces ``instance``.
+        skipUnselected : `bool`, optional
+            If `True`, choice fields only save their selected configs (see
+            `lsst.pex.config.Config.saveToStream`). Fields that hold
+            subconfigs pass it on to them.
+
+        Yields
+        ------
+        None
+            After each part of the field has been written, so that
+            `lsst.pex.config.Config.iterSave` can hand out what has been
+            written so far.
+
+        Notes
+        -----
+        The default implementation calls `save`, unless the value is equal
+        to that in ``baseline``. Fields that hold subconfigs override this
+        method so that large subconfigs are written in several parts and
+        compared item by item, and implement `save` by exhausting it.
+        """
+        if baseline is not None:
+            value = self.__get__(instance)
+            other = self.__get__(baseline)
+            if value == other or (isinstance(value, float) and isinstance(other, float) and
+                                  math.isnan(value) and math.isnan(other)):
+                return
+        self.save(outfile, instance)
+        yield
 
     def toDict(self, instance):
         """Convert the field value so that it can be set as the value of an
@@ -495,6 +1639,26 @@ class Field:
         """
         return self.__get__(instance)
 
+    def _updateFingerprint(self, instance, digest):
+        """Add the value of this field to the fingerprint of a config (for
+        internal use only).
+
+        Parameters
+        ----------
+        instance : `lsst.pex.config.Config`
+            The config instance that contains this field.
+        digest : `hashlib.blake2b`
+            The hash of the config, to be updated.
+
+        Notes
+        -----
+        The base implementation hashes the canonical form of `toDict`.
+        Fields that hold subconfigs should hash the fingerprints of those
+        subconfigs (see `lsst.pex.config.Config._getFingerprint`), and the
+        choices or targets that go with them.
+        """
+        digest.update(_canonicalValue(self.toDict(instance)).encode())
+
     def __get__(self, instance, owner=None, at=None, label="default"):
         """Define how attribute access should occur on the Config instance
         This is invoked by the owning config object and should not be called
@@ -510,6 +1674,8 @@ class Field:
         """
         if instance is None or not isinstance(instance, Config):
             return self
+        elif self.name in instance._shared:
+            return instance._unshare(self.name)
         else:
             return instance._storage[self.name]
 
@@ -557,7 +1723,6 @@ class Field:
         if instance._frozen:
             raise FieldValidationError(self, instance, "Cannot modify a frozen Config")
 
-        history = instance._history.setdefault(self.name, [])
         if value is not None:
             value = _autocast(value, self.dtype)
             try:
@@ -567,8 +1732,8 @@ class Field:
 
         instance._storage[self.name] = value
         if at is None:
-            at = getCallStack()
-        history.append((value, at, label))
+            at = instance._getCallStack()
+        instance._recordHistory(self.name, value, at, label)
 
     def __delete__(self, instance, at=None, label='deletion'):
         """Delete an attribute from a `lsst.pex.config.Config` instance.
@@ -589,7 +1754,7 @@ class Field:
         should not be called directly.
         """
         if at is None:
-            at = getCallStack()
+            at = instance._getCallStack()
         self.__set__(instance, None, at=at, label=label)
 
     def _compare(self, instance1, instance2, shortcut, rtol, atol, output):
@@ -681,6 +1846,41 @@ class RecordingImporter:
         return self._modules
 
 
+class _SaveBuffer:
+    """A file-like object that collects the text written when saving a
+    config, so that it can be handed out in large chunks.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._size = 0
+        self._counted = 0
+        # writing is the hot path, so it is the bare list method; sizes are
+        # only added up when they are asked for
+        self.write = self._parts.append
+
+    @property
+    def size(self):
+        """Number of characters written since the last `take` (`int`).
+        """
+        parts = self._parts
+        size = self._size
+        for i in range(self._counted, len(parts)):
+            size += len(parts[i])
+        self._size = size
+        self._counted = len(parts)
+        return size
+
+    def take(self):
+        """Return the text written since the last call, and forget it.
+        """
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        self._counted = 0
+        return text
+
+
 class Config(metaclass=ConfigMeta):
     """Base class for configuration (*config*) objects.
 
@@ -725,6 +1925,118 @@ class Config(metaclass=ConfigMeta):
     >>> config.listField.append('earl grey tea')
     >>> print(config.listField)
     ['coffee', 'green tea', 'water', 'earl grey tea']
+
+    Every change to a field is recorded in the config's `history`, along
+    with the call stack at the time of the change. Recording the history can
+    be reduced, or switched off, with `historyMode`:
+
+    >>> Config.historyMode = "off"  # for all configs
+    >>> DemoConfig.historyMode = "shallow"  # for DemoConfig only
+    """
+
+    __slots__ = ("_frozen", "_name", "_parent", "_storage", "_history", "_imports", "_importsStamp",
+                 "_cache", "_changed", "_shared", "_lent", "__weakref__")
+
+    historyMode = "full"
+    """How changes to fields are recorded in the history (`str`).
+
+    Allowed values are:
+
+    ``"full"``
+        Record each change with the full call stack (the default).
+    ``"shallow"``
+        Record each change with only the innermost frame outside of
+        `lsst.pex.config`, which is usually the line of user code that made
+        the change.
+    ``"off"``
+        Do not record any history.
+
+    Setting this attribute on `Config` changes the default for all config
+    classes that do not set it themselves.
+    """
+
+    historyLimit = None
+    """Maximum number of events kept in the history of each field (`int` or
+    `None` for no limit).
+
+    When a field's history grows beyond the limit, its oldest events are
+    squashed into a single ``(count, [], "truncated")`` record at the start of
+    the history, where ``count`` is the number of events dropped.
+    `lsst.pex.config.history.format` shows where the history was truncated.
+    The limit for an individual field can be set with
+    `lsst.pex.config.Field.historyLimit`.
+
+    Like `historyMode`, setting this attribute on `Config` changes the
+    default for all config classes that do not set it themselves.
+    """
+
+    lazyChoices = False
+    """Whether the choices of the `~lsst.pex.config.ConfigChoiceField` and
+    `~lsst.pex.config.RegistryField` fields of this class are only made when
+    they are used (`bool`).
+
+    If `True`, a choice that has never been selected or accessed is a
+    placeholder that stands for the default config of its type, and is left
+    out of `toDict`, `fingerprint`, `names` and saved files. `load` checks
+    the values assigned to simple fields of a choice that has not been made
+    yet, and keeps the assignments until the choice is selected or
+    accessed; other assignments make the choice. This saves
+    building configs for every entry of large registries that are mostly
+    unused.
+
+    Like `historyMode`, setting this attribute on `Config` changes the
+    default for all config classes that do not set it themselves.
+    """
+
+    loadCacheDir = None
+    """Directory in which `load` keeps compiled config override files, or
+    `None` to only keep them in memory (`str`).
+
+    The compiled files are reused by other processes that load the same
+    files, until the files are modified.
+    """
+
+    loadCacheSize = 256
+    """Maximum number of compiled config override files that `load` keeps in
+    memory, or `None` for no limit (`int`).
+
+    The files loaded least recently are dropped first. The cache is shared
+    by all config classes; `clearLoadCache` empties it.
+    """
+
+    validateDependencies = None
+    """Names of the fields that the ``validate`` method of this class checks
+    beyond the base validation (`tuple` of `str` or `None`).
+
+    `validate` only validates the fields that have changed since the config
+    was last valid. A subclass that overrides ``validate`` has the override
+    called on every validation, since it may check more than the fields of
+    the config, unless this attribute lists the fields it reads; then it is
+    only called again when one of those fields, or a subconfig they hold,
+    has changed. For example:
+
+    .. code-block:: py
+
+        class RangeConfig(Config):
+            low = Field(doc="...", dtype=float, default=0.0)
+            high = Field(doc="...", dtype=float, default=1.0)
+            label = Field(doc="...", dtype=str, default="")
+            validateDependencies = ("low", "high")
+
+            def validate(self):
+                super().validate()
+                if self.low > self.high:
+                    raise ValueError("low > high")
+
+    An override that reads anything outside its own config should leave
+    this attribute `None`.
+
+    The attribute is not inherited: it only covers the override of the class
+    that sets it, so a subclass that overrides ``validate`` again declares
+    the fields of its own checks, or has them called every time. A
+    class that sets it without overriding ``validate`` adds fields to those
+    of the overrides of its bases. The overrides are only skipped when none
+    of the fields declared by any of the classes has changed.
     """
 
     def __iter__(self):
@@ -758,6 +2070,7 @@ class Config(metaclass=ConfigMeta):
         --------
         lsst.pex.config.Config.itervalues
         """
+        self._unshareAll()
         return list(self._storage.values())
 
     def items(self):
@@ -775,6 +2088,7 @@ class Config(metaclass=ConfigMeta):
         --------
         lsst.pex.config.Config.iteritems
         """
+        self._unshareAll()
         return list(self._storage.items())
 
     def iteritems(self):
@@ -792,6 +2106,7 @@ class Config(metaclass=ConfigMeta):
         --------
         lsst.pex.config.Config.items
         """
+        self._unshareAll()
         return iter(self._storage.items())
 
     def itervalues(self):
@@ -806,6 +2121,7 @@ class Config(metaclass=ConfigMeta):
         --------
         lsst.pex.config.Config.values
         """
+        self._unshareAll()
         return iter(self.storage.values())
 
     def iterkeys(self):
@@ -842,20 +2158,37 @@ class Config(metaclass=ConfigMeta):
         when or even the base ``Config.__init__`` should be called.
         """
         name = kw.pop("__name", None)
-        at = kw.pop("__at", getCallStack())
+        at = kw.pop("__at", None)
+        parent = kw.pop("__parent", None)
         # remove __label and ignore it
         kw.pop("__label", "default")
 
         instance = object.__new__(cls)
         instance._frozen = False
         instance._name = name
+        instance._parent = parent
         instance._storage = {}
-        instance._history = {}
-        instance._imports = set()
+        instance._history = _History(cls._fields)
+        instance._imports = _NO_IMPORTS
+        instance._importsStamp = None
+        instance._cache = _NO_CACHE
+        instance._changed = None
+        instance._shared = _NO_SHARED
+        instance._lent = None
+        if at is None:
+            at = instance._getCallStack()
         # load up defaults
+        template = cls._defaultTemplate
+        record = instance.historyMode != "off"
         for field in instance._fields.values():
-            instance._history[field.name] = []
-            field.__set__(instance, field.default, at=at + [field.source], label="default")
+            entry = template.get(field.name)
+            if entry is not None and entry[0] is field and entry[1] is field.default:
+                # default already validated by ConfigMeta
+                instance._storage[field.name] = entry[2]
+                if record:
+                    instance._history[field.name] = [(entry[2], at + [field.source], "default")]
+            else:
+                field.__set__(instance, field.default, at=at + [field.source], label="default")
         # set custom default-overides
         instance.setDefaults()
         # set constructor overides
@@ -867,14 +2200,93 @@ class Config(metaclass=ConfigMeta):
 
         We need to condense and reconstitute the `~lsst.pex.config.Config`,
         since it may contain lambdas (as the ``check`` elements) that cannot
-        be pickled.
+        be pickled. The field values are pickled directly (see
+        `unreduceConfigState`), unless one of them cannot be, in which case
+        the config is saved as Python source (see `unreduceConfig`).
         """
+        try:
+            return (unreduceConfigState, (self.__class__, self._reduceState()))
+        except pickle.PicklingError:
+            pass
         # The stream must be in characters to match the API but pickle
         # requires bytes
         stream = io.StringIO()
         self.saveToStream(stream)
         return (unreduceConfig, (self.__class__, stream.getvalue().encode()))
 
+    def _reduceState(self):
+        """Get the values of this config in a form that can be pickled (for
+        internal use only).
+
+        Returns
+        -------
+        state : `tuple`
+            The states of the fields, as returned by
+            `lsst.pex.config.Field._reduce`, and the modules to import
+            before restoring them.
+
+        Raises
+        ------
+        pickle.PicklingError
+            Raised if the value of a field cannot be represented.
+        """
+        storage = {}
+        for name, field in self._fields.items():
+            storage[name] = field._reduce(self)
+        imports = [imp for imp in sorted(self._imports) if sys.modules.get(imp) is not None]
+        return storage, imports
+
+    @classmethod
+    def _unreduceState(cls, state, name=None, at=None, parent=None):
+        """Create a config from the output of `_reduceState` (for internal
+        use only).
+
+        Parameters
+        ----------
+        state : `tuple`
+            The output of `_reduceState`.
+        name : `str`, optional
+            The name of the config in its parent config.
+        at : `list` of `lsst.pex.config.callStack.StackFrame`, optional
+            The call stack to record in the history.
+        parent : `lsst.pex.config.Config`, optional
+            The config that holds the new config.
+
+        Returns
+        -------
+        config : `lsst.pex.config.Config`
+            A new config of this type. Neither the defaults, `setDefaults`
+            nor ``__init__`` are applied to it.
+        """
+        storage, imports = state
+        for imp in imports:
+            if imp not in sys.modules:
+                importlib.import_module(imp)
+        for fieldName in storage:
+            if fieldName not in cls._fields:
+                raise AttributeError("%s has no attribute %s" % (_typeStr(cls), fieldName))
+
+        instance = object.__new__(cls)
+        instance._frozen = False
+        instance._name = name
+        instance._parent = parent
+        instance._storage = {}
+        instance._history = _History(cls._fields)
+        instance._imports = set(imports) if imports else _NO_IMPORTS
+        instance._importsStamp = None
+        instance._cache = _NO_CACHE
+        instance._changed = None
+        instance._shared = _NO_SHARED
+        instance._lent = None
+        if at is None:
+            at = instance._getCallStack()
+        for field in instance._fields.values():
+            if field.name in storage:
+                field._unreduce(instance, storage[field.name], at)
+            else:
+                field.__set__(instance, field.default, at=at + [field.source], label="default")
+        return instance
+
     def setDefaults(self):
         """Subclass hook for computing defaults.
 
@@ -938,16 +2350,130 @@ class Config(metaclass=ConfigMeta):
         fieldB: True
         fieldC: 'Updated!'
         """
-        at = kw.pop("__at", getCallStack())
+        at = kw.pop("__at", None)
+        if at is None:
+            at = self._getCallStack()
         label = kw.pop("__label", "update")
 
         for name, value in kw.items():
             try:
                 field = self._fields[name]
+                self._beforeChange(name)
                 field.__set__(self, value, at=at, label=label)
             except KeyError:
                 raise KeyError("No field of name %s exists in config type %s" % (name, _typeStr(self)))
 
+    def updateFromDict(self, values, at=None, label="update", atomic=False):
+        """Update the values of fields and items given by their paths.
+
+        Parameters
+        ----------
+        values : `dict`
+            Values keyed by path, relative to this config. Paths may be
+            written as in `names` (``"choice['A'].field"``) or with dots
+            only (``"choice.A.field"``).
+        at : `list` of `lsst.pex.config.callStack.StackFrame`, optional
+            The call stack recorded in the history of every change. By
+            default the call stack is captured once, for all changes.
+        label : `str`, optional
+            Event label for the history.
+        atomic : `bool`, optional
+            If `True`, the values are first applied to a clone of this config
+            (see `clone`), so that this config is left unchanged if any path
+            or value is not valid. This costs a second pass over the values.
+
+        Raises
+        ------
+        KeyError
+            Raised if a path does not name a field or an item.
+        lsst.pex.config.FieldValidationError
+            Raised if a value is not valid for its field.
+
+        Notes
+        -----
+        Each path is resolved once per config class against the fields of
+        the class and cached, so applying many overrides costs little more
+        than assigning them directly. The paths are resolved before any value
+        is assigned, except for the parts below a
+        `~lsst.pex.config.ConfigurableField` or a choice, which are resolved
+        against the class of the config they hold when they are reached.
+        Unless ``atomic`` is `True`, the values assigned before an invalid
+        path or value are kept.
+
+        Examples
+        --------
+        >>> config.updateFromDict({"fieldA": 13, "sub.fieldB": False,
+        ...                        "choice.names": ["A", "B"]})
+        """
+        import lsst.pex.config.loader as pexLoader
+
+        resolved = [(self._parsePath(path), value) for path, value in values.items()]
+        if at is None:
+            at = self._getCallStack()
+
+        def apply(config):
+            for steps, value in resolved:
+                obj, step = pexLoader._locate(config, steps, at)
+                pexLoader._set(obj, step, value, at, label)
+
+        if atomic and not self._frozen:
+            # try the values on a clone first; it is dropped before this
+            # config is modified, so it need not be tracked
+            apply(self._clone(track=False))
+        apply(self)
+
+    @classmethod
+    def _parsePath(cls, path):
+        """Split a field path and resolve it against the fields of this
+        class, caching the result.
+
+        Parameters
+        ----------
+        path : `str` or `tuple`
+            The path, relative to a config of this class, or its steps as
+            split by `_splitPath`.
+
+        Returns
+        -------
+        steps : `tuple`
+            ``(isAttribute, name)`` steps that lead to the value (see
+            `Field._resolvePath`).
+
+        Raises
+        ------
+        KeyError
+            Raised if ``path`` does not name a field or an item.
+        """
+        cache = cls.__dict__["_pathCache"]
+        steps = cache.get(path)
+        if steps is None:
+            steps = cache[path] = cls._resolvePath(_splitPath(path) if isinstance(path, str) else path)
+        return steps
+
+    @classmethod
+    def _resolvePath(cls, steps):
+        """Resolve the steps of a path relative to a config of this class.
+        See `Field._resolvePath`.
+        """
+        if not steps:
+            return steps
+        isAttribute, name = steps[0]
+        field = cls._fields.get(name) if isAttribute else None
+        if field is None:
+            raise KeyError("No field of name %s exists in config type %s" % (name, _typeStr(cls)))
+        return steps[:1] + field._resolvePath(steps[1:])
+
+    @staticmethod
+    def clearLoadCache():
+        """Forget the compiled config override files that `load` keeps in
+        memory.
+
+        Notes
+        -----
+        The files kept on disk in `loadCacheDir` are not removed.
+        """
+        _LOAD_CACHE.clear()
+
     def load(self, filename, root="config"):
         """Modify this config in place by executing the Python code in a
         configuration file.
@@ -978,9 +2504,19 @@ class Config(metaclass=ConfigMeta):
         lsst.pex.config.Config.loadFromStream
         lsst.pex.config.Config.save
         lsst.pex.config.Config.saveFromStream
+
+        Notes
+        -----
+        The compiled file is kept in memory (see `loadCacheSize`), and is
+        reused as long as the modification time and size of the file do not
+        change. It is also kept on disk if `loadCacheDir` is set.
+
+        Files written by `save` are applied without executing them (see
+        `lsst.pex.config.loader`).
         """
-        with open(filename, "r") as f:
-            code = compile(f.read(), filename=filename, mode="exec")
+        import lsst.pex.config.loader as pexLoader
+        code, program = _compileFile(filename, cacheDir=self.loadCacheDir, cacheSize=self.loadCacheSize)
+        if program is None or not pexLoader.apply(program, self, root=root, filename=filename):
             self.loadFromStream(stream=code, root=root, filename=filename)
 
     def loadFromStream(self, stream, root="config", filename=None):
@@ -1015,7 +2551,21 @@ class Config(metaclass=ConfigMeta):
         lsst.pex.config.Config.load
         lsst.pex.config.Config.save
         lsst.pex.config.Config.saveFromStream
+
+        Notes
+        -----
+        Streams written by `saveToStream` are applied without executing them
+        (see `lsst.pex.config.loader`).
         """
+        if isinstance(stream, (str, bytes)):
+            import lsst.pex.config.loader as pexLoader
+            try:
+                program = pexLoader.parse(ast.parse(stream))
+            except SyntaxError:
+                program = None
+            if program is not None and pexLoader.apply(program, self, root=root):
+                return
+
         with RecordingImporter() as importer:
             globals = {"__file__": filename}
             try:
@@ -1037,7 +2587,8 @@ class Config(metaclass=ConfigMeta):
                 else:
                     raise
 
-        self._imports.update(importer.getModules())
+        self._imports = set(self._imports) | importer.getModules()
+        self._invalidateImports()
 
     def save(self, filename, root="config"):
         """Save a Python script to the named file, which, when loaded,
@@ -1071,7 +2622,8 @@ class Config(metaclass=ConfigMeta):
             # os.rename may not work across filesystems
             shutil.move(outfile.name, filename)
 
-    def saveToStream(self, outfile, root="config", skipImports=False):
+    def saveToStream(self, outfile, root="config", skipImports=False, skipUnselected=False,
+                     onlyChanged=False, baseline=None):
         """Save a configuration file to a stream, which, when loaded,
         reproduces this config.
 
@@ -1087,40 +2639,314 @@ class Config(metaclass=ConfigMeta):
             If `True` then do not include ``import`` statements in output,
             this is to support human-oriented output from ``pipetask`` where
             additional clutter is not useful.
+        skipUnselected : `bool`, optional
+            If `True` then only save the selected configs of
+            `~lsst.pex.config.ConfigChoiceField` and
+            `~lsst.pex.config.RegistryField` fields. Loading the output
+            then leaves unselected configs as they are, rather than
+            reproducing them.
+        onlyChanged : `bool`, optional
+            If `True` then only save the fields whose values differ from
+            those of ``baseline``. The output reproduces this config when it
+            is loaded into a config equal to ``baseline``.
+        baseline : `lsst.pex.config.Config`, optional
+            The config to compare with if ``onlyChanged`` is `True`, which
+            must have the same type as this config. By default this is a
+            newly constructed config of that type, with its defaults.
 
         See also
         --------
         lsst.pex.config.Config.save
+        lsst.pex.config.Config.iterSave
         lsst.pex.config.Config.load
         lsst.pex.config.Config.loadFromStream
+
+        Notes
+        -----
+        The output is collected in memory and written to ``outfile`` in
+        large chunks (see `iterSave`).
+        """
+        for chunk in self.iterSave(root=root, skipImports=skipImports, skipUnselected=skipUnselected,
+                                   onlyChanged=onlyChanged, baseline=baseline):
+            outfile.write(chunk)
+
+    def iterSave(self, root="config", skipImports=False, skipUnselected=False, onlyChanged=False,
+                 baseline=None, chunkSize=1 << 16):
+        """Generate the contents of a configuration file which, when loaded,
+        reproduces this config.
+
+        Parameters
+        ----------
+        root : `str`, optional
+            Name to use for the root config variable. The same value must be
+            used when loading (see `lsst.pex.config.Config.load`).
+        skipImports : `bool`, optional
+            If `True` then do not include ``import`` statements in output.
+        skipUnselected : `bool`, optional
+            If `True` then only save the selected configs of choice fields
+            (see `saveToStream`).
+        onlyChanged : `bool`, optional
+            If `True` then only save the fields whose values differ from
+            those of ``baseline`` (see `saveToStream`).
+        baseline : `lsst.pex.config.Config`, optional
+            The config to compare with if ``onlyChanged`` is `True`.
+        chunkSize : `int`, optional
+            Approximate size of the chunks, in characters. A chunk is handed
+            out as soon as a field is written that makes it at least this
+            big.
+
+        Yields
+        ------
+        chunk : `str`
+            The next part of the file. Joined, the chunks are the output of
+            `saveToStream`.
+
+        Notes
+        -----
+        This config is renamed to ``root`` while it is saved, so it should
+        not be used until the generator is exhausted or closed.
         """
+        if not onlyChanged:
+            baseline = None
+        elif baseline is None:
+            baseline = type(self)()
+        elif type(baseline) is not type(self):
+            raise TypeError("baseline is of type %s, expected %s" % (_typeStr(baseline), _typeStr(self)))
+        buffer = _SaveBuffer()
         tmp = self._name
         self._rename(root)
         try:
             if not skipImports:
                 self._collectImports()
-                # Remove self from the set, as it is handled explicitly below
-                self._imports.remove(self.__module__)
                 configType = type(self)
                 typeString = _typeStr(configType)
-                outfile.write(f"import {configType.__module__}\n")
-                outfile.write(f"assert type({root})=={typeString}, 'config is of type %s.%s instead of "
-                              f"{typeString}' % (type({root}).__module__, type({root}).__name__)\n")
+                buffer.write(f"import {configType.__module__}\n")
+                buffer.write(f"assert type({root})=={typeString}, 'config is of type %s.%s instead of "
+                             f"{typeString}' % (type({root}).__module__, type({root}).__name__)\n")
                 for imp in self._imports:
-                    if imp in sys.modules and sys.modules[imp] is not None:
-                        outfile.write(u"import {}\n".format(imp))
-            self._save(outfile)
+                    # the module of self is handled explicitly above; the set
+                    # is kept for the next save, so it is skipped, not removed
+                    if imp != configType.__module__ and sys.modules.get(imp) is not None:
+                        buffer.write(f"import {imp}\n")
+            for _ in self._iterSave(buffer, baseline, skipUnselected):
+                if buffer.size >= chunkSize:
+                    yield buffer.take()
         finally:
             self._rename(tmp)
+        if buffer.size:
+            yield buffer.take()
+
+    def clone(self):
+        """Make a copy of this config that can be modified independently.
+
+        Returns
+        -------
+        clone : `lsst.pex.config.Config`
+            A config of the same type, with the same values and history.
+
+        Notes
+        -----
+        The clone does not copy any subconfigs or containers (such as the
+        values of `~lsst.pex.config.ListField` and
+        `~lsst.pex.config.ConfigField`) up front. They are shared with this
+        config: the clone makes its own copy of a shared value the first
+        time it accesses that value, and this config gives the clone its
+        copy before it modifies the value, or anything in it, itself. Cloning
+        is therefore cheap, even for large config trees, and a clone that
+        only changes a few fields only copies the subconfigs along the paths
+        to those fields.
+
+        The clone is never frozen, whether or not this config is. Freezing
+        either config afterwards does not affect the other one.
+
+        Examples
+        --------
+        >>> from lsst.pex.config import Config, Field
+        >>> class DemoConfig(Config):
+        ...     intField = Field(doc="An integer field", dtype=int, default=42)
+        ...
+        >>> base = DemoConfig()
+        >>> base.freeze()
+        >>> variant = base.clone()
+        >>> variant.intField = 7
+        >>> base.intField, variant.intField
+        (42, 7)
+        """
+        return self._clone(track=not self._frozen)
+
+    def _clone(self, track):
+        """Make a copy of this config that can be modified independently (for
+        internal use only).
+
+        Parameters
+        ----------
+        track : `bool`
+            Whether this config keeps track of the clone, to give it its own
+            copies of the values they share before modifying them (see
+            `_beforeChange`). Only a config that is never modified again, such
+            as a frozen one, may skip this.
+
+        Returns
+        -------
+        clone : `lsst.pex.config.Config`
+            A config of the same type, with the same values and history.
+        """
+        clone = object.__new__(type(self))
+        if hasattr(self, "__dict__"):
+            # a subclass that asked for a __dict__
+            clone.__dict__.update(self.__dict__)
+        clone._frozen = False
+        clone._name = self._name
+        clone._parent = None
+        clone._storage = dict(self._storage)
+        clone._history = _History(self._fields,
+                                  ((name, list(history)) for name, history in self._history.items()))
+        clone._imports = set(self._imports) if self._imports else _NO_IMPORTS
+        clone._importsStamp = self._importsStamp
+        clone._cache = dict(self._cache) if self._cache else _NO_CACHE
+        clone._changed = set(self._changed) if self._changed is not None else None
+        clone._lent = None
+        shared = {name for name, value in self._storage.items()
+                  if value is not None and type(self._fields[name])._copy is not Field._copy}
+        clone._shared = shared if shared else _NO_SHARED
+        if shared and track:
+            if self._lent is None:
+                self._lent = {}
+            ref = weakref.ref(clone)
+            for name in shared:
+                refs = self._lent.setdefault(name, [])
+                if len(refs) >= 16 and not len(refs) & (len(refs) - 1):
+                    # forget the clones that are gone, now and then
+                    refs[:] = [r for r in refs if r() is not None]
+                refs.append(ref)
+        return clone
+
+    def _unshare(self, name):
+        """Get the value of a field, copying it first if it is shared with the
+        config this one was cloned from (for internal use only).
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the field.
+
+        Returns
+        -------
+        value : object
+            The value of the field held by this config, or `None` if it has
+            not been set.
+
+        See also
+        --------
+        lsst.pex.config.Config.clone
+        """
+        value = self._storage.get(name)
+        if name in self._shared:
+            self._shared.discard(name)
+            if value is not None:
+                if self._lent is not None and name in self._lent:
+                    # the clones of this config share the value too
+                    self._release(name)
+                value = self._storage[name] = self._fields[name]._copy(self, value)
+        return value
+
+    def _release(self, name=None):
+        """Give the clones of this config their own copies of the values they
+        share with it (for internal use only).
+
+        Parameters
+        ----------
+        name : `str`, optional
+            Name of the field whose value is copied. If `None`, the values of
+            all fields are.
+        """
+        lent = self._lent
+        names = list(lent) if name is None else [name] if name in lent else []
+        for name in names:
+            value = self._storage.get(name)
+            for ref in lent.pop(name):
+                clone = ref()
+                if clone is not None and name in clone._shared and clone._storage.get(name) is value:
+                    clone._unshare(name)
+        if not lent:
+            self._lent = None
+
+    def _beforeChange(self, name=None):
+        """Give the clones of this config, and of the configs that contain
+        it, their own copies of what is about to be modified (for internal
+        use only).
+
+        Parameters
+        ----------
+        name : `str`, optional
+            Name of the field whose value is about to be modified, in place or
+            by assignment. If `None`, any of them may be.
+
+        Notes
+        -----
+        A clone shares the values of its subconfig and container fields with
+        the config it was cloned from, so a subconfig or container that is
+        about to change may be shared by the clones of this config, or of any
+        config above it. The configs are released from the root down, as
+        copying a config (a shared subconfig) makes it share its values with
+        the copy in turn.
+        """
+        chain = []
+        config = self
+        while config is not None:
+            chain.append(config)
+            config = config._parent
+        for config in reversed(chain):
+            if config._lent is not None:
+                config._release(name if config is self else None)
+
+    def _unshareAll(self):
+        """Copy all the values this config shares with the config it was
+        cloned from (for internal use only).
+        """
+        for name in list(self._shared):
+            self._unshare(name)
 
-    def freeze(self):
+    def freeze(self, compact=False):
         """Make this config, and all subconfigs, read-only.
+
+        Parameters
+        ----------
+        compact : `bool`, optional
+            If `True`, also store the config and its subconfigs compactly:
+            the items of list fields are kept in tuples, those of dict fields
+            in read-only mappings, and the history of all fields in a single
+            tuple. This suits configs that are held frozen for a long time; a
+            clone of the config is as mutable as any other.
+
+        Examples
+        --------
+        >>> from lsst.pex.config import Config, ListField
+        >>> class DemoConfig(Config):
+        ...     values = ListField(doc="Values", dtype=int, default=[1, 2])
+        ...
+        >>> config = DemoConfig()
+        >>> config.freeze(compact=True)
+        >>> isinstance(config.history["values"], tuple)
+        True
+        >>> config.values.list()
+        [1, 2]
         """
         self._frozen = True
         for field in self._fields.values():
             field.freeze(self)
+        if compact:
+            self._compact()
 
-    def _save(self, outfile):
+    def _compact(self):
+        """Store this frozen config and its subconfigs compactly (for
+        internal use only). See `freeze`.
+        """
+        for field in self._fields.values():
+            field._compact(self)
+        self._history = _PackedHistory(self._history)
+
+    def _save(self, outfile, skipUnselected=False):
         """Save this config to an open stream object.
 
         Parameters
@@ -1128,9 +2954,24 @@ class Config(metaclass=ConfigMeta):
         outfile : file-like object
             Destination file object write the config into. Accepts strings not
             bytes.
+        skipUnselected : `bool`, optional
+            If `True`, choice fields only save their selected configs (see
+            `saveToStream`).
+        """
+        for _ in self._iterSave(outfile, skipUnselected=skipUnselected):
+            pass
+
+    def _iterSave(self, outfile, baseline=None, skipUnselected=False):
+        """Save this config to an open stream object, pausing after each
+        field. See `Field._iterSave`.
         """
         for field in self._fields.values():
-            field.save(outfile, self)
+            if baseline is None and type(field)._iterSave is Field._iterSave:
+                # simple fields are written without the generator machinery
+                field.save(outfile, self)
+            else:
+                yield from field._iterSave(outfile, self, baseline, skipUnselected)
+        yield
 
     def _collectImports(self):
         """Adds module containing self to the list of things to import and
@@ -1139,10 +2980,37 @@ class Config(metaclass=ConfigMeta):
         configs it may own and return the set of things to import. This
         returned set will be merged with the set of imports for this config
         class.
+
+        The result is kept until `_invalidateImports` is called on this
+        config or one of its subconfigs, or a registry gains an entry, so
+        saving an unchanged config again does not walk it.
         """
+        if self._importsStamp == _typemapGeneration:
+            # nothing that could add a module has changed since last time
+            return
+        if self._imports is _NO_IMPORTS:
+            self._imports = set()
         self._imports.add(self.__module__)
         for name, field in self._fields.items():
             field._collectImports(self, self._imports)
+        self._importsStamp = _typemapGeneration
+
+    def _invalidateImports(self):
+        """Mark the imports collected by this config and the configs that
+        hold it as out of date (for internal use only).
+
+        Notes
+        -----
+        This must be called whenever a config gains a subconfig of a type it
+        did not hold before (a retarget, a new choice or a new item of a
+        `~lsst.pex.config.ConfigDictField`). Collecting the imports of a
+        config collects those of all its subconfigs, so the configs above
+        one that is already out of date are out of date too.
+        """
+        config = self
+        while config is not None and config._importsStamp is not None:
+            config._importsStamp = None
+            config = config._parent
 
     def toDict(self):
         """Make a dictionary of field names and their values.
@@ -1162,12 +3030,161 @@ class Config(metaclass=ConfigMeta):
         This method uses the `~lsst.pex.config.Field.toDict` method of
         individual fields. Subclasses of `~lsst.pex.config.Field` may need to
         implement a ``toDict`` method for *this* method to work.
+
+        The dictionary is made once and kept until the config changes (for
+        ever, once the config is frozen). Each call returns a copy of the
+        kept dictionary and of the dictionaries and lists within it, so the
+        result may be modified freely.
         """
-        dict_ = {}
-        for name, field in self._fields.items():
-            dict_[name] = field.toDict(self)
+        return _copyDict(self._getDict())
+
+    def _getDict(self):
+        """Get the dictionary made by `toDict`, without copying it (for
+        internal use only).
+
+        Returns
+        -------
+        dict_ : `dict`
+            The kept dictionary of field names and values. It is shared, and
+            must not be modified.
+
+        Notes
+        -----
+        The dictionary is kept in the cache of the config (see
+        `_getCached`).
+        """
+        dict_ = self._getCached("dict")
+        if dict_ is None:
+            dict_ = {}
+            for name, field in self._fields.items():
+                dict_[name] = field.toDict(self)
+            self._setCached("dict", dict_)
         return dict_
 
+    def _getCached(self, key):
+        """Get a value derived from the contents of this config, if it has
+        been kept (for internal use only).
+
+        Parameters
+        ----------
+        key : `str`
+            The kind of value, such as ``"dict"`` for `toDict`.
+
+        Returns
+        -------
+        value : object
+            The kept value, or `None` if there is none or it is out of date.
+
+        Notes
+        -----
+        Values are kept until `_invalidateCache` is called, when a field of
+        this config or of one of its subconfigs changes. Unless the config is
+        frozen, they are also out of date once a registry gains an entry,
+        since a `~lsst.pex.config.RegistryField` includes every registered
+        entry.
+        """
+        entry = self._cache.get(key)
+        if entry is not None and (self._frozen or entry[0] == _typemapGeneration):
+            return entry[1]
+        return None
+
+    def _setCached(self, key, value):
+        """Keep a value derived from the contents of this config (for
+        internal use only).
+
+        Parameters
+        ----------
+        key : `str`
+            The kind of value.
+        value : object
+            The value, which must not be modified once it is kept.
+        """
+        if self._cache is _NO_CACHE:
+            self._cache = {}
+        self._cache[key] = (_typemapGeneration, value)
+
+    def _invalidateCache(self):
+        """Throw away the values kept for this config and the configs that
+        hold it (for internal use only).
+
+        Notes
+        -----
+        This is called by `_recordHistory`, because every change to a field
+        is recorded there, and by anything else that changes the contents of
+        a config. The caches of all the configs up to the root are emptied:
+        a config may keep values (such as being valid) while its subconfigs
+        keep none, so an empty cache says nothing about those above it.
+
+        The cache is replaced rather than cleared, since a clone starts with
+        a copy of it.
+        """
+        config = self
+        while config is not None:
+            if config._cache:
+                config._cache = _NO_CACHE
+            config = config._parent
+
+    def _noteChange(self, name):
+        """Note that a field of this config has changed (for internal use
+        only).
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the field.
+
+        Notes
+        -----
+        The values kept in the cache are thrown away (see `_invalidateCache`)
+        and the field is validated again by the next call to `validate`.
+        """
+        self._invalidateCache()
+        if self._changed is not None:
+            self._changed.add(name)
+
+    def fingerprint(self):
+        """Compute a hash of the contents of this config.
+
+        Returns
+        -------
+        fingerprint : `str`
+            The hexadecimal BLAKE2 hash of the type of the config, and of the
+            values of its fields, including the selections, the targets and
+            the contents of its subconfigs.
+
+        Notes
+        -----
+        Configs with the same contents have the same fingerprint, in any
+        process, so the fingerprint can be used to find duplicate configs
+        without comparing them field by field. The history is not included.
+
+        The fingerprint is kept until the config changes (see
+        `_getCached`), and a change only makes the fingerprints of the
+        changed config and the configs that hold it be computed again.
+        Frozen configs are hashable, with a hash made from their
+        fingerprint, and compare equal when their fingerprints are equal.
+        """
+        return self._getFingerprint().hex()
+
+    def _getFingerprint(self):
+        """Compute the fingerprint of this config as bytes (for internal use
+        only).
+
+        Returns
+        -------
+        digest : `bytes`
+            The digest that `fingerprint` returns in hexadecimal.
+        """
+        fingerprint = self._getCached("fingerprint")
+        if fingerprint is None:
+            digest = hashlib.blake2b(_typeStr(self).encode(), digest_size=20)
+            for name in sorted(self._fields):
+                digest.update(b"\0" + name.encode() + b"=")
+                self._fields[name]._updateFingerprint(self, digest)
+            fingerprint = digest.digest()
+            self._setCached("fingerprint", fingerprint)
+        return fingerprint
+
     def names(self):
         """Get all the field names in the config, recursively.
 
@@ -1175,28 +3192,56 @@ class Config(metaclass=ConfigMeta):
         -------
         names : `list` of `str`
             Field names.
+
+        Notes
+        -----
+        The names are those that `saveToStream` assigns, in the same order,
+        found from an index of field paths built once per config class and
+        extended by the parts that depend on this instance (such as the keys
+        of a `~lsst.pex.config.ConfigDictField`).
+        """
+        names = []
+        self._collectNames("", names)
+        return names
+
+    def _collectNames(self, prefix, names):
+        """Append the paths of all the fields in this config to a list.
+
+        Parameters
+        ----------
+        prefix : `str`
+            The path of this config followed by a ``.``, or an empty string.
+        names : `list` of `str`
+            The list to append to.
+        """
+        for attrs, field, name in type(self)._getNameIndex():
+            if field is None:
+                names.append(prefix + name)
+            else:
+                instance = self
+                for attr in attrs:
+                    instance = getattr(instance, attr)
+                field._collectNames(instance, prefix + "".join(attr + "." for attr in attrs), names)
+
+    @classmethod
+    def _getNameIndex(cls):
+        """Get the index of field paths of this class, building it on first
+        use. See `Field._indexNames`.
+
+        Notes
+        -----
+        The index includes the fields of the classes of its subconfigs, so it
+        is built again once any config class gains a field, or a registry an
+        entry, after it was built.
         """
-        #
-        # Rather than sort out the recursion all over again use the
-        # pre-existing saveToStream()
-        #
-        with io.StringIO() as strFd:
-            self.saveToStream(strFd, "config")
-            contents = strFd.getvalue()
-            strFd.close()
-        #
-        # Pull the names out of the dumped config
-        #
-        keys = []
-        for line in contents.split("\n"):
-            if re.search(r"^((assert|import)\s+|\s*$|#)", line):
-                continue
-
-            mat = re.search(r"^(?:config\.)?([^=]+)\s*=\s*.*", line)
-            if mat:
-                keys.append(mat.group(1))
-
-        return keys
+        entry = cls.__dict__.get("_nameIndex")
+        if entry is None or entry[0] != _typemapGeneration:
+            index = []
+            for field in cls._fields.values():
+                index.extend(field._indexNames())
+            entry = (_typemapGeneration, tuple(index))
+            type.__setattr__(cls, "_nameIndex", entry)
+        return entry[1]
 
     def _rename(self, name):
         """Rename this config object in its parent `~lsst.pex.config.Config`.
@@ -1221,13 +3266,33 @@ class Config(metaclass=ConfigMeta):
         for field in self._fields.values():
             field.rename(self)
 
-    def validate(self):
+    def validate(self, workers=None, collect=False):
         """Validate the Config, raising an exception if invalid.
 
+        Parameters
+        ----------
+        workers : `int`, optional
+            If given, validate every field before raising, and validate the
+            fields of this config that hold subconfigs concurrently, on a
+            pool of this many threads. Each of those fields is validated by a
+            single thread, subconfigs and all, so a config with one large
+            subconfig gains little.
+        collect : `bool`, optional
+            If `True`, validate every field, and return a report of those
+            that are not valid instead of raising.
+
+        Returns
+        -------
+        report : `lsst.pex.config.ValidationReport` or `None`
+            The fields that are not valid, if ``collect`` is `True`.
+
         Raises
         ------
         lsst.pex.config.FieldValidationError
             Raised if verification fails.
+        lsst.pex.config.ConfigValidationError
+            Raised if verification fails and ``workers`` is given. It holds
+            the errors of all the fields that were not valid.
 
         Notes
         -----
@@ -1243,9 +3308,151 @@ class Config(metaclass=ConfigMeta):
         Inter-field relationships should only be checked in derived
         `~lsst.pex.config.Config` classes after calling this method, and base
         validation is complete.
+
+        Only the fields that have changed since the config was last valid are
+        validated again, along with the subconfigs that have changed; a config
+        that has not changed at all is not validated again. Derived classes
+        that override this method should declare which fields their own
+        checks read in `validateDependencies`, so that the checks are skipped
+        when those fields have not changed.
+
+        Derived classes are given the arguments of this method even if they
+        override it without them: when a class is defined, or ``validate`` is
+        assigned to it, an override that takes neither ``workers``,
+        ``collect`` nor ``**kwargs`` is replaced by a wrapper (see
+        `ConfigMeta`). The original method is the ``__wrapped__`` attribute
+        of the wrapper. Overrides that take those arguments are kept as they
+        are, and are called on every validation. When every field is to be
+        validated, this method raises an exception that derived classes
+        should let through if any of its fields are invalid, so that their
+        own checks do not see invalid values. The ``validate`` methods of
+        subconfigs may be called on other threads at the same time, so they
+        should not change anything outside their own config.
         """
-        for field in self._fields.values():
-            field.validate(self)
+        if collect or workers is not None:
+            report = ValidationReport(self._validateAll(workers))
+            if collect:
+                return report
+            report.raiseIfFailed()
+            return
+        if self._getCached("valid"):
+            return
+        fields = [field for name, field in self._fields.items() if self._fieldChanged(name)]
+        run = _validationRun.get()
+        if run is not None:
+            run.validateFields(self, fields)
+        else:
+            for field in fields:
+                field.validate(self)
+        if type(self).validate is Config.validate:
+            self._markValid()
+
+    def _fieldChanged(self, name):
+        """Test whether a field may have changed since this config was last
+        valid (for internal use only).
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the field.
+
+        Returns
+        -------
+        changed : `bool`
+            `True` if the field or any of the subconfigs it validates has
+            changed, or if this config has never been valid.
+        """
+        if self._changed is None or name in self._changed:
+            return True
+        return any(config._getCached("valid") is None for config in self._fields[name]._subconfigs(self))
+
+    def _markValid(self, keep=True):
+        """Record that the fields of this config are valid (for internal use
+        only).
+
+        Parameters
+        ----------
+        keep : `bool`, optional
+            If `True`, also record that the config is valid as a whole, so
+            that it is not validated again until it changes. That is only
+            done if its subconfigs are recorded as valid too.
+
+        Notes
+        -----
+        The record is kept in the cache, so it is thrown away by any change
+        to this config or its subconfigs, and the changed fields are noted
+        again from then on (see `_noteChange`). A config whose ``validate``
+        override is called on every validation (see `validateDependencies`)
+        is never recorded as valid as a whole, nor are the configs that hold
+        it, so that the override is called by theirs.
+        """
+        self._changed = set()
+        if keep and all(config._getCached("valid") for field in self._fields.values()
+                        for config in field._subconfigs(self)):
+            self._setCached("valid", True)
+
+    def _validateChanges(self, validate):
+        """Call the ``validate`` override of this config if anything it
+        checks has changed since the config was last valid (for internal use
+        only).
+
+        Parameters
+        ----------
+        validate : callable
+            The ``validate`` method defined by the class of this config.
+
+        Notes
+        -----
+        If each override in the class hierarchy lists the fields it reads in
+        `validateDependencies`, and none of them has changed, only the base
+        validation is done, for the fields that have changed. Otherwise the
+        override is called, even if nothing has changed.
+        """
+        dependencies = _getValidateDependencies(type(self))
+        if dependencies is None:
+            # the override may check anything, so it is always called
+            validate(self)
+            self._markValid(keep=False)
+            return
+        if self._getCached("valid"):
+            return
+        if (self._changed is not None and
+                not any(self._fieldChanged(name) for name in dependencies)):
+            Config.validate(self)
+        else:
+            validate(self)
+        self._markValid()
+
+    def _validateAll(self, workers=None):
+        """Validate every field of this config and its subconfigs (for
+        internal use only).
+
+        Parameters
+        ----------
+        workers : `int`, optional
+            The number of threads on which to validate the fields that hold
+            subconfigs; if `None`, they are validated in turn.
+
+        Returns
+        -------
+        failures : `list` of `ValidationFailure`
+            The fields that are not valid, and the errors of the ``validate``
+            method of this config.
+        """
+        executor = concurrent.futures.ThreadPoolExecutor(workers) if workers else None
+        run = _ValidationRun(executor)
+        token = _validationRun.set(run)
+        try:
+            self.validate()
+        except _SubtreeInvalid:
+            pass
+        except ValueError as e:
+            run.failures.append(ValidationFailure._fromError(self, None, e))
+        finally:
+            _validationRun.reset(token)
+            if executor is not None:
+                executor.shutdown()
+        return run.failures
 
     def formatHistory(self, name, **kwargs):
         """Format a configuration field's history to a human-readable format.
@@ -1273,6 +3480,74 @@ class Config(metaclass=ConfigMeta):
     """Read-only history.
     """
 
+    def _getCallStack(self, skip=0):
+        """Retrieve the call stack to record in the history of this config
+        (for internal use only).
+
+        Parameters
+        ----------
+        skip : `int`, non-negative
+            Number of stack frames above caller to skip.
+
+        Returns
+        -------
+        stack : `lsst.pex.config.callStack.CallStack`
+            The call stack of the caller, as selected by `historyMode`. It is
+            empty if history is not being recorded.
+
+        Notes
+        -----
+        Like `lsst.pex.config.callStack.getCallStack`, this method and its
+        caller are excluded from the call stack.
+        """
+        mode = self.historyMode
+        if mode == "full":
+            return getCallStack(skip + 1)
+        elif mode == "shallow":
+            return getUserCallStack()
+        else:
+            return CallStack()
+
+    def _recordHistory(self, name, value, at, label):
+        """Add an event to the history of a field (for internal use only).
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the field.
+        value : object
+            Value of the field (or a description of the change).
+        at : `list` of `lsst.pex.config.callStack.StackFrame`
+            The call stack.
+        label : `str`
+            Event label for the history.
+
+        Notes
+        -----
+        The event is dropped if `historyMode` is ``"off"``. If the history
+        of the field exceeds its limit (see `historyLimit`), the oldest
+        events are squashed.
+
+        Every change to a field is recorded here, so this is also where the
+        change is noted for the cache and for `validate` (see `_noteChange`),
+        whatever the history mode.
+        """
+        self._noteChange(name)
+        if self.historyMode == "off":
+            return
+        if type(self._history) is _PackedHistory:
+            # a compacted config that records history again, such as for a
+            # choice it makes when first used
+            self._history = self._history.unpack()
+        history = self._history.setdefault(name, [])
+        history.append((value, at, label))
+        field = self._fields.get(name)
+        limit = field.historyLimit if field is not None else None
+        if limit is None:
+            limit = self.historyLimit
+        if limit is not None and len(history) > limit:
+            _truncateHistory(history, limit)
+
     def __setattr__(self, attr, value, at=None, label="assignment"):
         """Set an attribute (such as a field's value).
 
@@ -1292,14 +3567,17 @@ class Config(metaclass=ConfigMeta):
                 warnings.warn(f"Config field {fullname} is deprecated: {self._fields[attr].deprecated}",
                               FutureWarning, stacklevel=2)
             if at is None:
-                at = getCallStack()
+                at = self._getCallStack()
+            self._beforeChange(attr)
             # This allows Field descriptors to work.
             self._fields[attr].__set__(self, value, at=at, label=label)
         elif hasattr(getattr(self.__class__, attr, None), '__set__'):
             # This allows properties and other non-Field descriptors to work.
             return object.__setattr__(self, attr, value)
-        elif attr in self.__dict__ or attr in ("_name", "_history", "_storage", "_frozen", "_imports"):
-            # This allows specific private attributes to work.
+        elif attr in getattr(self, "__dict__", ()):
+            # This allows the attributes of subclasses that ask for a
+            # __dict__ to work; the private state of a config is in slots,
+            # which are descriptors.
             self.__dict__[attr] = value
         else:
             # We throw everything else.
@@ -1308,13 +3586,16 @@ class Config(metaclass=ConfigMeta):
     def __delattr__(self, attr, at=None, label="deletion"):
         if attr in self._fields:
             if at is None:
-                at = getCallStack()
+                at = self._getCallStack()
+            self._beforeChange(attr)
             self._fields[attr].__delete__(self, at=at, label=label)
         else:
             object.__delattr__(self, attr)
 
     def __eq__(self, other):
         if type(other) == type(self):
+            if self._frozen and other._frozen:
+                return self._getFingerprint() == other._getFingerprint()
             for name in self._fields:
                 thisValue = getattr(self, name)
                 otherValue = getattr(other, name)
@@ -1329,13 +3610,18 @@ class Config(metaclass=ConfigMeta):
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def __hash__(self):
+        if not self._frozen:
+            raise TypeError("unhashable type: %r (only frozen configs are hashable)" % _typeStr(self))
+        return hash(self._getFingerprint())
+
     def __str__(self):
-        return str(self.toDict())
+        return str(self._getDict())
 
     def __repr__(self):
         return "%s(%s)" % (
             _typeStr(self),
-            ", ".join("%s=%r" % (k, v) for k, v in self.toDict().items() if v is not None)
+            ", ".join("%s=%r" % (k, v) for k, v in self._getDict().items() if v is not None)
         )
 
     def compare(self, other, shortcut=True, rtol=1E-8, atol=1E-8, output=None):
@@ -1383,6 +3669,30 @@ class Config(metaclass=ConfigMeta):
                               rtol=rtol, atol=atol, output=output)
 
 
+def unreduceConfigState(cls, state):
+    """Create a `~lsst.pex.config.Config` from pickled field values.
+
+    Parameters
+    ----------
+    cls : `lsst.pex.config.Config`-type
+        A `lsst.pex.config.Config` type (not an instance) that is instantiated
+        with the values in ``state``.
+    state : `tuple`
+        The field values, as returned by
+        `lsst.pex.config.Config._reduceState`.
+
+    Returns
+    -------
+    config : `lsst.pex.config.Config`
+        Config instance.
+
+    See also
+    --------
+    unreduceConfig
+    """
+    return cls._unreduceState(state)
+
+
 def unreduceConfig(cls, stream):
     """Create a `~lsst.pex.config.Config` from a stream.
 
@@ -27,12 +27,16 @@
 
 __all__ = ["ConfigChoiceField"]
 
+import sys
 import copy
+import importlib
 import collections.abc
 
-from .config import Config, Field, FieldValidationError, _typeStr, _joinNamePath
+from .config import (Config, Field, FieldValidationError, _typeStr, _joinNamePath, _canonicalValue,
+                     _SubtreeInvalid, _autocast)
+from .configField import ConfigField
 from .comparison import getComparisonName, compareScalars, compareConfigs
-from .callStack import getCallStack, getStackFrame
+from .callStack import getStackFrame
 
 
 class SelectionSet(collections.abc.MutableSet):
@@ -61,12 +65,11 @@ class SelectionSet(collections.abc.MutableSet):
     """
 
     def __init__(self, dict_, value, at=None, label="assignment", setHistory=True):
-        if at is None:
-            at = getCallStack()
         self._dict = dict_
         self._field = self._dict._field
         self._config = self._dict._config
-        self.__history = self._config._history.setdefault(self._field.name, [])
+        if at is None:
+            at = self._config._getCallStack()
         if value is not None:
             try:
                 for v in value:
@@ -81,7 +84,7 @@ class SelectionSet(collections.abc.MutableSet):
             self._set = set()
 
         if setHistory:
-            self.__history.append(("Set selection to %s" % self, at, label))
+            self._config._recordHistory(self._field.name, "Set selection to %s" % self, at, label)
 
     def add(self, value, at=None):
         """Add a value to the selected set.
@@ -89,15 +92,16 @@ class SelectionSet(collections.abc.MutableSet):
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config,
                                        "Cannot modify a frozen Config")
+        self._config._beforeChange(self._field.name)
 
         if at is None:
-            at = getCallStack()
+            at = self._config._getCallStack()
 
         if value not in self._dict:
             # invoke __getitem__ to make sure it's present
             self._dict.__getitem__(value, at=at)
 
-        self.__history.append(("added %s to selection" % value, at, "selection"))
+        self._config._recordHistory(self._field.name, "added %s to selection" % value, at, "selection")
         self._set.add(value)
 
     def discard(self, value, at=None):
@@ -106,16 +110,28 @@ class SelectionSet(collections.abc.MutableSet):
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config,
                                        "Cannot modify a frozen Config")
+        self._config._beforeChange(self._field.name)
 
         if value not in self._dict:
             return
 
         if at is None:
-            at = getCallStack()
+            at = self._config._getCallStack()
 
-        self.__history.append(("removed %s from selection" % value, at, "selection"))
+        self._config._recordHistory(self._field.name, "removed %s from selection" % value, at, "selection")
         self._set.discard(value)
 
+    def _copy(self, dict_):
+        """Copy this selection for a copy of its `ConfigInstanceDict` (for
+        internal use only).
+        """
+        other = object.__new__(type(self))
+        other._dict = dict_
+        other._field = self._field
+        other._config = dict_._config
+        other._set = set(self._set)
+        return other
+
     def __len__(self):
         return len(self._set)
 
@@ -148,10 +164,11 @@ class ConfigInstanceDict(collections.abc.Mapping):
     def __init__(self, config, field):
         collections.abc.Mapping.__init__(self)
         self._dict = dict()
+        self._pending = {}
+        self._listed = None
         self._selection = None
         self._config = config
         self._field = field
-        self._history = config._history.setdefault(field.name, [])
         self.__doc__ = field.doc
 
     types = property(lambda x: x._field.typemap)
@@ -165,12 +182,43 @@ class ConfigInstanceDict(collections.abc.Mapping):
     def __iter__(self):
         return iter(self._field.typemap)
 
+    def _copy(self, config):
+        """Copy this dictionary for a clone of its config (for internal use
+        only).
+
+        Parameters
+        ----------
+        config : `lsst.pex.config.Config`
+            The config instance that owns the copy.
+
+        Returns
+        -------
+        copy : `ConfigInstanceDict`
+            A dictionary with the same selection, holding clones of the
+            instantiated configs.
+        """
+        other = object.__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        other._config = config
+        other._dict = {}
+        fullname = _joinNamePath(config._name, self._field.name)
+        for k, v in self._dict.items():
+            other._dict[k] = v = v.clone()
+            v._parent = config
+            v._name = _joinNamePath(name=fullname, index=k)
+        other._pending = {k: list(fragments) for k, fragments in self._pending.items()}
+        other._listed = None
+        if isinstance(self._selection, SelectionSet):
+            other._selection = self._selection._copy(other)
+        return other
+
     def _setSelection(self, value, at=None, label="assignment"):
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config, "Cannot modify a frozen Config")
+        self._config._beforeChange(self._field.name)
 
         if at is None:
-            at = getCallStack(1)
+            at = self._config._getCallStack(1)
 
         if value is None:
             self._selection = None
@@ -180,7 +228,7 @@ class ConfigInstanceDict(collections.abc.Mapping):
             if value not in self._dict:
                 self.__getitem__(value, at=at)  # just invoke __getitem__ to make sure it's present
             self._selection = value
-        self._history.append((value, at, label))
+        self._config._recordHistory(self._field.name, value, at, label)
 
     def _getNames(self):
         if not self._field.multi:
@@ -199,6 +247,7 @@ class ConfigInstanceDict(collections.abc.Mapping):
             raise FieldValidationError(self._field, self._config,
                                        "Single-selection field has no attribute 'names'")
         self._selection = None
+        self._config._noteChange(self._field.name)
 
     def _getName(self):
         if self._field.multi:
@@ -217,6 +266,7 @@ class ConfigInstanceDict(collections.abc.Mapping):
             raise FieldValidationError(self._field, self._config,
                                        "Multi-selection field has no attribute 'name'")
         self._selection = None
+        self._config._noteChange(self._field.name)
 
     names = property(_getNames, _setNames, _delNames)
     """List of names of active items in a multi-selection
@@ -257,14 +307,154 @@ class ConfigInstanceDict(collections.abc.Mapping):
                                            "Unknown key %r in Registry/ConfigChoiceField" % k)
             name = _joinNamePath(self._config._name, self._field.name, k)
             if at is None:
-                at = getCallStack()
-                at.insert(0, dtype._source)
-            value = self._dict.setdefault(k, dtype(__name=name, __at=at, __label=label))
+                at = [dtype._source] + self._config._getCallStack()
+            value = self._makeChoice(k, dtype, name, at, label)
+            fragments = self._pending.get(k)
+            if fragments:
+                # the choice is only kept, and the assignments dropped, once
+                # all of them have been made
+                import lsst.pex.config.loader as pexLoader
+                for path, valueKind, fragment, fragmentAt in fragments:
+                    pexLoader._assign(value, path, valueKind, fragment, fragmentAt)
+            value = self._dict.setdefault(k, value)
+            self._pending.pop(k, None)
+            if self._config._frozen:
+                # a choice left as a placeholder by a lazy config
+                value.freeze()
+            self._config._invalidateImports()
+            self._config._invalidateCache()
         return value
 
+    def _makeChoice(self, k, dtype, name, at, label):
+        """Make the config of a choice with its default values (for internal
+        use only).
+
+        Parameters
+        ----------
+        k : `str`
+            Key of the choice.
+        dtype : `lsst.pex.config.Config`-type
+            The type of the choice.
+        name : `str`
+            Full name of the config.
+        at : `list` of `lsst.pex.config.callStack.StackFrame`
+            The call stack to record in the history.
+        label : `str`
+            Label for the history.
+
+        Returns
+        -------
+        config : `lsst.pex.config.Config`
+            The new config.
+        """
+        return dtype(__name=name, __at=at, __label=label, __parent=self._config)
+
+    def _isDeferred(self, k):
+        """Test whether assignments to a choice are kept until the choice is
+        made (for internal use only).
+
+        Parameters
+        ----------
+        k : `str`
+            Key of the choice.
+
+        Returns
+        -------
+        deferred : `bool`
+            `True` if the choice has not been made, and the config makes its
+            choices lazily (see `lsst.pex.config.Config.lazyChoices`).
+        """
+        return (self._config.lazyChoices and not self._config._frozen and k not in self._dict and
+                k in self._field.typemap)
+
+    def _defer(self, k, path, valueKind, value, at):
+        """Keep an assignment of a loaded file to a choice that has not been
+        made, until it is (for internal use only).
+
+        Parameters
+        ----------
+        k : `str`
+            Key of the choice.
+        path : `tuple`
+            The ``(isAttribute, name)`` steps from the choice to the target
+            of the assignment.
+        valueKind : `str`
+            The kind of value (see `lsst.pex.config.loader.parse`).
+        value : object
+            The value to assign.
+        at : `lsst.pex.config.callStack.CallStack`
+            The call stack to record in the history when the assignment is
+            made.
+
+        Returns
+        -------
+        deferred : `bool`
+            `True` if the assignment is kept; `False` if it is to be made now,
+            and fail as it would without lazy choices. Only assignments of
+            valid values to simple fields of the choice, or of its
+            subconfigs, are kept, since those can be checked now.
+        """
+        dtype = self._field.typemap[k]
+        try:
+            dtype._resolvePath(path)
+        except KeyError:
+            return False
+        for isAttribute, name in path[:-1]:
+            field = dtype._fields.get(name) if isAttribute else None
+            if not isinstance(field, ConfigField):
+                return False
+            dtype = field.dtype
+        isAttribute, name = path[-1]
+        field = dtype._fields.get(name) if isAttribute else None
+        if (field is None or type(field).__set__ is not Field.__set__ or
+                valueKind not in ("literal", "float")):
+            return False
+        if value is not None:
+            try:
+                field._validateValue(_autocast(float(value) if valueKind == "float" else value,
+                                               field.dtype))
+            except Exception:
+                return False
+        self._pending.setdefault(k, []).append((path, valueKind, value, at))
+        self._config._invalidateImports()
+        self._config._invalidateCache()
+        return True
+
+    def _listedKeys(self):
+        """Get the keys of the choices that are saved and included in
+        `~lsst.pex.config.Config.toDict` (for internal use only).
+
+        Returns
+        -------
+        keys : iterable of `str`
+            Every key of the typemap, or, if the config makes its choices
+            lazily, those of the choices that have been made or that have
+            assignments kept for them. Once the config is frozen, the keys
+            no longer change.
+        """
+        if self._listed is not None:
+            return self._listed
+        if not self._config.lazyChoices:
+            return iter(self)
+        return [k for k in self._field.typemap if k in self._dict or k in self._pending]
+
+    def __eq__(self, other):
+        if not isinstance(other, ConfigInstanceDict) or not (self._config.lazyChoices or
+                                                             other._config.lazyChoices):
+            return collections.abc.Mapping.__eq__(self, other)
+        # a choice that has not been made has the default config of its type,
+        # so it is only made to compare it to one that has
+        if set(self) != set(other):
+            return False
+        keys = set(self._listedKeys()) | set(other._listedKeys())
+        return all(self[k] == other[k] for k in keys)
+
+    __hash__ = None
+
     def __setitem__(self, k, value, at=None, label="assignment"):
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config, "Cannot modify a frozen Config")
+        self._config._beforeChange(self._field.name)
 
         try:
             dtype = self._field.typemap[k]
@@ -277,14 +467,19 @@ class ConfigInstanceDict(collections.abc.Mapping):
             raise FieldValidationError(self._field, self._config, msg)
 
         if at is None:
-            at = getCallStack()
+            at = self._config._getCallStack()
         name = _joinNamePath(self._config._name, self._field.name, k)
         oldValue = self._dict.get(k, None)
+        if oldValue is None and k in self._pending:
+            oldValue = self.__getitem__(k, at=at)
         if oldValue is None:
             if value == dtype:
-                self._dict[k] = value(__name=name, __at=at, __label=label)
+                self._dict[k] = self._makeChoice(k, dtype, name, at, label)
             else:
-                self._dict[k] = dtype(__name=name, __at=at, __label=label, **value._storage)
+                self._dict[k] = dtype(__name=name, __at=at, __label=label, __parent=self._config,
+                                      **value._storage)
+            self._config._invalidateImports()
+            self._config._invalidateCache()
         else:
             if value == dtype:
                 value = value()
@@ -298,8 +493,8 @@ class ConfigInstanceDict(collections.abc.Mapping):
         if hasattr(getattr(self.__class__, attr, None), '__set__'):
             # This allows properties to work.
             object.__setattr__(self, attr, value)
-        elif attr in self.__dict__ or attr in ["_history", "_field", "_config", "_dict",
-                                               "_selection", "__doc__"]:
+        elif attr in self.__dict__ or attr in ["_field", "_config", "_dict", "_pending",
+                                               "_listed", "_selection", "__doc__"]:
             # This allows specific private attributes to work.
             object.__setattr__(self, attr, value)
         else:
@@ -361,7 +556,9 @@ class ConfigChoiceField(Field):
     will fail.
 
     When saving a configuration with a ``ConfigChoiceField``, the entire set is
-    saved, as well as the active selection.
+    saved, as well as the active selection. If the config makes its choices
+    lazily (see `lsst.pex.config.Config.lazyChoices`), only the choices that
+    have been made are saved.
 
     Examples
     --------
@@ -423,14 +620,13 @@ class ConfigChoiceField(Field):
         self.multi = multi
 
     def _getOrMake(self, instance, label="default"):
-        instanceDict = instance._storage.get(self.name)
+        instanceDict = instance._unshare(self.name)
         if instanceDict is None:
-            at = getCallStack(1)
+            at = instance._getCallStack(1)
             instanceDict = self.dtype(instance, self)
             instanceDict.__doc__ = self.doc
             instance._storage[self.name] = instanceDict
-            history = instance._history.setdefault(self.name, [])
-            history.append(("Initialized from defaults", at, label))
+            instance._recordHistory(self.name, "Initialized from defaults", at, label)
 
         return instanceDict
 
@@ -444,7 +640,7 @@ class ConfigChoiceField(Field):
         if instance._frozen:
             raise FieldValidationError(self, instance, "Cannot modify a frozen Config")
         if at is None:
-            at = getCallStack()
+            at = instance._getCallStack()
         instanceDict = self._getOrMake(instance)
         if isinstance(value, self.instanceDictClass):
             for k, v in value.items():
@@ -454,6 +650,66 @@ class ConfigChoiceField(Field):
         else:
             instanceDict._setSelection(value, at=at, label=label)
 
+    def _copy(self, instance, value):
+        return value._copy(instance)
+
+    def _resolvePath(self, steps):
+        if not steps:
+            return steps
+        isAttribute, key = steps[0]
+        if isAttribute and key == ("names" if self.multi else "name") and len(steps) == 1:
+            return steps
+        try:
+            self.typemap[key]
+        except Exception:
+            raise KeyError("Unknown key %r in Registry/ConfigChoiceField %s" % (key, self.name))
+        # the config class of the choice is looked up in the typemap when the
+        # choice is made, and a registry entry may be replaced by then
+        return ((False, key), (None, steps[1:])) if len(steps) > 1 else ((False, key),)
+
+    def _indexNames(self):
+        return [((), self, None)]
+
+    def _collectNames(self, instance, prefix, names):
+        instanceDict = self.__get__(instance)
+        fullname = prefix + self.name
+        for k in instanceDict._listedKeys():
+            instanceDict[k]._collectNames(_joinNamePath(name=fullname, index=k) + ".", names)
+        names.append(fullname + (".names" if self.multi else ".name"))
+
+    def _reduce(self, instance):
+        instanceDict = instance._storage.get(self.name)
+        if instanceDict is None:
+            return None
+        # choices with assignments kept for them are made, so that only
+        # configs are pickled
+        for k in list(instanceDict._pending):
+            instanceDict[k]
+        selection = instanceDict._selection
+        if isinstance(selection, SelectionSet):
+            selection = list(selection)
+        # the module of each config is imported before the config is
+        # restored, in case that is what adds it to a registry
+        values = {k: (type(v).__module__, v._reduceState()) for k, v in instanceDict._dict.items()}
+        return selection, values
+
+    def _unreduce(self, instance, state, at):
+        if state is None:
+            return
+        selection, values = state
+        instanceDict = self.dtype(instance, self)
+        for k, (module, configState) in values.items():
+            if module not in sys.modules:
+                importlib.import_module(module)
+            name = _joinNamePath(instance._name, self.name, k)
+            instanceDict._dict[k] = self.typemap[k]._unreduceState(configState, name, at, instance)
+        if self.multi and selection is not None:
+            instanceDict._selection = SelectionSet(instanceDict, selection, at=at, setHistory=False)
+        else:
+            instanceDict._selection = selection
+        instance._storage[self.name] = instanceDict
+        instance._recordHistory(self.name, selection, at, "unpickle")
+
     def rename(self, instance):
         instanceDict = self.__get__(instance)
         fullname = _joinNamePath(instance._name, self.name)
@@ -466,8 +722,16 @@ class ConfigChoiceField(Field):
             raise FieldValidationError(self, instance, msg)
         elif instanceDict.active is not None:
             if self.multi:
+                invalid = None
                 for a in instanceDict.active:
-                    a.validate()
+                    try:
+                        a.validate()
+                    except _SubtreeInvalid as e:
+                        # errors are being collected; collect those of the
+                        # other selections too
+                        invalid = e
+                if invalid is not None:
+                    raise invalid
             else:
                 instanceDict.active.validate()
 
@@ -481,32 +745,97 @@ class ConfigChoiceField(Field):
             dict_["name"] = instanceDict.name
 
         values = {}
-        for k, v in instanceDict.items():
-            values[k] = v.toDict()
+        for k in instanceDict._listedKeys():
+            values[k] = instanceDict[k]._getDict()
         dict_["values"] = values
 
         return dict_
 
+    def _updateFingerprint(self, instance, digest):
+        instanceDict = self.__get__(instance)
+        selection = instanceDict._selection
+        if self.multi and selection is not None:
+            selection = sorted(selection)
+        digest.update(_canonicalValue(selection).encode())
+        for key, k in sorted((_canonicalValue(k), k) for k in instanceDict._listedKeys()):
+            digest.update(key.encode())
+            digest.update(instanceDict[k]._getFingerprint())
+
     def freeze(self, instance):
         # When a config is frozen it should not be affected by anything further
         # being added to a registry, so create a deep copy of the registry
         # typemap
         self.typemap = copy.deepcopy(self.typemap)
         instanceDict = self.__get__(instance)
-        for v in instanceDict.values():
-            v.freeze()
+        if instance.lazyChoices:
+            instanceDict._listed = tuple(instanceDict._listedKeys())
+        for k in instanceDict._listedKeys():
+            if k not in instanceDict._pending:
+                instanceDict[k].freeze()
 
     def _collectImports(self, instance, imports):
         instanceDict = self.__get__(instance)
-        for config in instanceDict.values():
+        for k in instanceDict._listedKeys():
+            fragments = instanceDict._pending.get(k)
+            if fragments is not None:
+                imports.add(self.typemap[k].__module__)
+                imports.update(value.__module__ for _, valueKind, value, _ in fragments
+                               if valueKind == "call")
+                continue
+            config = instanceDict[k]
             config._collectImports()
             imports |= config._imports
 
+    def _compact(self, instance):
+        instanceDict = self.__get__(instance)
+        for k in instanceDict._listedKeys():
+            if k not in instanceDict._pending:
+                instanceDict[k]._compact()
+
+    def _subconfigs(self, instance):
+        active = self.__get__(instance).active
+        if active is None:
+            return ()
+        return active if self.multi else (active,)
+
     def save(self, outfile, instance):
+        for _ in self._iterSave(outfile, instance):
+            pass
+
+    def _iterSave(self, outfile, instance, baseline=None, skipUnselected=False):
         instanceDict = self.__get__(instance)
         fullname = _joinNamePath(instance._name, self.name)
-        for v in instanceDict.values():
-            v._save(outfile)
+        if skipUnselected:
+            # only the selected configs, without making the others
+            selection = instanceDict._selection
+            if selection is None:
+                selection = ()
+            elif not self.multi:
+                selection = (selection,)
+        else:
+            selection = instanceDict._listedKeys()
+        if baseline is None:
+            for k in selection:
+                fragments = instanceDict._pending.get(k)
+                if fragments is None:
+                    yield from instanceDict[k]._iterSave(outfile, skipUnselected=skipUnselected)
+                    continue
+                import lsst.pex.config.loader as pexLoader
+                itemName = _joinNamePath(fullname, index=k)
+                for path, valueKind, value, _ in fragments:
+                    outfile.write(u"{}{}\n".format(itemName, pexLoader._format(path, valueKind, value)))
+                yield
+        else:
+            baselineDict = self.__get__(baseline)
+            for k in selection:
+                yield from instanceDict[k]._iterSave(outfile, baselineDict[k], skipUnselected)
+            selection = instanceDict._selection
+            other = baselineDict._selection
+            if self.multi and selection is not None and other is not None:
+                if set(selection) == set(other):
+                    return
+            elif selection == other:
+                return
         if self.multi:
             outfile.write(u"{}.names={!r}\n".format(fullname, instanceDict.names))
         else:
@@ -522,6 +851,7 @@ class ConfigChoiceField(Field):
         other = type(self)(doc=self.doc, typemap=self.typemap, default=copy.deepcopy(self.default),
                            optional=self.optional, multi=self.multi)
         other.source = self.source
+        other.historyLimit = self.historyLimit
         return other
 
     def _compare(self, instance1, instance2, shortcut, rtol, atol, output):
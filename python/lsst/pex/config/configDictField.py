@@ -27,10 +27,11 @@
 
 __all__ = ["ConfigDictField"]
 
-from .config import Config, FieldValidationError, _autocast, _typeStr, _joinNamePath
+from .config import (Config, FieldValidationError, _autocast, _typeStr, _joinNamePath, _pathKey,
+                     _canonicalValue, _SubtreeInvalid, _FieldDoc)
 from .dictField import Dict, DictField
 from .comparison import compareConfigs, compareScalars, getComparisonName
-from .callStack import getCallStack, getStackFrame
+from .callStack import getStackFrame
 
 
 class ConfigDict(Dict):
@@ -40,15 +41,29 @@ class ConfigDict(Dict):
     the history of changes to any of its items.
     """
 
+    __slots__ = ()
+
+    __doc__ = _FieldDoc(__doc__)
+
     def __init__(self, config, field, value, at, label):
         Dict.__init__(self, config, field, value, at, label, setHistory=False)
-        self.history.append(("Dict initialized", at, label))
+        self._config._recordHistory(self._field.name, "Dict initialized", at, label)
+
+    def _copy(self, config):
+        other = Dict._copy(self, config)
+        other._dict = {}
+        for k, v in self._dict.items():
+            other._dict[k] = v = v.clone()
+            v._parent = config
+            v._name = _joinNamePath(config._name, self._field.name, k)
+        return other
 
     def __setitem__(self, k, x, at=None, label="setitem", setHistory=True):
         if self._config._frozen:
             msg = "Cannot modify a frozen Config. "\
                   "Attempting to set item at key %r to value %s" % (k, x)
             raise FieldValidationError(self._field, self._config, msg)
+        self._config._beforeChange(self._field.name)
 
         # validate keytype
         k = _autocast(k, self._field.keytype)
@@ -65,28 +80,30 @@ class ConfigDict(Dict):
             raise FieldValidationError(self._field, self._config, msg)
 
         if at is None:
-            at = getCallStack()
+            at = self._config._getCallStack()
         name = _joinNamePath(self._config._name, self._field.name, k)
         oldValue = self._dict.get(k, None)
         if oldValue is None:
             if x == dtype:
-                self._dict[k] = dtype(__name=name, __at=at, __label=label)
+                self._dict[k] = dtype(__name=name, __at=at, __label=label, __parent=self._config)
             else:
-                self._dict[k] = dtype(__name=name, __at=at, __label=label, **x._storage)
+                self._dict[k] = dtype(__name=name, __at=at, __label=label, __parent=self._config,
+                                      **x._storage)
+            self._config._invalidateImports()
             if setHistory:
-                self.history.append(("Added item at key %s" % k, at, label))
+                self._config._recordHistory(self._field.name, "Added item at key %s" % k, at, label)
         else:
             if x == dtype:
                 x = dtype()
             oldValue.update(__at=at, __label=label, **x._storage)
             if setHistory:
-                self.history.append(("Modified item at key %s" % k, at, label))
+                self._config._recordHistory(self._field.name, "Modified item at key %s" % k, at, label)
 
     def __delitem__(self, k, at=None, label="delitem"):
         if at is None:
-            at = getCallStack()
+            at = self._config._getCallStack()
         Dict.__delitem__(self, k, at, label, False)
-        self.history.append(("Removed item at key %s" % k, at, label))
+        self._config._recordHistory(self._field.name, "Removed item at key %s" % k, at, label)
 
 
 class ConfigDictField(DictField):
@@ -168,6 +185,42 @@ class ConfigDictField(DictField):
         self.dictCheck = dictCheck
         self.itemCheck = itemCheck
 
+    def _resolvePath(self, steps):
+        if not steps:
+            return steps
+        key = _pathKey(steps[0][1], self.keytype)
+        return ((False, key),) + self.itemtype._resolvePath(steps[1:])
+
+    def _indexNames(self):
+        return [((), self, None)]
+
+    def _collectNames(self, instance, prefix, names):
+        configDict = self.__get__(instance)
+        fullname = prefix + self.name
+        names.append(fullname)
+        if configDict is not None:
+            for k, v in configDict.items():
+                itemName = _joinNamePath(name=fullname, index=k)
+                names.append(itemName)
+                v._collectNames(itemName + ".", names)
+
+    def _reduce(self, instance):
+        configDict = instance._storage.get(self.name)
+        if configDict is None:
+            return None
+        return {k: v._reduceState() for k, v in configDict._dict.items()}
+
+    def _unreduce(self, instance, state, at):
+        if state is None:
+            DictField._unreduce(self, instance, state, at)
+            return
+        items = {}
+        for k, configState in state.items():
+            name = _joinNamePath(instance._name, self.name, k)
+            items[k] = self.itemtype._unreduceState(configState, name, at, instance)
+        instance._storage[self.name] = ConfigDict._restore(instance, self, items)
+        instance._recordHistory(self.name, "Dict initialized", at, "unpickle")
+
     def rename(self, instance):
         configDict = self.__get__(instance)
         if configDict is not None:
@@ -175,15 +228,35 @@ class ConfigDictField(DictField):
                 fullname = _joinNamePath(instance._name, self.name, k)
                 configDict[k]._rename(fullname)
 
+    def _collectImports(self, instance, imports):
+        configDict = self.__get__(instance)
+        if configDict is not None:
+            for config in configDict._dict.values():
+                config._collectImports()
+                imports |= config._imports
+
+    def _subconfigs(self, instance):
+        configDict = self.__get__(instance)
+        return configDict._dict.values() if configDict is not None else ()
+
     def validate(self, instance):
         value = self.__get__(instance)
         if value is not None:
+            invalid = None
             for k in value:
                 item = value[k]
-                item.validate()
+                try:
+                    item.validate()
+                except _SubtreeInvalid as e:
+                    # errors are being collected; collect those of the other
+                    # items too
+                    invalid = e
+                    continue
                 if self.itemCheck is not None and not self.itemCheck(item):
                     msg = "Item at key %r is not a valid value: %s" % (k, item)
                     raise FieldValidationError(self, instance, msg)
+            if invalid is not None:
+                raise invalid
         DictField.validate(self, instance)
 
     def toDict(self, instance):
@@ -193,21 +266,40 @@ class ConfigDictField(DictField):
 
         dict_ = {}
         for k in configDict:
-            dict_[k] = configDict[k].toDict()
+            dict_[k] = configDict[k]._getDict()
 
         return dict_
 
+    def _updateFingerprint(self, instance, digest):
+        configDict = self.__get__(instance)
+        if configDict is None:
+            digest.update(_canonicalValue(None).encode())
+            return
+        # keys are sorted by their text, since complex keys have no order
+        for key, k in sorted((_canonicalValue(k), k) for k in configDict):
+            digest.update(key.encode())
+            digest.update(configDict[k]._getFingerprint())
+
     def save(self, outfile, instance):
+        for _ in self._iterSave(outfile, instance):
+            pass
+
+    def _iterSave(self, outfile, instance, baseline=None, skipUnselected=False):
         configDict = self.__get__(instance)
         fullname = _joinNamePath(instance._name, self.name)
+        if baseline is not None and configDict == self.__get__(baseline):
+            # the items are only compared as a whole, as saving them starts
+            # from an empty dictionary
+            return
         if configDict is None:
             outfile.write(u"{}={!r}\n".format(fullname, configDict))
+            yield
             return
 
         outfile.write(u"{}={!r}\n".format(fullname, {}))
         for v in configDict.values():
             outfile.write(u"{}={}()\n".format(v._name, _typeStr(v)))
-            v._save(outfile)
+            yield from v._iterSave(outfile, skipUnselected=skipUnselected)
 
     def freeze(self, instance):
         configDict = self.__get__(instance)
@@ -29,7 +29,7 @@ __all__ = ["ConfigField"]
 
 from .config import Config, Field, FieldValidationError, _joinNamePath, _typeStr
 from .comparison import compareConfigs, getComparisonName
-from .callStack import getCallStack, getStackFrame
+from .callStack import getStackFrame
 
 
 class ConfigField(Field):
@@ -92,10 +92,9 @@ class ConfigField(Field):
         if instance is None or not isinstance(instance, Config):
             return self
         else:
-            value = instance._storage.get(self.name, None)
+            value = instance._unshare(self.name)
             if value is None:
-                at = getCallStack()
-                at.insert(0, self.source)
+                at = [self.source] + instance._getCallStack()
                 self.__set__(instance, self.default, at=at, label="default")
             return value
 
@@ -111,21 +110,48 @@ class ConfigField(Field):
             raise FieldValidationError(self, instance, msg)
 
         if at is None:
-            at = getCallStack()
+            at = instance._getCallStack()
 
-        oldValue = instance._storage.get(self.name, None)
+        oldValue = instance._unshare(self.name)
         if oldValue is None:
             if value == self.dtype:
-                instance._storage[self.name] = self.dtype(__name=name, __at=at, __label=label)
+                instance._storage[self.name] = self.dtype(__name=name, __at=at, __label=label,
+                                                          __parent=instance)
             else:
-                instance._storage[self.name] = self.dtype(__name=name, __at=at,
-                                                          __label=label, **value._storage)
+                instance._storage[self.name] = self.dtype(__name=name, __at=at, __label=label,
+                                                          __parent=instance, **value._storage)
         else:
             if value == self.dtype:
                 value = value()
             oldValue.update(__at=at, __label=label, **value._storage)
-        history = instance._history.setdefault(self.name, [])
-        history.append(("config value set", at, label))
+        instance._recordHistory(self.name, "config value set", at, label)
+
+    def _copy(self, instance, value):
+        value = value.clone()
+        value._parent = instance
+        value._name = _joinNamePath(instance._name, self.name)
+        return value
+
+    def _resolvePath(self, steps):
+        return self.dtype._resolvePath(steps)
+
+    def _indexNames(self):
+        # the fields of the subconfig are indexed as part of this config
+        return [((self.name,) + attrs, field, None if name is None else self.name + "." + name)
+                for attrs, field, name in self.dtype._getNameIndex()]
+
+    def _collectNames(self, instance, prefix, names):
+        self.__get__(instance)._collectNames(prefix + self.name + ".", names)
+
+    def _reduce(self, instance):
+        value = instance._storage.get(self.name)
+        return value._reduceState() if value is not None else None
+
+    def _unreduce(self, instance, state, at):
+        if state is not None:
+            name = _joinNamePath(prefix=instance._name, name=self.name)
+            instance._storage[self.name] = self.dtype._unreduceState(state, name, at, instance)
+            instance._recordHistory(self.name, "config value set", at, "unpickle")
 
     def rename(self, instance):
         """Rename the field in a `~lsst.pex.config.Config` (for internal use
@@ -154,6 +180,9 @@ class ConfigField(Field):
         value._collectImports()
         imports |= value._imports
 
+    def _subconfigs(self, instance):
+        return (self.__get__(instance),)
+
     def save(self, outfile, instance):
         """Save this field to a file (for internal use only).
 
@@ -178,6 +207,11 @@ class ConfigField(Field):
         value = self.__get__(instance)
         value._save(outfile)
 
+    def _iterSave(self, outfile, instance, baseline=None, skipUnselected=False):
+        if baseline is not None:
+            baseline = self.__get__(baseline)
+        yield from self.__get__(instance)._iterSave(outfile, baseline, skipUnselected)
+
     def freeze(self, instance):
         """Make this field read-only.
 
@@ -222,7 +256,10 @@ class ConfigField(Field):
         the field values in the subconfig.
         """
         value = self.__get__(instance)
-        return value.toDict()
+        return value._getDict()
+
+    def _updateFingerprint(self, instance, digest):
+        digest.update(self.__get__(instance)._getFingerprint())
 
     def validate(self, instance):
         """Validate the field (for internal use only).
@@ -28,10 +28,11 @@
 __all__ = ('ConfigurableInstance', 'ConfigurableField')
 
 import copy
+import pickle
 
-from .config import Config, Field, _joinNamePath, _typeStr, FieldValidationError
+from .config import Config, Field, _joinNamePath, _typeStr, _isImportable, FieldValidationError
 from .comparison import compareConfigs, getComparisonName
-from .callStack import getCallStack, getStackFrame
+from .callStack import getStackFrame
 
 
 class ConfigurableInstance:
@@ -64,7 +65,7 @@ class ConfigurableInstance:
             storage = self._field.default._storage
         else:
             storage = {}
-        value = self._ConfigClass(__name=name, __at=at, __label=label, **storage)
+        value = self._ConfigClass(__name=name, __at=at, __label=label, __parent=self._config, **storage)
         object.__setattr__(self, "_value", value)
 
     def __init__(self, config, field, at=None, label="default"):
@@ -76,12 +77,67 @@ class ConfigurableInstance:
         object.__setattr__(self, "_value", None)
 
         if at is None:
-            at = getCallStack()
+            at = config._getCallStack()
         at += [self._field.source]
         self.__initValue(at, label)
 
-        history = config._history.setdefault(field.name, [])
-        history.append(("Targeted and initialized from defaults", at, label))
+        config._recordHistory(field.name, "Targeted and initialized from defaults", at, label)
+
+    @classmethod
+    def _restore(cls, config, field, target, ConfigClass, value):
+        """Make an instance from a config that has already been validated
+        (for internal use only).
+
+        Parameters
+        ----------
+        config : `lsst.pex.config.Config`
+            Config instance that contains the ``field``.
+        field : `ConfigurableField`
+            The field that holds this instance.
+        target : configurable class
+            The targeted configurable.
+        ConfigClass : `lsst.pex.config.Config`-type
+            The configuration class of ``target``.
+        value : ``ConfigClass``
+            The configuration of ``target``.
+
+        Returns
+        -------
+        instance : `ConfigurableInstance`
+            The new instance. Its creation is not recorded in the history.
+        """
+        self = object.__new__(cls)
+        object.__setattr__(self, "_config", config)
+        object.__setattr__(self, "_field", field)
+        object.__setattr__(self, "__doc__", config)
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_ConfigClass", ConfigClass)
+        object.__setattr__(self, "_value", value)
+        return self
+
+    def _copy(self, config):
+        """Copy this instance for a clone of its config (for internal use
+        only).
+
+        Parameters
+        ----------
+        config : `lsst.pex.config.Config`
+            The config instance that owns the copy.
+
+        Returns
+        -------
+        copy : `ConfigurableInstance`
+            An instance with the same target, holding a clone of the
+            targeted config.
+        """
+        other = object.__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        object.__setattr__(other, "_config", config)
+        value = self._value.clone()
+        value._parent = config
+        value._name = _joinNamePath(config._name, self._field.name)
+        object.__setattr__(other, "_value", value)
+        return other
 
     target = property(lambda x: x._target)
     """The targeted configurable (read-only).
@@ -112,6 +168,7 @@ class ConfigurableInstance:
         """
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config, "Cannot modify a frozen Config")
+        self._config._beforeChange(self._field.name)
 
         try:
             ConfigClass = self._field.validateTarget(target, ConfigClass)
@@ -119,15 +176,16 @@ class ConfigurableInstance:
             raise FieldValidationError(self._field, self._config, e.message)
 
         if at is None:
-            at = getCallStack()
+            at = self._config._getCallStack()
         object.__setattr__(self, "_target", target)
         if ConfigClass != self.ConfigClass:
             object.__setattr__(self, "_ConfigClass", ConfigClass)
             self.__initValue(at, label)
+        # the module of the new target has not been collected
+        self._config._invalidateImports()
 
-        history = self._config._history.setdefault(self._field.name, [])
         msg = "retarget(target=%s, ConfigClass=%s)" % (_typeStr(target), _typeStr(ConfigClass))
-        history.append((msg, at, label))
+        self._config._recordHistory(self._field.name, msg, at, label)
 
     def __getattr__(self, name):
         return getattr(self._value, name)
@@ -146,7 +204,7 @@ class ConfigurableInstance:
             object.__setattr__(self, name, value)
         else:
             if at is None:
-                at = getCallStack()
+                at = self._config._getCallStack()
             self._value.__setattr__(name, value, at=at, label=label)
 
     def __delattr__(self, name, at=None, label="delete"):
@@ -163,7 +221,7 @@ class ConfigurableInstance:
             object.__delattr__(self, name)
         except AttributeError:
             if at is None:
-                at = getCallStack()
+                at = self._config._getCallStack()
             self._value.__delattr__(name, at=at, label=label)
 
 
@@ -274,10 +332,10 @@ class ConfigurableField(Field):
         self.ConfigClass = ConfigClass
 
     def __getOrMake(self, instance, at=None, label="default"):
-        value = instance._storage.get(self.name, None)
+        value = instance._unshare(self.name)
         if value is None:
             if at is None:
-                at = getCallStack(1)
+                at = instance._getCallStack(1)
             value = ConfigurableInstance(instance, self, at=at, label=label)
             instance._storage[self.name] = value
         return value
@@ -292,7 +350,7 @@ class ConfigurableField(Field):
         if instance._frozen:
             raise FieldValidationError(self, instance, "Cannot modify a frozen Config")
         if at is None:
-            at = getCallStack()
+            at = instance._getCallStack()
         oldValue = self.__getOrMake(instance, at=at)
 
         if isinstance(value, ConfigurableInstance):
@@ -308,6 +366,44 @@ class ConfigurableField(Field):
                 (value, _typeStr(value), _typeStr(oldValue.ConfigClass))
             raise FieldValidationError(self, instance, msg)
 
+    def _copy(self, instance, value):
+        return value._copy(instance)
+
+    def _resolvePath(self, steps):
+        # the target, and so the config class, may be changed by retarget
+        return ((None, steps),) if steps else steps
+
+    def _indexNames(self):
+        return [((), self, None)]
+
+    def _collectNames(self, instance, prefix, names):
+        value = self.__getOrMake(instance)
+        value._value._collectNames(prefix + self.name + ".", names)
+
+    def _reduce(self, instance):
+        value = instance._storage.get(self.name)
+        if value is None:
+            return None
+        if value._target is self.target and value._ConfigClass is self.ConfigClass:
+            target = ConfigClass = None
+        elif _isImportable(value._target) and _isImportable(value._ConfigClass):
+            target, ConfigClass = value._target, value._ConfigClass
+        else:
+            raise pickle.PicklingError("Cannot reduce target %r of field %s" % (value._target, self.name))
+        return target, ConfigClass, value._value._reduceState()
+
+    def _unreduce(self, instance, state, at):
+        if state is None:
+            return
+        target, ConfigClass, configState = state
+        if target is None:
+            target, ConfigClass = self.target, self.ConfigClass
+        name = _joinNamePath(instance._name, self.name)
+        config = ConfigClass._unreduceState(configState, name, at, instance)
+        value = ConfigurableInstance._restore(instance, self, target, ConfigClass, config)
+        instance._storage[self.name] = value
+        instance._recordHistory(self.name, "Targeted and initialized from defaults", at, "unpickle")
+
     def rename(self, instance):
         fullname = _joinNamePath(instance._name, self.name)
         value = self.__getOrMake(instance)
@@ -320,20 +416,38 @@ class ConfigurableField(Field):
         value.value._collectImports()
         imports |= value.value._imports
 
+    def _subconfigs(self, instance):
+        return (self.__get__(instance).value,)
+
     def save(self, outfile, instance):
+        for _ in self._iterSave(outfile, instance):
+            pass
+
+    def _iterSave(self, outfile, instance, baseline=None, skipUnselected=False):
         fullname = _joinNamePath(instance._name, self.name)
         value = self.__getOrMake(instance)
         target = value.target
-
-        if target != self.target:
+        ConfigClass = value.ConfigClass
+
+        if baseline is not None:
+            other = self.__getOrMake(baseline)
+            if target != other.target or ConfigClass != other.ConfigClass:
+                # the values are saved in full after a retarget
+                retarget = True
+                baseline = None
+            else:
+                retarget = False
+                baseline = other._value
+        else:
             # not targeting the field-default target.
+            retarget = target != self.target
+        if retarget:
             # save target information
-            ConfigClass = value.ConfigClass
             outfile.write(u"{}.retarget(target={}, ConfigClass={})\n\n".format(fullname,
                                                                                _typeStr(target),
                                                                                _typeStr(ConfigClass)))
         # save field values
-        value._save(outfile)
+        yield from value._value._iterSave(outfile, baseline, skipUnselected)
 
     def freeze(self, instance):
         value = self.__getOrMake(instance)
@@ -341,7 +455,12 @@ class ConfigurableField(Field):
 
     def toDict(self, instance):
         value = self.__get__(instance)
-        return value.toDict()
+        return value._value._getDict()
+
+    def _updateFingerprint(self, instance, digest):
+        value = self.__get__(instance)
+        digest.update(f"{_typeStr(value._target)},{_typeStr(value._ConfigClass)}".encode())
+        digest.update(value._value._getFingerprint())
 
     def validate(self, instance):
         value = self.__get__(instance)
@@ -358,8 +477,10 @@ class ConfigurableField(Field):
         WARNING: this must be overridden by subclasses if they change the
         constructor signature!
         """
-        return type(self)(doc=self.doc, target=self.target, ConfigClass=self.ConfigClass,
-                          default=copy.deepcopy(self.default))
+        other = type(self)(doc=self.doc, target=self.target, ConfigClass=self.ConfigClass,
+                           default=copy.deepcopy(self.default))
+        other.historyLimit = self.historyLimit
+        return other
 
     def _compare(self, instance1, instance2, shortcut, rtol, atol, output):
         """Compare two fields for equality.
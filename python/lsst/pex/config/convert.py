@@ -73,7 +73,7 @@ def makePropertySet(config):
 
     if config is not None:
         ps = dafBase.PropertySet()
-        _helper(ps, None, config.toDict())
+        _helper(ps, None, config._getDict())
         return ps
     else:
         return None
@@ -115,6 +115,6 @@ def makePolicy(config):
                 p.set(k, v)
         return p
     if config:
-        return _helper(config.toDict())
+        return _helper(config._getDict())
     else:
         return None
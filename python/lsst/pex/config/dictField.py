@@ -28,24 +28,28 @@
 __all__ = ["DictField"]
 
 import collections.abc
+import types
 
-from .config import Field, FieldValidationError, _typeStr, _autocast, _joinNamePath
-from .comparison import getComparisonName, compareScalars
-from .callStack import getCallStack, getStackFrame
+from .config import Field, FieldValidationError, _typeStr, _autocast, _joinNamePath, _pathKey, _FieldDoc
+from .comparison import getComparisonName, compareScalars, compareSequences
+from .callStack import getStackFrame
 
 
 class Dict(collections.abc.MutableMapping):
     """An internal mapping container.
 
-    This class emulates a `dict`, but adds validation and provenance.
+    This class emulates a `dict`, but adds validation and provenance. Like
+    `~lsst.pex.config.listField.List`, it has no ``__dict__``.
     """
 
+    __slots__ = ("_field", "_config", "_dict")
+
+    __doc__ = _FieldDoc(__doc__)
+
     def __init__(self, config, field, value, at, label, setHistory=True):
         self._field = field
         self._config = config
         self._dict = {}
-        self._history = self._config._history.setdefault(self._field.name, [])
-        self.__doc__ = field.doc
         if value is not None:
             try:
                 for k in value:
@@ -56,12 +60,62 @@ class Dict(collections.abc.MutableMapping):
                     (value, _typeStr(value))
                 raise FieldValidationError(self._field, self._config, msg)
         if setHistory:
-            self._history.append((dict(self._dict), at, label))
+            self._config._recordHistory(self._field.name, dict(self._dict), at, label)
 
-    history = property(lambda x: x._history)
+    history = property(lambda x: x._config._history[x._field.name])
     """History (read-only).
     """
 
+    @classmethod
+    def _restore(cls, config, field, items):
+        """Make a mapping from items that have already been validated (for
+        internal use only).
+
+        Parameters
+        ----------
+        config : `lsst.pex.config.Config`
+            Config instance that contains the ``field``.
+        field : `DictField`
+            Instance of the `DictField` using this mapping.
+        items : `dict`
+            The items of the mapping, which the new mapping takes ownership
+            of.
+
+        Returns
+        -------
+        value : `Dict`
+            The new mapping. Its creation is not recorded in the history.
+        """
+        self = object.__new__(cls)
+        self._field = field
+        self._config = config
+        self._dict = items
+        return self
+
+    def _copy(self, config):
+        """Copy this mapping for a clone of its config (for internal use
+        only).
+
+        Parameters
+        ----------
+        config : `lsst.pex.config.Config`
+            The config instance that owns the copy.
+
+        Returns
+        -------
+        copy : `Dict`
+            A mapping with the same items, whose history is that of
+            ``config``.
+        """
+        other = object.__new__(type(self))
+        if hasattr(self, "__dict__"):
+            # a subclass that asked for a __dict__
+            other.__dict__.update(self.__dict__)
+        other._field = self._field
+        other._config = config
+        other._dict = dict(self._dict)
+        return other
+
     def __getitem__(self, k):
         return self._dict[k]
 
@@ -79,6 +133,7 @@ class Dict(collections.abc.MutableMapping):
             msg = "Cannot modify a frozen Config. "\
                 "Attempting to set item at key %r to value %s" % (k, x)
             raise FieldValidationError(self._field, self._config, msg)
+        self._config._beforeChange(self._field.name)
 
         # validate keytype
         k = _autocast(k, self._field.keytype)
@@ -105,35 +160,40 @@ class Dict(collections.abc.MutableMapping):
             raise FieldValidationError(self._field, self._config, msg)
 
         if at is None:
-            at = getCallStack()
+            at = self._config._getCallStack()
 
         self._dict[k] = x
         if setHistory:
-            self._history.append((dict(self._dict), at, label))
+            self._config._recordHistory(self._field.name, dict(self._dict), at, label)
 
     def __delitem__(self, k, at=None, label="delitem", setHistory=True):
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config,
                                        "Cannot modify a frozen Config")
+        self._config._beforeChange(self._field.name)
 
         del self._dict[k]
         if setHistory:
             if at is None:
-                at = getCallStack()
-            self._history.append((dict(self._dict), at, label))
+                at = self._config._getCallStack()
+            self._config._recordHistory(self._field.name, dict(self._dict), at, label)
 
     def __repr__(self):
+        if isinstance(self._dict, types.MappingProxyType):
+            # held compactly by a frozen config
+            return repr(dict(self._dict))
         return repr(self._dict)
 
     def __str__(self):
-        return str(self._dict)
+        return repr(self)
 
     def __setattr__(self, attr, value, at=None, label="assignment"):
         if hasattr(getattr(self.__class__, attr, None), '__set__'):
             # This allows properties to work.
             object.__setattr__(self, attr, value)
-        elif attr in self.__dict__ or attr in ["_field", "_config", "_history", "_dict", "__doc__"]:
-            # This allows specific private attributes to work.
+        elif attr in getattr(self, "__dict__", ()):
+            # This allows the attributes of subclasses that ask for a
+            # __dict__ to work; the private attributes are in slots.
             object.__setattr__(self, attr, value)
         else:
             # We throw everything else.
@@ -262,14 +322,43 @@ class DictField(Field):
             raise FieldValidationError(self, instance, msg)
 
         if at is None:
-            at = getCallStack()
+            at = instance._getCallStack()
         if value is not None:
             value = self.DictClass(instance, self, value, at=at, label=label)
         else:
-            history = instance._history.setdefault(self.name, [])
-            history.append((value, at, label))
+            instance._recordHistory(self.name, value, at, label)
+
+        instance._storage[self.name] = value
+        if self.name in instance._shared:
+            instance._shared.discard(self.name)
+
+    def _copy(self, instance, value):
+        return value._copy(instance)
 
+    def _compact(self, instance):
+        Field._compact(self, instance)
+        value = instance._storage.get(self.name)
+        if value is not None:
+            # a new value, since the old one may be shared with a clone; the
+            # items are not, since a clone copies them before any change
+            items = types.MappingProxyType(value._dict)
+            instance._storage[self.name] = type(value)._restore(instance, self, items)
+            if self.name in instance._shared:
+                instance._shared.discard(self.name)
+
+    def _resolvePath(self, steps):
+        if len(steps) != 1:
+            return Field._resolvePath(self, steps)
+        return ((False, _pathKey(steps[0][1], self.keytype)),)
+
+    def _reduce(self, instance):
+        value = instance._storage.get(self.name)
+        return dict(value._dict) if value is not None else None
+
+    def _unreduce(self, instance, state, at):
+        value = self.DictClass._restore(instance, self, state) if state is not None else None
         instance._storage[self.name] = value
+        instance._recordHistory(self.name, dict(state) if state is not None else None, at, "unpickle")
 
     def toDict(self, instance):
         """Convert this field's key-value pairs into a regular `dict`.
@@ -317,7 +406,8 @@ class DictField(Field):
 
         Notes
         -----
-        Floating point comparisons are performed by `numpy.allclose`.
+        Floating point comparisons are performed by `numpy.isclose`, for all
+        the items at once (see `lsst.pex.config.compareSequences`).
         """
         d1 = getattr(instance1, self.name)
         d2 = getattr(instance2, self.name)
@@ -331,12 +421,6 @@ class DictField(Field):
             return True
         if not compareScalars("keys for %s" % name, set(d1.keys()), set(d2.keys()), output=output):
             return False
-        equal = True
-        for k, v1 in d1.items():
-            v2 = d2[k]
-            result = compareScalars("%s[%r]" % (name, k), v1, v2, dtype=self.itemtype,
-                                    rtol=rtol, atol=atol, output=output)
-            if not result and shortcut:
-                return False
-            equal = equal and result
-        return equal
+        keys = list(d1.keys())
+        return compareSequences(name, [d1[k] for k in keys], [d2[k] for k in keys], dtype=self.itemtype,
+                                rtol=rtol, atol=atol, output=output, keys=keys)
@@ -190,6 +190,12 @@ def format(config, name=None, writeSourceLine=True, prefix="", verbose=False):
         even before any source line. The default is an empty string.
     verbose : `bool`, optional
         Default is `False`.
+
+    Notes
+    -----
+    If older events were dropped from the history because of
+    `lsst.pex.config.Config.historyLimit`, a line noting how many were
+    dropped is shown in their place.
     """
 
     if name is None:
@@ -200,6 +206,9 @@ def format(config, name=None, writeSourceLine=True, prefix="", verbose=False):
 
     outputs = []
     for value, stack, label in config.history[name]:
+        if label == "truncated":
+            outputs.append([None, "... %d earlier entries truncated ..." % value])
+            continue
         output = []
         for frame in stack:
             if frame.function in ("__new__", "__set__", "__setattr__", "execfile", "wrapper") or \
@@ -219,20 +228,27 @@ def format(config, name=None, writeSourceLine=True, prefix="", verbose=False):
 
         outputs.append([value, output])
 
+    # Truncation markers are strings rather than lists of lines
+    events = [(value, output) for value, output in outputs if isinstance(output, list)]
+
     # Find the maximum widths of the value and file:lineNo fields.
     if writeSourceLine:
-        sourceLengths = []
-        for value, output in outputs:
-            sourceLengths.append(max([len(x[0][0]) for x in output]))
+        sourceLengths = [0]
+        for value, output in events:
+            sourceLengths.append(max([len(x[0][0]) for x in output] or [0]))
         sourceLength = max(sourceLengths)
 
-    valueLength = len(prefix) + max([len(str(value)) for value, output in outputs])
+    valueLength = len(prefix) + max([len(str(value)) for value, output in events] or [0])
 
     # Generate the config history content.
     msg = []
     fullname = "%s.%s" % (config._name, name) if config._name is not None else name
     msg.append(_colorize(re.sub(r"^root\.", "", fullname), "NAME"))
     for value, output in outputs:
+        if not isinstance(output, list):
+            # marker for truncated history
+            msg.append(prefix + _colorize(output, "TEXT"))
+            continue
         line = prefix + _colorize("%-*s" % (valueLength, value), "VALUE") + " "
         for i, vt in enumerate(output):
             if writeSourceLine:
@@ -29,9 +29,9 @@ __all__ = ["ListField"]
 
 import collections.abc
 
-from .config import Field, FieldValidationError, _typeStr, _autocast, _joinNamePath
-from .comparison import compareScalars, getComparisonName
-from .callStack import getCallStack, getStackFrame
+from .config import Field, FieldValidationError, _typeStr, _autocast, _joinNamePath, _pathKey, _FieldDoc
+from .comparison import compareScalars, compareSequences, getComparisonName
+from .callStack import getStackFrame
 
 
 class List(collections.abc.MutableSequence):
@@ -59,23 +59,30 @@ class List(collections.abc.MutableSequence):
         Raised if an item in the ``value`` parameter does not have the
         appropriate type for this field or does not pass the
         `ListField.itemCheck` method of the ``field`` parameter.
+
+    Notes
+    -----
+    A ``List`` has no ``__dict__``; its history is looked up in its config
+    and its ``__doc__`` is that of its field.
     """
 
+    __slots__ = ("_field", "_config", "_list")
+
+    __doc__ = _FieldDoc(__doc__)
+
     def __init__(self, config, field, value, at, label, setHistory=True):
         self._field = field
         self._config = config
-        self._history = self._config._history.setdefault(self._field.name, [])
         self._list = []
-        self.__doc__ = field.doc
         if value is not None:
             try:
                 for i, x in enumerate(value):
-                    self.insert(i, x, setHistory=False)
+                    self.insert(i, x, at=at, setHistory=False)
             except TypeError:
                 msg = "Value %s is of incorrect type %s. Sequence type expected" % (value, _typeStr(value))
                 raise FieldValidationError(self._field, self._config, msg)
         if setHistory:
-            self.history.append((list(self._list), at, label))
+            self._config._recordHistory(self._field.name, list(self._list), at, label)
 
     def validateItem(self, i, x):
         """Validate an item to determine if it can be included in the list.
@@ -104,12 +111,62 @@ class List(collections.abc.MutableSequence):
             msg = "Item at position %d is not a valid value: %s" % (i, x)
             raise FieldValidationError(self._field, self._config, msg)
 
+    @classmethod
+    def _restore(cls, config, field, items):
+        """Make a list from items that have already been validated (for
+        internal use only).
+
+        Parameters
+        ----------
+        config : `lsst.pex.config.Config`
+            Config instance that contains the ``field``.
+        field : `ListField`
+            Instance of the `ListField` using this ``List``.
+        items : `list`
+            The items of the list, which the new ``List`` takes ownership of.
+
+        Returns
+        -------
+        value : `List`
+            The new list. Its creation is not recorded in the history.
+        """
+        self = object.__new__(cls)
+        self._field = field
+        self._config = config
+        self._list = items
+        return self
+
+    def _copy(self, config):
+        """Copy this list for a clone of its config (for internal use only).
+
+        Parameters
+        ----------
+        config : `lsst.pex.config.Config`
+            The config instance that owns the copy.
+
+        Returns
+        -------
+        copy : `List`
+            A list with the same items, whose history is that of ``config``.
+        """
+        other = object.__new__(type(self))
+        if hasattr(self, "__dict__"):
+            # a subclass that asked for a __dict__
+            other.__dict__.update(self.__dict__)
+        other._field = self._field
+        other._config = config
+        other._list = list(self._list)
+        return other
+
     def list(self):
         """Sequence of items contained by the `List` (`list`).
         """
+        if isinstance(self._list, tuple):
+            # held compactly by a frozen config
+            return list(self._list)
         return self._list
 
-    history = property(lambda x: x._history)
+    history = property(lambda x: x._config._history[x._field.name])
     """Read-only history.
     """
 
@@ -123,6 +180,7 @@ class List(collections.abc.MutableSequence):
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config,
                                        "Cannot modify a frozen Config")
+        self._config._beforeChange(self._field.name)
         if isinstance(i, slice):
             k, stop, step = i.indices(len(self))
             for j, xj in enumerate(x):
@@ -137,8 +195,8 @@ class List(collections.abc.MutableSequence):
         self._list[i] = x
         if setHistory:
             if at is None:
-                at = getCallStack()
-            self.history.append((list(self._list), at, label))
+                at = self._config._getCallStack()
+            self._config._recordHistory(self._field.name, list(self._list), at, label)
 
     def __getitem__(self, i):
         return self._list[i]
@@ -147,11 +205,12 @@ class List(collections.abc.MutableSequence):
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config,
                                        "Cannot modify a frozen Config")
+        self._config._beforeChange(self._field.name)
         del self._list[i]
         if setHistory:
             if at is None:
-                at = getCallStack()
-            self.history.append((list(self._list), at, label))
+                at = self._config._getCallStack()
+            self._config._recordHistory(self._field.name, list(self._list), at, label)
 
     def __iter__(self):
         return iter(self._list)
@@ -175,14 +234,14 @@ class List(collections.abc.MutableSequence):
             parameter. Default is `True`.
         """
         if at is None:
-            at = getCallStack()
+            at = self._config._getCallStack()
         self.__setitem__(slice(i, i), [x], at=at, label=label, setHistory=setHistory)
 
     def __repr__(self):
-        return repr(self._list)
+        return repr(list(self._list))
 
     def __str__(self):
-        return str(self._list)
+        return str(list(self._list))
 
     def __eq__(self, other):
         try:
@@ -204,8 +263,9 @@ class List(collections.abc.MutableSequence):
         if hasattr(getattr(self.__class__, attr, None), '__set__'):
             # This allows properties to work.
             object.__setattr__(self, attr, value)
-        elif attr in self.__dict__ or attr in ["_field", "_config", "_history", "_list", "__doc__"]:
-            # This allows specific private attributes to work.
+        elif attr in getattr(self, "__dict__", ()):
+            # This allows the attributes of subclasses that ask for a
+            # __dict__ to work; the private attributes are in slots.
             object.__setattr__(self, attr, value)
         else:
             # We throw everything else.
@@ -257,6 +317,11 @@ class ListField(Field):
     RangeField
     RegistryField
     """
+
+    ListClass = List
+    """The class of the values of this field (a subclass of `List`).
+    """
+
     def __init__(self, doc, dtype, default=None, optional=False,
                  listCheck=None, itemCheck=None,
                  length=None, minLength=None, maxLength=None,
@@ -358,15 +423,43 @@ class ListField(Field):
             raise FieldValidationError(self, instance, "Cannot modify a frozen Config")
 
         if at is None:
-            at = getCallStack()
+            at = instance._getCallStack()
 
         if value is not None:
-            value = List(instance, self, value, at, label)
+            value = self.ListClass(instance, self, value, at, label)
         else:
-            history = instance._history.setdefault(self.name, [])
-            history.append((value, at, label))
+            instance._recordHistory(self.name, value, at, label)
 
         instance._storage[self.name] = value
+        if self.name in instance._shared:
+            instance._shared.discard(self.name)
+
+    def _copy(self, instance, value):
+        return value._copy(instance)
+
+    def _compact(self, instance):
+        value = instance._storage.get(self.name)
+        if value is not None:
+            # a new value, since the old one may be shared with a clone
+            instance._storage[self.name] = type(value)._restore(instance, self, tuple(value._list))
+            if self.name in instance._shared:
+                instance._shared.discard(self.name)
+
+    def _resolvePath(self, steps):
+        if len(steps) == 1:
+            index = _pathKey(steps[0][1], int)
+            if isinstance(index, int):
+                return ((False, index),)
+        return Field._resolvePath(self, steps)
+
+    def _reduce(self, instance):
+        value = instance._storage.get(self.name)
+        return list(value._list) if value is not None else None
+
+    def _unreduce(self, instance, state, at):
+        value = self.ListClass._restore(instance, self, state) if state is not None else None
+        instance._storage[self.name] = value
+        instance._recordHistory(self.name, list(state) if state is not None else None, at, "unpickle")
 
     def toDict(self, instance):
         """Convert the value of this field to a plain `list`.
@@ -417,7 +510,8 @@ class ListField(Field):
 
         Notes
         -----
-        Floating point comparisons are performed by `numpy.allclose`.
+        Floating point comparisons are performed by `numpy.isclose`, for all
+        the items at once (see `lsst.pex.config.compareSequences`).
         """
         l1 = getattr(instance1, self.name)
         l2 = getattr(instance2, self.name)
@@ -431,11 +525,4 @@ class ListField(Field):
             return True
         if not compareScalars("size for %s" % name, len(l1), len(l2), output=output):
             return False
-        equal = True
-        for n, v1, v2 in zip(range(len(l1)), l1, l2):
-            result = compareScalars("%s[%d]" % (name, n), v1, v2, dtype=self.dtype,
-                                    rtol=rtol, atol=atol, output=output)
-            if not result and shortcut:
-                return False
-            equal = equal and result
-        return equal
+        return compareSequences(name, l1, l2, dtype=self.itemtype, rtol=rtol, atol=atol, output=output)
@@ -0,0 +1,440 @@
+# This file is part of pex_config.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This software is dual licensed under the GNU General Public License and also
+# under a 3-clause BSD license. Recipients may choose which of these licenses
+# to use; please see the files gpl-3.0.txt and/or bsd_license.txt,
+# respectively.  If you choose the GPL option then the following text applies
+# (but note that there is still no warranty even if you opt for BSD instead):
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Apply config override files without executing them.
+
+Files written by `lsst.pex.config.Config.saveToStream` only contain
+``import`` statements, an ``assert`` on the type of the config, and
+assignments of literal values (or of arrays encoded by
+`lsst.pex.config.NumericListField`) to attributes and items of the config.
+`parse` recognizes files that are limited to this grammar, and `apply` makes
+their assignments directly through the fields, which is much faster than
+executing them. Files that contain anything else (such as loops, function
+calls or retargets) are executed as usual by
+`lsst.pex.config.Config.loadFromStream`.
+"""
+
+__all__ = ("parse", "apply")
+
+import ast
+import copy
+import importlib
+import sys
+
+from .config import Config, RecordingImporter, _typeStr
+from .callStack import CallStack, _internFrame
+from .configChoiceField import ConfigInstanceDict
+from .configurableField import ConfigurableInstance
+from .dictField import Dict
+from .listField import List
+from .numericListField import _unpackArray, _formatArray
+
+# ast.Index wraps subscripts before Python 3.9
+_Index = getattr(ast, "Index", ())
+
+
+def _dotted(node):
+    """Get the dotted name of a chain of `ast.Attribute` ending in an
+    `ast.Name`, or `None`.
+    """
+    names = []
+    while isinstance(node, ast.Attribute):
+        names.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    names.append(node.id)
+    return ".".join(reversed(names))
+
+
+def _literal(node):
+    """Evaluate a literal node, returning a ``(success, value)`` tuple.
+    """
+    try:
+        return True, ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError):
+        return False, None
+
+
+def _target(node):
+    """Parse the target of an assignment.
+
+    Returns
+    -------
+    root : `str`
+        Name of the variable the target starts from.
+    path : `tuple`
+        ``(isAttribute, name)`` steps from the variable to the target, in
+        order. ``name`` is an attribute name or a literal item key.
+
+    or `None` if the target is outside the grammar.
+    """
+    path = []
+    while True:
+        if isinstance(node, ast.Attribute):
+            path.append((True, node.attr))
+        elif isinstance(node, ast.Subscript):
+            key = node.slice.value if isinstance(node.slice, _Index) else node.slice
+            ok, key = _literal(key)
+            if not ok or not isinstance(key, (str, int, float, bool, complex)):
+                return None
+            path.append((False, key))
+        elif isinstance(node, ast.Name) and path:
+            return node.id, tuple(reversed(path))
+        else:
+            return None
+        node = node.value
+
+
+def _value(node):
+    """Parse the value of an assignment.
+
+    Returns
+    -------
+    kind : `str`
+        ``"literal"`` for a literal value, ``"float"`` for a call to `float`
+        with a string literal (used for non-finite numbers), ``"call"``
+        for a call to a dotted name without arguments (used to make new
+        configs) or ``"array"`` for an array decoded from base64 (used by
+        `lsst.pex.config.NumericListField`).
+    value : object
+        The literal value, the string, the dotted name, or the encoded data
+        and type string of the array.
+
+    or `None` if the value is outside the grammar.
+    """
+    if isinstance(node, ast.Call):
+        func = _dotted(node.func)
+        if func == "numpy.frombuffer":
+            return _array(node)
+        if node.keywords:
+            return None
+        if func == "float" and len(node.args) == 1:
+            ok, value = _literal(node.args[0])
+            if ok and isinstance(value, str):
+                return "float", value
+        elif func is not None and "." in func and not node.args:
+            return "call", func
+        return None
+    ok, value = _literal(node)
+    return ("literal", value) if ok else None
+
+
+def _array(node):
+    """Parse a call to `numpy.frombuffer` as written by
+    `lsst.pex.config.NumericListField.save`, or return `None`.
+    """
+    if len(node.args) != 1 or len(node.keywords) != 1 or node.keywords[0].arg != "dtype":
+        return None
+    decode = node.args[0]
+    if not (isinstance(decode, ast.Call) and _dotted(decode.func) == "base64.b64decode" and
+            len(decode.args) == 1 and not decode.keywords):
+        return None
+    ok, data = _literal(decode.args[0])
+    ok2, dtype = _literal(node.keywords[0].value)
+    if ok and ok2 and isinstance(data, str) and isinstance(dtype, str):
+        return "array", (data, dtype)
+    return None
+
+
+def _statement(node):
+    """Parse a statement into a tuple whose first item is its kind, or return
+    `None` if it is outside the grammar.
+    """
+    if isinstance(node, ast.Import):
+        if any(alias.asname is not None for alias in node.names):
+            return None
+        return ("import", node.lineno, tuple(alias.name for alias in node.names))
+    if isinstance(node, ast.Assert):
+        test = node.test
+        if (isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.ops[0], ast.Eq) and
+                isinstance(test.left, ast.Call) and _dotted(test.left.func) == "type" and
+                len(test.left.args) == 1 and isinstance(test.left.args[0], ast.Name) and
+                not test.left.keywords):
+            typeName = _dotted(test.comparators[0])
+            if typeName is not None:
+                return ("assert", node.lineno, test.left.args[0].id, typeName)
+        return None
+    if isinstance(node, ast.Assign) and len(node.targets) == 1:
+        target = _target(node.targets[0])
+        value = _value(node.value)
+        if target is not None and value is not None:
+            return ("assign", node.lineno, target[0], target[1], value[0], value[1])
+    return None
+
+
+def parse(tree):
+    """Parse a config override file into a program that `apply` can run.
+
+    Parameters
+    ----------
+    tree : `ast.Module`
+        The parsed file.
+
+    Returns
+    -------
+    program : `tuple` or `None`
+        The root variable name and the statements of the file, or `None` if
+        the file is outside the grammar. The program is made only of
+        `tuple`, `str` and literal values, so it can be cached with
+        `marshal`.
+
+    Notes
+    -----
+    All ``import`` and ``assert`` statements must come before the first
+    assignment, and all assignments must be to the same variable.
+    """
+    root = None
+    statements = []
+    for node in tree.body:
+        statement = _statement(node)
+        if statement is None:
+            return None
+        if statement[0] == "assign":
+            if root is None:
+                root = statement[2]
+            elif statement[2] != root:
+                return None
+        elif root is not None:
+            return None
+        statements.append(statement)
+    return root, tuple(statements)
+
+
+def _resolve(name, namespace):
+    """Look up a dotted name from the modules imported by a program.
+    """
+    first, *rest = name.split(".")
+    obj = namespace[first]
+    for attr in rest:
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _walk(config, steps, at, defer=False):
+    """Get the object that a sequence of ``(isAttribute, name)`` steps
+    leads to from a config, making choices that do not exist yet.
+
+    Returns
+    -------
+    obj : object
+        The object the steps lead to.
+    depth : `int`
+        The number of steps taken. If ``defer`` is `True`, the walk stops at
+        a choice that has not been made in a config whose choices are made
+        lazily (see `lsst.pex.config.Config.lazyChoices`); ``obj`` is then
+        the `ConfigInstanceDict` that holds it, and the step at ``depth``
+        names the choice.
+    """
+    obj = config
+    for depth, (isAttribute, name) in enumerate(steps):
+        if isAttribute:
+            obj = getattr(obj, name)
+        elif isinstance(obj, ConfigInstanceDict):
+            if defer and obj._isDeferred(name):
+                return obj, depth
+            obj = obj.__getitem__(name, at=at)
+        else:
+            obj = obj[name]
+    return obj, len(steps)
+
+
+def _locate(config, steps, at):
+    """Get the object that holds the target of steps resolved by
+    `lsst.pex.config.Config._parsePath`, making choices that do not exist yet.
+
+    Returns
+    -------
+    obj : object
+        The object that holds the target.
+    step : `tuple`
+        The ``(isAttribute, name)`` step that names the target in ``obj``.
+
+    Notes
+    -----
+    The steps left unresolved below a configurable or a choice are resolved
+    against the class of the config the walk reaches there.
+    """
+    obj = config
+    while steps[-1][0] is None:
+        obj, _ = _walk(obj, steps[:-1], at)
+        target = obj.value if isinstance(obj, ConfigurableInstance) else obj
+        steps = type(target)._parsePath(steps[-1][1])
+    obj, _ = _walk(obj, steps[:-1], at)
+    return obj, steps[-1]
+
+
+def _set(obj, step, value, at, label=None):
+    """Assign a value to the attribute or item of ``obj`` named by an
+    ``(isAttribute, name)`` step, recording ``at`` in the history.
+    """
+    isAttribute, name = step
+    kwargs = {"at": at} if label is None else {"at": at, "label": label}
+    if not isAttribute:
+        if isinstance(obj, (Dict, List, ConfigInstanceDict)):
+            obj.__setitem__(name, value, **kwargs)
+        else:
+            obj[name] = value
+    elif isinstance(obj, (Config, ConfigurableInstance)):
+        obj.__setattr__(name, value, **kwargs)
+    elif (isinstance(obj, ConfigInstanceDict) and name in ("name", "names") and
+            obj._field.multi == (name == "names")):
+        obj._setSelection(value, **kwargs)
+    else:
+        setattr(obj, name, value)
+
+
+def _assign(config, path, valueKind, value, at, defer=False):
+    """Make an assignment of a program made by `parse` to a config.
+
+    Parameters
+    ----------
+    config : `lsst.pex.config.Config`
+        The config to modify.
+    path : `tuple`
+        The ``(isAttribute, name)`` steps from the config to the target.
+    valueKind : `str`
+        The kind of value, as returned by `_value`.
+    value : object
+        The value, with dotted names resolved.
+    at : `lsst.pex.config.callStack.CallStack`
+        The call stack to record in the history.
+    defer : `bool`, optional
+        If `True`, an assignment to a choice that has not been made in a
+        config whose choices are made lazily is kept by the choice until it
+        is made, instead of being made now.
+    """
+    obj, depth = _walk(config, path[:-1], at, defer)
+    if depth < len(path) - 1:
+        if obj._defer(path[depth][1], path[depth + 1:], valueKind, value, at):
+            return
+        obj, depth = _walk(config, path[:-1], at)
+    if valueKind == "float":
+        value = float(value)
+    elif valueKind == "array":
+        value = _unpackArray(*value)
+    elif valueKind == "call":
+        # A ConfigDictField item that is assigned a new config can be given
+        # its type instead, which avoids making the config twice
+        if not (isinstance(obj, Dict) and isinstance(value, type) and issubclass(value, Config)):
+            value = value()
+    elif isinstance(value, (list, dict, set)):
+        value = copy.deepcopy(value)
+    _set(obj, path[-1], value, at)
+
+
+def _format(path, valueKind, value):
+    """Format an assignment of a program made by `parse` as the line of a
+    file it was parsed from, without the name of the variable.
+    """
+    target = "".join("." + name if isAttribute else "[%r]" % (name,) for isAttribute, name in path)
+    if valueKind == "float":
+        return "%s=float(%r)" % (target, value)
+    elif valueKind == "array":
+        return "%s=%s" % (target, _formatArray(*value))
+    elif valueKind == "call":
+        return "%s=%s()" % (target, _typeStr(value))
+    return "%s=%r" % (target, value)
+
+
+def apply(program, config, root="config", filename=None):
+    """Apply a program made by `parse` to a config.
+
+    Parameters
+    ----------
+    program : `tuple`
+        The output of `parse`.
+    config : `lsst.pex.config.Config`
+        The config to modify.
+    root : `str`, optional
+        Name of the variable that refers to ``config`` in the program.
+    filename : `str`, optional
+        Name of the file the program was parsed from, which the history
+        refers to.
+
+    Returns
+    -------
+    applied : `bool`
+        `False` if the program must be executed instead; this is decided
+        before ``config`` is modified. That is the case if the program uses
+        a different variable name, if a name in it cannot be resolved, or if
+        the assertion on the type of the config fails.
+
+    Notes
+    -----
+    The changes are recorded in the history as if the file had been
+    executed, with the line of the file that made each change as the most
+    recent frame of the call stack.
+
+    Assignments to choices that have not been made yet, in configs whose
+    choices are made lazily (see `lsst.pex.config.Config.lazyChoices`), are
+    kept by the choices and only made when the choices are.
+    """
+    programRoot, statements = program
+    if programRoot is not None and programRoot != root:
+        return False
+    if filename is None:
+        filename = "<string>"
+
+    namespace = {}
+    assignments = []
+    with RecordingImporter() as importer:
+        try:
+            for statement in statements:
+                kind, lineno = statement[:2]
+                if kind == "import":
+                    for name in statement[2]:
+                        importlib.import_module(name)
+                        first = name.partition(".")[0]
+                        namespace[first] = sys.modules[first]
+                elif kind == "assert":
+                    if statement[2] != root or type(config) is not _resolve(statement[3], namespace):
+                        return False
+                else:
+                    valueKind, value = statement[4:]
+                    if valueKind == "call":
+                        value = _resolve(value, namespace)
+                    elif valueKind == "array":
+                        # as when the program is executed, the modules must
+                        # have been imported
+                        _resolve("numpy.frombuffer", namespace)
+                        _resolve("base64.b64decode", namespace)
+                    assignments.append((lineno, statement[3], valueKind, value))
+        except (KeyError, AttributeError, ImportError):
+            return False
+
+        mode = config.historyMode
+        base = config._getCallStack() if mode == "full" else CallStack()
+        for lineno, path, valueKind, value in assignments:
+            at = base
+            if mode != "off":
+                at = base + [_internFrame(filename, lineno, "<module>")]
+            _assign(config, path, valueKind, value, at, defer=True)
+
+    config._imports = set(config._imports) | importer.getModules()
+    config._invalidateImports()
+    return True
@@ -0,0 +1,461 @@
+# This file is part of pex_config.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This software is dual licensed under the GNU General Public License and also
+# under a 3-clause BSD license. Recipients may choose which of these licenses
+# to use; please see the files gpl-3.0.txt and/or bsd_license.txt,
+# respectively.  If you choose the GPL option then the following text applies
+# (but note that there is still no warranty even if you opt for BSD instead):
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+__all__ = ["NumericListField"]
+
+import base64
+import collections.abc
+
+import numpy
+
+from .config import FieldValidationError, _typeStr, _joinNamePath, _FieldDoc
+from .listField import List, ListField
+from .callStack import getStackFrame
+
+
+def _packArray(array):
+    """Encode the items of an array as text (for internal use only).
+
+    Parameters
+    ----------
+    array : `numpy.ndarray`
+        A one-dimensional array.
+
+    Returns
+    -------
+    data : `str`
+        The items, as little-endian binary data encoded in base64.
+    dtype : `str`
+        The `numpy` type string of the encoded items, such as ``"<f8"``.
+    """
+    dtype = array.dtype.newbyteorder("<")
+    data = base64.b64encode(array.astype(dtype, copy=False).tobytes()).decode("ascii")
+    return data, dtype.str
+
+
+def _unpackArray(data, dtype):
+    """Decode an array encoded by `_packArray` (for internal use only).
+    """
+    return numpy.frombuffer(base64.b64decode(data), dtype=dtype)
+
+
+def _formatArray(data, dtype):
+    """Format an array encoded by `_packArray` as the Python expression that
+    decodes it (for internal use only).
+    """
+    return "numpy.frombuffer(base64.b64decode(%r), dtype=%r)" % (data, dtype)
+
+
+class NumericList(List):
+    """List of numbers used internally by `NumericListField`, held in a
+    contiguous `numpy` array.
+
+    Parameters
+    ----------
+    config : `lsst.pex.config.Config`
+        Config instance that contains the ``field``.
+    field : `NumericListField`
+        Instance of the `NumericListField` using this ``NumericList``.
+    value : sequence
+        Sequence of numbers, or an array, that are the items of the list.
+    at : `list` of `lsst.pex.config.callStack.StackFrame`
+        The call stack (created by `lsst.pex.config.callStack.getCallStack`).
+    label : `str`
+        Event label for the history.
+    setHistory : `bool`, optional
+        Enable setting the field's history, using the value of the ``at``
+        parameter. Default is `True`.
+
+    Raises
+    ------
+    FieldValidationError
+        Raised if an item in ``value`` is not a number of the type of the
+        field, or is outside its range.
+
+    Notes
+    -----
+    The array is read-only, and is replaced rather than modified when the
+    list changes, so it is shared with clones of the config rather than
+    copied. ``numpy.asarray`` gives the array itself. Items read from the
+    list are Python numbers, and the history records the items as a `list`.
+
+    Each change to the list, including ``append`` and ``insert``, makes a
+    new array, so growing a list one item at a time takes time quadratic in
+    its length; `extend` adds many items at once.
+    """
+
+    __slots__ = ()
+
+    __doc__ = _FieldDoc(__doc__)
+
+    def __init__(self, config, field, value, at, label, setHistory=True):
+        self._field = field
+        self._config = config
+        self._list = field._makeArray(config, value)
+        if setHistory:
+            self._config._recordHistory(self._field.name, self._list.tolist(), at, label)
+
+    def validateItem(self, i, x):
+        self._field._makeArray(self._config, [x])
+
+    def _copy(self, config):
+        return type(self)._restore(config, self._field, self._list)
+
+    def list(self):
+        """The items of the list (read-only `numpy.ndarray`).
+        """
+        return self._list
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is not None and numpy.dtype(dtype) != self._list.dtype:
+            return self._list.astype(dtype)
+        return self._list.copy() if copy else self._list
+
+    def __contains__(self, x):
+        return x in self._list.tolist()
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._list[i].tolist()
+        return self._list[i].item()
+
+    def __iter__(self):
+        return iter(self._list.tolist())
+
+    def __setitem__(self, i, x, at=None, label="setitem", setHistory=True):
+        if self._config._frozen:
+            raise FieldValidationError(self._field, self._config,
+                                       "Cannot modify a frozen Config")
+        self._config._beforeChange(self._field.name)
+        items = self._list.tolist()
+        items[i] = x
+        self._list = self._field._makeArray(self._config, items)
+        if setHistory:
+            if at is None:
+                at = self._config._getCallStack()
+            self._config._recordHistory(self._field.name, self._list.tolist(), at, label)
+
+    def __delitem__(self, i, at=None, label="delitem", setHistory=True):
+        if self._config._frozen:
+            raise FieldValidationError(self._field, self._config,
+                                       "Cannot modify a frozen Config")
+        self._config._beforeChange(self._field.name)
+        items = self._list.tolist()
+        del items[i]
+        self._list = self._field._makeArray(self._config, items)
+        if setHistory:
+            if at is None:
+                at = self._config._getCallStack()
+            self._config._recordHistory(self._field.name, self._list.tolist(), at, label)
+
+    def extend(self, values, at=None, label="extend", setHistory=True):
+        """Append the items of a sequence to the list, making one new array.
+
+        Parameters
+        ----------
+        values : iterable
+            The numbers to append.
+        at : `list` of `lsst.pex.config.callStack.StackFrame`, optional
+            The call stack (created by
+            `lsst.pex.config.callStack.getCallStack`).
+        label : `str`, optional
+            Event label for the history.
+        setHistory : `bool`, optional
+            Enable setting the field's history, using the value of the ``at``
+            parameter. Default is `True`.
+        """
+        if at is None:
+            at = self._config._getCallStack()
+        end = len(self._list)
+        self.__setitem__(slice(end, end), list(values), at=at, label=label, setHistory=setHistory)
+
+    def __repr__(self):
+        return repr(self._list.tolist())
+
+    def __str__(self):
+        return str(self._list.tolist())
+
+    def __eq__(self, other):
+        try:
+            if len(self) != len(other):
+                return False
+            return bool(numpy.array_equal(self._list, numpy.asarray(other)))
+        except (TypeError, ValueError):
+            # other is not a sequence of numbers
+            return False
+
+
+class NumericListField(ListField):
+    """A configuration field (`~lsst.pex.config.Field` subclass) that contains
+    a list of numbers, held in a `numpy` array.
+
+    Parameters
+    ----------
+    doc : `str`
+        A description of the field.
+    dtype : {`int`-type, `float`-type}
+        The data type of items in the list. The items are held as 64-bit
+        integers or floating-point numbers.
+    default : sequence, optional
+        The default items for the field.
+    optional : `bool`, optional
+        Set whether the field is *optional*. When `False`,
+        `lsst.pex.config.Config.validate` will fail if the field's value is
+        `None`.
+    min : `int`, `float`, or `None`, optional
+        Minimum value accepted for items. If `None`, items have no lower
+        bound.
+    max : `int`, `float`, or `None`, optional
+        Maximum value accepted for items. If `None`, items have no upper
+        bound.
+    inclusiveMin : `bool`, optional
+        If `True` (default), the ``min`` value is included in the allowed
+        range.
+    inclusiveMax : `bool`, optional
+        If `True`, the ``max`` value is included in the allowed range.
+        Default is `False`, as for `RangeField`.
+    listCheck : callable, optional
+        A callable that validates the list as a whole.
+    length : `int`, optional
+        If set, this field must contain exactly ``length`` number of items.
+    minLength : `int`, optional
+        If set, this field must contain *at least* ``minLength`` number of
+        items.
+    maxLength : `int`, optional
+        If set, this field must contain *no more than* ``maxLength`` number of
+        items.
+    deprecated : None or `str`, optional
+        A description of why this Field is deprecated, including removal date.
+        If not None, the string is appended to the docstring for this Field.
+
+    See also
+    --------
+    ListField
+    RangeField
+
+    Notes
+    -----
+    ``NumericListField`` behaves like `ListField`, but is meant for long
+    lists of numbers, such as polynomial coefficients:
+
+    - The types and range of the items are checked for all of them at once,
+      as they are set. There is no ``itemCheck``, as calling it for each
+      item would undo that; ``listCheck`` can check the items with `numpy`.
+    - ``numpy.asarray(config.field)`` gives the items as an array without
+      copying them. The array is read-only.
+    - Lists of at least `compactLength` items, and lists with non-finite
+      items, are saved as their binary data encoded in base64, rather than
+      as a list of numbers.
+    """
+
+    ListClass = NumericList
+
+    compactLength = 32
+    """The number of items from which a list is saved as binary data (`int`).
+    """
+
+    supportedTypes = set((int, float))
+    """The set of data types allowed by `NumericListField` instances (`set`
+    containing `int` and `float` types).
+    """
+
+    def __init__(self, doc, dtype, default=None, optional=False,
+                 min=None, max=None, inclusiveMin=True, inclusiveMax=False,
+                 listCheck=None, length=None, minLength=None, maxLength=None,
+                 deprecated=None):
+        if dtype not in self.supportedTypes:
+            raise ValueError("Unsupported NumericListField dtype %s" % (_typeStr(dtype)))
+        if min is not None and max is not None:
+            if min > max:
+                raise ValueError("min = %s > %s = max" % (min, max))
+            elif min == max and not (inclusiveMin and inclusiveMax):
+                raise ValueError("min = max = %s and min and max not both inclusive" % (min,))
+        ListField.__init__(self, doc, dtype, default=default, optional=optional, listCheck=listCheck,
+                           length=length, minLength=minLength, maxLength=maxLength, deprecated=deprecated)
+        # ListField.__init__ records its caller, which is this method
+        self.source = getStackFrame()
+
+        self.min = min
+        """Minimum value accepted for items, or `None`.
+        """
+
+        self.max = max
+        """Maximum value accepted for items, or `None`.
+        """
+
+        self.inclusiveMin = inclusiveMin
+        self.inclusiveMax = inclusiveMax
+
+        self.arrayType = numpy.dtype(numpy.int64 if dtype is int else numpy.float64)
+        """The `numpy` data type of the array holding the items.
+        """
+
+        self.rangeString = None
+        """String representation of the range allowed for items (`str`), or
+        `None` if there is no range.
+        """
+        if min is not None or max is not None:
+            self.rangeString = "%s%s,%s%s" % \
+                (("[" if inclusiveMin else "("),
+                 ("-inf" if self.min is None else self.min),
+                 ("inf" if self.max is None else self.max),
+                 ("]" if inclusiveMax else ")"))
+            self.__doc__ += "\n\nValid Range = " + self.rangeString
+
+        # the default, once it has been validated; it is read-only, so every
+        # config can hold it
+        self._defaultArray = None
+
+    def _makeArray(self, instance, value):
+        """Convert a value to the read-only array of its items, checking
+        their types and range (for internal use only).
+
+        Parameters
+        ----------
+        instance : `lsst.pex.config.Config`
+            The config instance that contains this field.
+        value : sequence
+            Sequence of numbers, or an array.
+
+        Returns
+        -------
+        array : `numpy.ndarray`
+            A new read-only array of type `arrayType`, unless ``value`` is
+            the default or a `NumericList`, whose array is used instead.
+
+        Raises
+        ------
+        lsst.pex.config.FieldValidationError
+            Raised if ``value`` is not a sequence, or if an item is not a
+            number of the type of the field or is outside its range.
+        """
+        if value is self.default and self._defaultArray is not None:
+            return self._defaultArray
+        if isinstance(value, NumericList) and value._list.dtype == self.arrayType:
+            array = value._list
+        else:
+            if not isinstance(value, (numpy.ndarray, collections.abc.Sequence)):
+                try:
+                    value = list(value)
+                except TypeError:
+                    msg = "Value %s is of incorrect type %s. Sequence type expected" % \
+                        (value, _typeStr(value))
+                    raise FieldValidationError(self, instance, msg)
+            source = numpy.asarray(value)
+            if source.ndim != 1:
+                msg = "Value %s is of incorrect type %s. Sequence type expected" % (value, _typeStr(value))
+                raise FieldValidationError(self, instance, msg)
+            if source.size and source.dtype.kind not in ("biu" if self.itemtype is int else "biuf"):
+                self._raiseItemType(instance, source)
+            try:
+                # a copy, so the array does not change with value
+                array = numpy.array(source, dtype=self.arrayType)
+            except (TypeError, ValueError, OverflowError):
+                self._raiseItemType(instance, source)
+            array.flags.writeable = False
+        if self.rangeString is not None:
+            valid = numpy.ones(len(array), dtype=bool)
+            if self.min is not None:
+                valid &= (array >= self.min) if self.inclusiveMin else (array > self.min)
+            if self.max is not None:
+                valid &= (array <= self.max) if self.inclusiveMax else (array < self.max)
+            invalid = numpy.flatnonzero(~valid)
+            if len(invalid):
+                i = invalid[0]
+                msg = "Item at position %d with value %s is outside of valid range %s" % \
+                    (i, array[i].item(), self.rangeString)
+                raise FieldValidationError(self, instance, msg)
+        if value is self.default:
+            self._defaultArray = array
+        return array
+
+    def _raiseItemType(self, instance, source):
+        """Raise the error for the first item of an array that is not a
+        number of the type of this field (for internal use only).
+        """
+        itemTypes = (int, numpy.integer) if self.itemtype is int else (int, float, numpy.number)
+        for i, x in enumerate(source.tolist()):
+            if not isinstance(x, itemTypes):
+                break
+        else:
+            i, x = 0, source
+        msg = "Item at position %d with value %s is of incorrect type %s. Expected %s" % \
+            (i, x, _typeStr(x), _typeStr(self.itemtype))
+        raise FieldValidationError(self, instance, msg)
+
+    def _compact(self, instance):
+        # the array is already read-only and contiguous
+        pass
+
+    def _reduce(self, instance):
+        value = instance._storage.get(self.name)
+        return value._list if value is not None else None
+
+    def _unreduce(self, instance, state, at):
+        value = None
+        if state is not None:
+            # the unpickled array belongs to this config alone
+            state.flags.writeable = False
+            value = NumericList._restore(instance, self, state)
+        instance._storage[self.name] = value
+        instance._recordHistory(self.name, state.tolist() if state is not None else None, at, "unpickle")
+
+    def toDict(self, instance):
+        value = self.__get__(instance)
+        return value._list.tolist() if value is not None else None
+
+    def _collectImports(self, instance, imports):
+        # used by values saved as binary data
+        imports.add("base64")
+        imports.add("numpy")
+
+    def save(self, outfile, instance):
+        """Save this field to a file (for internal use only).
+
+        Parameters
+        ----------
+        outfile : file-like object
+            A writeable field handle.
+        instance : `~lsst.pex.config.Config`
+            The `~lsst.pex.config.Config` instance that contains this field.
+
+        Notes
+        -----
+        Lists of at least `compactLength` items, and lists with non-finite
+        items, are saved as a call to `numpy.frombuffer` with their binary
+        data, encoded in base64. Other lists are saved as by
+        `lsst.pex.config.Field.save`.
+        """
+        value = self.__get__(instance)
+        binary = value is not None and (len(value) >= self.compactLength or
+                                        not numpy.isfinite(value._list).all())
+        if not binary or (self.deprecated and value == self.default):
+            ListField.save(self, outfile, instance)
+            return
+        fullname = _joinNamePath(instance._name, self.name)
+        doc = "# " + str(self.doc).replace("\n", "\n# ")
+        outfile.write(f"{doc}\n{fullname}={_formatArray(*_packArray(value._list))}\n\n")
@@ -30,8 +30,10 @@ __all__ = ("Registry", "makeRegistry", "RegistryField", "registerConfig", "regis
 import collections.abc
 import copy
 
-from .config import Config, FieldValidationError, _typeStr
+from . import config as configModule
+from .config import Config, FieldValidationError, _typeStr, _typemapChanged
 from .configChoiceField import ConfigInstanceDict, ConfigChoiceField
+from .callStack import getCallStack
 
 
 class ConfigurableWrapper:
@@ -49,6 +51,31 @@ class ConfigurableWrapper:
         return self._target(*args, **kwargs)
 
 
+def _detachHistory(config, creator, source):
+    """Replace the frames of the code that made a registry prototype in the
+    history of the prototype and its subconfigs.
+
+    Parameters
+    ----------
+    config : `lsst.pex.config.Config`
+        The prototype, or one of its subconfigs.
+    creator : `lsst.pex.config.callStack.CallStack`
+        The call stack of the code that made the prototype.
+    source : `lsst.pex.config.callStack.StackFrame`
+        The definition of the config class of the prototype, which the
+        frames of ``creator`` are replaced with.
+    """
+    depth = len(creator)
+    frames = list(creator)
+    for history in config._history.values():
+        for i, (value, stack, label) in enumerate(history):
+            if len(stack) > depth and list(stack[:depth]) == frames:
+                history[i] = (value, [source] + stack[depth:], label)
+    for field in config._fields.values():
+        for subconfig in field._subconfigs(config):
+            _detachHistory(subconfig, creator, source)
+
+
 class Registry(collections.abc.Mapping):
     """A base class for global registries, which map names to configurables.
 
@@ -118,6 +145,7 @@ class Registry(collections.abc.Mapping):
             raise TypeError("configBaseType=%s must be a subclass of Config" % _typeStr(configBaseType,))
         self._configBaseType = configBaseType
         self._dict = {}
+        self._prototypes = {}
 
     def register(self, name, target, ConfigClass=None):
         """Add a new configurable target to the registry.
@@ -159,6 +187,70 @@ class Registry(collections.abc.Mapping):
             raise TypeError("ConfigClass=%s is not a subclass of %r" %
                             (_typeStr(wrapper.ConfigClass), _typeStr(self._configBaseType)))
         self._dict[name] = wrapper
+        _typemapChanged()
+
+    def _makeConfig(self, key, name, parent, at):
+        """Make the config of an entry with its default values (for internal
+        use only).
+
+        Parameters
+        ----------
+        key : `str`
+            Name of the entry.
+        name : `str`
+            Full name of the config.
+        parent : `lsst.pex.config.Config`
+            The config that holds the new config.
+        at : `list` of `lsst.pex.config.callStack.StackFrame`
+            The call stack to record in the history, starting with the
+            definition of the config class of the entry.
+
+        Returns
+        -------
+        config : `lsst.pex.config.Config`
+            A config of the ``ConfigClass`` of the entry.
+
+        Notes
+        -----
+        The first config made for each entry is kept as a prototype, and the
+        others are clones of it (see `lsst.pex.config.Config.clone`), so the
+        constructor and ``setDefaults`` of the config class only run once
+        however many configs hold the registry. The history of a clone is
+        that of the prototype, with ``at`` recorded for the defaults of its
+        fields and the changes made by ``setDefaults``, as for a config made
+        for it. The subconfigs of a clone are shared with the prototype until
+        they are used, and are renamed then; their history records their
+        defaults as set at the definition of the class. The prototypes are
+        made again when any registry gains an entry or a config class gains a
+        field.
+        """
+        generation = configModule._typemapGeneration
+        entry = self._prototypes.get(key)
+        if entry is None or entry[0] != generation:
+            ConfigClass = self._dict[key].ConfigClass
+            creator = getCallStack()
+            prototype = ConfigClass(__name=name, __at=[ConfigClass._source], __label="default")
+            _detachHistory(prototype, creator, ConfigClass._source)
+            entry = self._prototypes[key] = (generation, prototype)
+        # the prototype is never modified, so it need not track its clones
+        config = entry[1]._clone(track=False)
+        config._parent = parent
+        config._name = name
+        source = type(config)._source
+        for history in config._history.values():
+            for i, (value, stack, label) in enumerate(history):
+                if len(stack) and stack[0] is source:
+                    history[i] = (value, at + stack[1:], label)
+        return config
+
+    def __deepcopy__(self, memo):
+        # the prototypes are made again by the copy as needed
+        other = object.__new__(type(self))
+        memo[id(self)] = other
+        other._configBaseType = self._configBaseType
+        other._dict = copy.deepcopy(self._dict, memo)
+        other._prototypes = {}
+        return other
 
     def __getitem__(self, key):
         return self._dict[key]
@@ -237,6 +329,9 @@ class RegistryInstanceDict(ConfigInstanceDict):
         ConfigInstanceDict.__init__(self, config, field)
         self.registry = field.registry
 
+    def _makeChoice(self, k, dtype, name, at, label):
+        return self._field.typemap.registry._makeConfig(k, name, self._config, at)
+
     def _getTarget(self):
         if self._field.multi:
             raise FieldValidationError(self._field, self._config,
@@ -330,6 +425,7 @@ class RegistryField(ConfigChoiceField):
                            default=copy.deepcopy(self.default),
                            optional=self.optional, multi=self.multi)
         other.source = self.source
+        other.historyLimit = self.historyLimit
         return other
 
 
@@ -34,7 +34,7 @@ import importlib
 from .config import Config, Field
 from .listField import ListField, List
 from .configField import ConfigField
-from .callStack import getCallerFrame, getCallStack
+from .callStack import getCallerFrame
 
 _dtypeMap = {
     "bool": bool,
@@ -252,7 +252,7 @@ def makeConfigClass(ctrl, name=None, base=Config, doc=None, module=None, cls=Non
         use only; they are used to remove internal calls from the history.
         """
         if __at is None:
-            __at = getCallStack()
+            __at = self._getCallStack()
         values = {}
         for k, f in fields.items():
             if isinstance(f, ConfigField):
@@ -261,7 +261,7 @@ def makeConfigClass(ctrl, name=None, base=Config, doc=None, module=None, cls=Non
             else:
                 values[k] = getattr(control, k)
         if __reset:
-            self._history = {}
+            self._history.clear()
         self.update(__at=__at, __label=__label, **values)
 
     def validate(self):
@@ -0,0 +1,122 @@
+# This file is part of pex_config.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This software is dual licensed under the GNU General Public License and also
+# under a 3-clause BSD license. Recipients may choose which of these licenses
+# to use; please see the files gpl-3.0.txt and/or bsd_license.txt,
+# respectively.  If you choose the GPL option then the following text applies
+# (but note that there is still no warranty even if you opt for BSD instead):
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the cost of recording config history in each of the
+`lsst.pex.config.Config.historyMode` settings.
+
+Run directly::
+
+    python benchmark_history.py [--number N]
+"""
+
+import argparse
+import timeit
+
+import lsst.pex.config as pexConfig
+
+
+class LeafConfig(pexConfig.Config):
+    i = pexConfig.Field("integer", int, default=1)
+    f = pexConfig.RangeField("float", float, default=2.0, min=0.0)
+    s = pexConfig.ChoiceField("string", str, default="a", allowed={"a": "A", "b": "B"})
+    ll = pexConfig.ListField("list", float, default=[1.0, 2.0, 3.0])
+    d = pexConfig.DictField("dict", str, int, default={"a": 1, "b": 2})
+
+
+class Leaf:
+    ConfigClass = LeafConfig
+
+    def __init__(self, config):
+        self.config = config
+
+
+registry = pexConfig.makeRegistry("Benchmark registry")
+for name in "abcdefgh":
+    registry.register(name, Leaf)
+
+
+class BranchConfig(pexConfig.Config):
+    leaf = pexConfig.ConfigField("leaf", LeafConfig)
+    task = pexConfig.ConfigurableField("task", Leaf)
+    algorithm = registry.makeField("algorithm", default="a")
+    plugins = registry.makeField("plugins", default=["a", "b", "c"], multi=True)
+    byName = pexConfig.ConfigDictField("dict of configs", str, LeafConfig, default={})
+
+
+class RootConfig(pexConfig.Config):
+    branches = pexConfig.ConfigDictField("branches", str, BranchConfig, default={})
+    main = pexConfig.ConfigField("main", BranchConfig)
+    other = pexConfig.ConfigurableField("other", Leaf)
+
+
+def construct():
+    config = RootConfig()
+    for name in ("x", "y", "z"):
+        config.branches[name] = BranchConfig()
+    return config
+
+
+def override(config):
+    for name in ("x", "y", "z"):
+        branch = config.branches[name]
+        branch.leaf.i = 3
+        branch.leaf.ll.append(4.0)
+        branch.task.d["c"] = 3
+        branch.algorithm["d"].f = 4.0
+        branch.algorithm = "d"
+        branch.plugins.names = ["a", "e"]
+    config.main.leaf.s = "b"
+    config.other.retarget(Leaf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--number", type=int, default=200, help="Number of repetitions")
+    args = parser.parse_args()
+
+    config = construct()
+    original = pexConfig.Config.historyMode
+    results = {}
+    try:
+        for mode in ("full", "shallow", "off"):
+            pexConfig.Config.historyMode = mode
+            results[mode] = (
+                min(timeit.repeat(construct, number=args.number, repeat=3)) / args.number,
+                min(timeit.repeat(lambda: override(config), number=args.number, repeat=3)) / args.number,
+            )
+    finally:
+        pexConfig.Config.historyMode = original
+
+    print("%-8s %14s %9s %14s %9s" % ("mode", "construct (ms)", "speedup", "override (ms)", "speedup"))
+    for mode, (tConstruct, tOverride) in results.items():
+        print("%-8s %14.3f %8.1fx %14.3f %8.1fx" % (
+            mode, 1e3*tConstruct, results["full"][0]/tConstruct,
+            1e3*tOverride, results["full"][1]/tOverride))
+
+
+if __name__ == "__main__":
+    main()
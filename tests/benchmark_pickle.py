@@ -0,0 +1,143 @@
+# This file is part of pex_config.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This software is dual licensed under the GNU General Public License and also
+# under a 3-clause BSD license. Recipients may choose which of these licenses
+# to use; please see the files gpl-3.0.txt and/or bsd_license.txt,
+# respectively.  If you choose the GPL option then the following text applies
+# (but note that there is still no warranty even if you opt for BSD instead):
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+"""Benchmark pickling configs with deep `lsst.pex.config.ConfigChoiceField`
+and `lsst.pex.config.RegistryField` trees, comparing the field-value form
+used by `lsst.pex.config.Config.__reduce__` to the Python source form that
+it falls back to.
+
+Run directly::
+
+    python benchmark_pickle.py [--number N]
+"""
+
+import argparse
+import io
+import pickle
+import timeit
+
+import lsst.pex.config as pexConfig
+from lsst.pex.config.config import unreduceConfig
+
+
+class LeafConfig(pexConfig.Config):
+    i = pexConfig.Field("integer", int, default=1)
+    f = pexConfig.RangeField("float", float, default=2.0, min=0.0)
+    s = pexConfig.ChoiceField("string", str, default="a", allowed={"a": "A", "b": "B"})
+    ll = pexConfig.ListField("list", float, default=[1.0, 2.0, 3.0])
+    d = pexConfig.DictField("dict", str, int, default={"a": 1, "b": 2})
+
+
+class Leaf:
+    ConfigClass = LeafConfig
+
+    def __init__(self, config):
+        self.config = config
+
+
+leafRegistry = pexConfig.makeRegistry("Leaf registry")
+for name in "abcdefgh":
+    leafRegistry.register(name, Leaf)
+
+
+class MiddleConfig(pexConfig.Config):
+    leaves = leafRegistry.makeField("all leaves", default=list("abcdefgh"), multi=True)
+    leaf = leafRegistry.makeField("one leaf", default="a")
+    choice = pexConfig.ConfigChoiceField("choice of leaves", typemap={k: LeafConfig for k in "abcd"},
+                                         default="a")
+
+
+class Middle:
+    ConfigClass = MiddleConfig
+
+    def __init__(self, config):
+        self.config = config
+
+
+middleRegistry = pexConfig.makeRegistry("Middle registry")
+for name in "wxyz":
+    middleRegistry.register(name, Middle)
+
+
+class TopConfig(pexConfig.Config):
+    middles = middleRegistry.makeField("all middles", default=list("wxyz"), multi=True)
+    choice = pexConfig.ConfigChoiceField("choice of middles", typemap={"x": MiddleConfig, "y": MiddleConfig},
+                                         default="x")
+
+
+class RootConfig(pexConfig.Config):
+    tops = pexConfig.ConfigChoiceField("tops", typemap={"t1": TopConfig, "t2": TopConfig, "t3": TopConfig},
+                                       default=["t1", "t2", "t3"], multi=True)
+
+
+def construct():
+    """Make a config in which every choice has been instantiated.
+    """
+    config = RootConfig()
+    for top in config.tops.values():
+        for middle in list(top.middles.values()) + list(top.choice.values()):
+            for leaf in list(middle.leaves.values()) + list(middle.choice.values()):
+                leaf.i = 2
+                leaf.ll.append(4.0)
+    return config
+
+
+def structuredRoundTrip(config):
+    return pickle.loads(pickle.dumps(config))
+
+
+def sourceRoundTrip(config):
+    stream = io.StringIO()
+    config.saveToStream(stream)
+    return unreduceConfig(type(config), pickle.loads(pickle.dumps(stream.getvalue().encode())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--number", type=int, default=10, help="Number of repetitions")
+    args = parser.parse_args()
+
+    config = construct()
+    function, (cls, state) = config.__reduce__()
+    assert function is pexConfig.config.unreduceConfigState, "config fell back to the source form"
+    assert structuredRoundTrip(config).toDict() == config.toDict()
+    stream = io.StringIO()
+    config.saveToStream(stream)
+    sizes = {
+        "structured": len(pickle.dumps(config)),
+        "source": len(pickle.dumps(stream.getvalue().encode())),
+    }
+
+    results = {}
+    for name, roundTrip in (("source", sourceRoundTrip), ("structured", structuredRoundTrip)):
+        dumps = min(timeit.repeat(lambda: pickle.dumps(config) if name == "structured"
+                                  else config.saveToStream(io.StringIO()),
+                                  number=args.number, repeat=3)) / args.number
+        total = min(timeit.repeat(lambda: roundTrip(config), number=args.number, repeat=3)) / args.number
+        results[name] = (dumps, total)
+
+    print("%d fields in the tree" % len(config.names()))
+    print("%-11s %10s %14s %9s %12s" % ("form", "dump (ms)", "round trip (ms)", "speedup", "size (kB)"))
+    for name, (dumps, total) in results.items():
+        print("%-11s %10.2f %14.2f %8.1fx %12.1f" % (
+            name, 1e3*dumps, 1e3*total, results["source"][1]/total, sizes[name]/1024))
+
+
+if __name__ == "__main__":
+    main()
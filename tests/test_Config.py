@@ -25,12 +25,17 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import ast
 import io
 import itertools
+import math
 import re
 import os
 import pickle
+import sys
+import tempfile
 import unittest
+import unittest.mock
 
 import lsst.pex.config as pexConfig
 
@@ -180,6 +185,234 @@ class ConfigTest(unittest.TestCase):
         self.comp.r = "BBB"
         self.comp.validate()
 
+    def testValidateWorkers(self):
+        """Test that every field is validated, concurrently, when a number of
+        workers is given.
+        """
+        self.comp.validate(workers=2)
+        self.comp.c.f = None
+        self.comp.r = None
+        self.comp.p["AAA"].b = None
+        self.comp.p = "AAA"
+        with self.assertRaises(pexConfig.FieldValidationError):
+            self.comp.validate()
+        with self.assertRaises(pexConfig.ConfigValidationError) as cm:
+            self.comp.validate(workers=2)
+        self.assertEqual([e.fullname for e in cm.exception.errors], ["c.f", "r", "p['AAA'].b"])
+        self.assertIn("3 validation errors", str(cm.exception))
+
+        # overrides of validate take the same arguments, and do not run their
+        # own checks while their fields are invalid
+        self.outer.f = None
+        self.outer.i.f = 1.0
+        with self.assertRaises(pexConfig.ConfigValidationError) as cm:
+            self.outer.validate(workers=2)
+        self.assertEqual([e.fullname for e in cm.exception.errors], ["f"])
+        self.outer.f = 0.0
+        with self.assertRaises(pexConfig.ConfigValidationError) as cm:
+            self.outer.validate(workers=2)
+        self.assertIn("outer.i.f must be greater than 5", str(cm.exception.errors[0]))
+
+    def testValidateCollect(self):
+        """Test that validate(collect=True) reports every field that is not
+        valid.
+        """
+        report = self.comp.validate(collect=True)
+        self.assertIsInstance(report, pexConfig.ValidationReport)
+        self.assertEqual(len(report), 0)
+        self.assertFalse(report)
+
+        self.comp.c.f = None
+        self.comp.r = None
+        self.comp.p["AAA"].b = None
+        self.comp.p = "AAA"
+        report = self.comp.validate(collect=True)
+        self.assertEqual(report.paths(), ["c.f", "r", "p['AAA'].b"])
+        failure = report[0]
+        self.assertIs(failure.fieldType, pexConfig.Field)
+        self.assertIsNone(failure.value)
+        self.assertEqual(failure.message, "Required value cannot be None")
+        self.assertEqual(failure.frame.function, "testValidateCollect")
+        self.assertIsInstance(failure.error, pexConfig.FieldValidationError)
+        self.assertIs(report[1].fieldType, pexConfig.ConfigChoiceField)
+        self.assertIn("c.f (Field) = None: Required value cannot be None", str(report))
+        with self.assertRaises(pexConfig.ConfigValidationError) as cm:
+            report.raiseIfFailed()
+        self.assertIs(cm.exception.report, report)
+        self.assertEqual(self.comp.validate(collect=True, workers=2).paths(), report.paths())
+
+        # errors raised by the validate methods of derived classes
+        self.outer.i.f = 1.0
+        report = self.outer.validate(collect=True)
+        self.assertEqual(report.paths(), [""])
+        self.assertIsNone(report[0].fieldType)
+        self.assertIn("outer.i.f must be greater than 5", report[0].message)
+
+    def testValidateIncremental(self):
+        """Test that validate only checks what changed since the config was
+        last valid.
+        """
+        checked = []
+
+        class Leaf(pexConfig.Config):
+            a = pexConfig.Field("a", int, default=1)
+            b = pexConfig.ListField("b", int, default=[1],
+                                    listCheck=lambda x: checked.append("b") or True)
+            d = pexConfig.DictField("d", str, int, default={},
+                                    dictCheck=lambda x: checked.append("d") or True)
+
+        class Node(pexConfig.Config):
+            x = pexConfig.ConfigField("x", Leaf)
+            y = pexConfig.ConfigField("y", Leaf)
+            low = pexConfig.Field("low", int, default=0)
+            high = pexConfig.Field("high", int, default=1)
+            label = pexConfig.Field("label", str, default="")
+            validateDependencies = ("low", "high")
+
+            def validate(self):
+                super().validate()
+                checked.append("node")
+                if self.low > self.high:
+                    raise ValueError("low > high")
+
+        node = Node()
+        node.validate()
+        self.assertEqual(sorted(checked), ["b", "b", "d", "d", "node"])
+        del checked[:]
+        node.validate()
+        self.assertEqual(checked, [])
+
+        # only the changed field of the changed subtree is checked again
+        node.y.b.append(2)
+        node.validate()
+        self.assertEqual(checked, ["b"])
+        del checked[:]
+
+        # the override is only called when a field it depends on changes
+        node.label = "changed"
+        node.validate()
+        self.assertEqual(checked, [])
+        node.low = 2
+        with self.assertRaises(ValueError):
+            node.validate()
+        self.assertEqual(checked, ["node"])
+        with self.assertRaises(ValueError):
+            node.validate()
+        node.high = 3
+        node.validate()
+        del checked[:]
+        node.validate()
+        self.assertEqual(checked, [])
+
+        # invalid values are found again until they are fixed
+        node.x.a = None
+        for _ in range(2):
+            with self.assertRaises(pexConfig.FieldValidationError):
+                node.validate()
+        node.x.a = 2
+        node.validate()
+
+        # a clone is as valid as the config it was made from
+        clone = node.clone()
+        del checked[:]
+        clone.validate()
+        self.assertEqual(checked, [])
+        clone.x.d["k"] = 3
+        clone.validate()
+        self.assertEqual(checked, ["d"])
+
+        with self.assertRaises(ValueError):
+            Node.validateDependencies = ("nope",)
+
+        # the fields declared by a class only cover its own override
+        class Labelled(Node):
+            def validate(self):
+                super().validate()
+                checked.append("labelled")
+                if not self.label:
+                    raise ValueError("no label")
+
+        labelled = Labelled()
+        labelled.label = "first"
+        labelled.validate()
+        labelled.label = ""
+        with self.assertRaises(ValueError):
+            labelled.validate()
+
+        class Base(pexConfig.Config):
+            x = pexConfig.Field("x", int, default=0)
+            y = pexConfig.Field("y", int, default=0)
+
+            def validate(self):
+                super().validate()
+                if self.x < 0:
+                    raise ValueError("x < 0")
+
+        class Derived(Base):
+            validateDependencies = ("y",)
+
+        derived = Derived()
+        derived.validate()
+        derived.x = -1
+        with self.assertRaises(ValueError):
+            derived.validate()
+
+        class Checked(Base):
+            validateDependencies = ("y",)
+
+            def validate(self):
+                super().validate()
+                checked.append("checked")
+
+        Base.validateDependencies = ("x",)
+        config = Checked()
+        config.validate()
+        del checked[:]
+        config.x = 1
+        config.validate()
+        self.assertEqual(checked, ["checked"])
+        config.x = -1
+        with self.assertRaises(ValueError):
+            config.validate()
+
+        # a subconfig whose override takes the arguments of validate is not
+        # recorded as valid, which must not leave its parent recorded as such
+        class Keyword(pexConfig.Config):
+            x = pexConfig.Field("x", int, default=0)
+
+            def validate(self, **kwargs):
+                super().validate(**kwargs)
+                if self.x < 0:
+                    raise ValueError("x < 0")
+
+        class Holder(pexConfig.Config):
+            c = pexConfig.ConfigField("c", Keyword)
+
+        holder = Holder()
+        holder.validate()
+        holder.c.x = -5
+        with self.assertRaises(ValueError):
+            holder.validate()
+
+        # an override that does not declare what it checks is always called,
+        # also when its parent is validated again
+        class Undeclared(pexConfig.Config):
+            x = pexConfig.Field("x", int, default=0)
+
+            def validate(self):
+                super().validate()
+                checked.append("undeclared")
+
+        class Outer(pexConfig.Config):
+            c = pexConfig.ConfigField("c", Undeclared)
+
+        outer = Outer()
+        del checked[:]
+        outer.validate()
+        outer.validate()
+        outer.c.validate()
+        self.assertEqual(checked, ["undeclared"]*3)
+
     def testRangeFieldConstructor(self):
         """Test RangeField constructor's checking of min, max
         """
@@ -273,6 +506,47 @@ class ConfigTest(unittest.TestCase):
         self.assertEqual(self.comp.c.f, roundTrip.c.f)
         self.assertEqual(self.comp.r.name, roundTrip.r.name)
 
+    def testIterSave(self):
+        """Check that a config can be saved in chunks.
+        """
+        self.comp.c.f = 5.
+        stream = io.StringIO()
+        self.comp.saveToStream(stream)
+        chunks = list(self.comp.iterSave(chunkSize=100))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), stream.getvalue())
+        self.assertEqual(self.comp._name, None)
+        stream = io.StringIO()
+        self.comp.saveToStream(stream, skipImports=True)
+        self.assertEqual("".join(self.comp.iterSave(skipImports=True, chunkSize=1)), stream.getvalue())
+
+    def testSaveOnlyChanged(self):
+        """Check that saving only the changed fields round-trips.
+        """
+        self.comp.c.f = 5.
+        self.comp.r = "BBB"
+        self.comp.r["AAA"].ll = [4, 5]
+        self.comp.p["AAA"].n = float("nan")
+        stream = io.StringIO()
+        self.comp.saveToStream(stream, onlyChanged=True, skipImports=True)
+        saved = re.findall(r"^config\.([^=\n]+)=", stream.getvalue(), re.MULTILINE)
+        self.assertEqual(saved, ["c.f", "r['AAA'].ll", "r.name"])
+        roundTrip = Complex()
+        roundTrip.loadFromStream(stream.getvalue())
+        self.assertTrue(self.comp.compare(roundTrip))
+
+        # relative to another config
+        baseline = Complex()
+        baseline.c.f = 5.
+        baseline.p = None
+        stream = io.StringIO()
+        self.comp.saveToStream(stream, onlyChanged=True, baseline=baseline)
+        self.assertNotIn("config.c.f", stream.getvalue())
+        baseline.loadFromStream(stream.getvalue())
+        self.assertTrue(self.comp.compare(baseline))
+        with self.assertRaises(TypeError):
+            self.comp.saveToStream(io.StringIO(), onlyChanged=True, baseline=Simple())
+
     def testDuplicateRegistryNames(self):
         self.comp.r["AAA"].f = 5.0
         self.assertEqual(self.comp.p["AAA"].f, 3.0)
@@ -366,6 +640,75 @@ class ConfigTest(unittest.TestCase):
         self.assertRaises(pexConfig.FieldValidationError, setattr, self.comp, "p", "AAA")
         self.assertRaises(pexConfig.FieldValidationError, setattr, self.comp.p["AAA"], "f", 5.0)
 
+    def testFreezeCompact(self):
+        """Test that a config frozen with compact=True holds its containers
+        and history compactly, and otherwise behaves like any frozen config.
+        """
+        self.comp.r["AAA"].ll.append(4)
+        self.comp.r["AAA"].d["k2"] = "v2"
+        for value in range(20):
+            self.comp.c.f = float(value)
+        clone = self.comp.clone()
+        stream = io.StringIO()
+        self.comp.saveToStream(stream)
+        expected = stream.getvalue()
+        fingerprint = self.comp.fingerprint()
+
+        def historySize(config):
+            history = config._history
+            if isinstance(history, dict):
+                return sys.getsizeof(history) + sum(sys.getsizeof(events) + sum(map(sys.getsizeof, events))
+                                                    for events in history.values())
+            return sys.getsizeof(history) + sys.getsizeof(history._index) + sys.getsizeof(history._events)
+
+        history = {name: list(events) for name, events in self.comp.c.history.items()}
+        size = historySize(self.comp.c)
+        self.comp.freeze(compact=True)
+        self.assertLess(historySize(self.comp.c), size / 2)
+        self.assertEqual({name: list(events) for name, events in self.comp.c.history.items()}, history)
+        self.assertEqual(self.comp.c.history["f"][-1][0], 19.0)
+        self.assertEqual(self.comp.c.history.setdefault("f", [])[-1][0], 19.0)
+        with self.assertRaises(KeyError):
+            self.comp.c.history["notAField"]
+
+        d = self.comp.r["AAA"].d
+        self.assertEqual(d, {"key": "value", "k2": "v2"})
+        self.assertEqual(repr(d), repr({"key": "value", "k2": "v2"}))
+        with self.assertRaises(TypeError):
+            d._dict["k3"] = "v3"
+
+        ll = self.comp.r["AAA"].ll
+        self.assertEqual(ll.list(), [1, 2, 3, 4])
+        self.assertIsInstance(ll.list(), list)
+        self.assertEqual(ll, [1, 2, 3, 4])
+        self.assertEqual(repr(ll), "[1, 2, 3, 4]")
+        self.assertIsInstance(self.comp.r["AAA"].history["ll"], tuple)
+        with self.assertRaises(pexConfig.FieldValidationError):
+            ll.append(5)
+        stream = io.StringIO()
+        self.comp.saveToStream(stream)
+        self.assertEqual(stream.getvalue(), expected)
+        self.assertEqual(self.comp.fingerprint(), fingerprint)
+        self.assertEqual(pickle.loads(pickle.dumps(self.comp)), self.comp)
+
+        # the clone made before, and one made now, are unaffected
+        clone.r["AAA"].ll.append(5)
+        self.assertEqual(list(clone.r["AAA"].ll), [1, 2, 3, 4, 5])
+        other = self.comp.clone()
+        other.r["AAA"].ll.append(6)
+        other.r["AAA"].f = 4.0
+        other.r["AAA"].d["k3"] = "v3"
+        other.c.f = 20.0
+        self.assertEqual(list(other.r["AAA"].ll), [1, 2, 3, 4, 6])
+        self.assertEqual(ll.list(), [1, 2, 3, 4])
+        self.assertNotIn("k3", d)
+        self.assertEqual(len(other.c.history["f"]), len(history["f"]) + 1)
+
+        # a compacted config records history again as it did before
+        self.comp.c._recordHistory("f", 19.0, [], "test")
+        self.assertEqual(self.comp.c.history["f"][:-1], history["f"])
+        self.assertEqual(self.comp.c.history["f"][-1], (19.0, [], "test"))
+
     def checkImportRoundTrip(self, importStatement, searchString, shouldBeThere):
         self.comp.c.f = 5.
 
@@ -413,6 +756,30 @@ except ImportError:
         self.assertIsInstance(comp, Complex)
         self.assertEqual(self.comp.c.f, comp.c.f)
 
+    def testPickleState(self):
+        """Test that configs are pickled as field values, not as source.
+        """
+        self.comp.r["AAA"].ll.append(4)
+        self.comp.p = None
+        function, (cls, state) = self.comp.__reduce__()
+        self.assertIs(function, pexConfig.config.unreduceConfigState)
+        comp = pickle.loads(pickle.dumps(self.comp))
+        self.assertEqual(comp, self.comp)
+        self.assertEqual(comp.r["AAA"]._name, "r['AAA']")
+        self.assertIsNone(comp.p.name)
+        self.assertIs(comp.r["AAA"].ll._config, comp.r["AAA"])
+        comp.r["AAA"].ll.append(5)
+        self.assertEqual(list(self.comp.r["AAA"].ll), [1, 2, 3, 4])
+        self.assertEqual(comp.r["AAA"].history["ll"][0][2], "unpickle")
+
+        # fields that are missing from the pickle get their defaults
+        del state[0]["c"]
+        comp = function(cls, state)
+        self.assertEqual(comp.c.f, 0.0)
+        state[0]["unknown"] = None
+        with self.assertRaises(AttributeError):
+            function(cls, state)
+
     def testCompare(self):
         comp2 = Complex()
         inner2 = InnerConfig()
@@ -465,6 +832,51 @@ except ImportError:
         # Before DM-16561, this raised.
         self.assertFalse(self.outer.compare(self.inner))
 
+    def testUpdateFromDict(self):
+        """Check that fields and items can be updated from their paths,
+        with one call stack for all changes.
+        """
+        self.comp.updateFromDict({
+            "c.f": 5,
+            "r.name": "BBB",
+            "r['AAA'].ll": [4, 5],
+            "r.AAA.ll[1]": 6,
+            "r.AAA.d.k2": "v2",
+            "p.BBB.f": 2.0,
+        })
+        self.assertEqual(self.comp.c.f, 5.0)
+        self.assertEqual(self.comp.r.name, "BBB")
+        self.assertEqual(list(self.comp.r["AAA"].ll), [4, 6])
+        self.assertEqual(self.comp.r["AAA"].d["k2"], "v2")
+        self.assertEqual(self.comp.p["BBB"].f, 2.0)
+        stacks = [self.comp.c.history["f"][-1][1], self.comp.history["r"][-1][1],
+                  self.comp.r["AAA"].history["ll"][-1][1], self.comp.p["BBB"].history["f"][-1][1]]
+        for stack in stacks:
+            self.assertIs(stack, stacks[0])
+        self.assertEqual(self.comp.c.history["f"][-1][2], "update")
+        self.assertIn("r['AAA'].ll", Complex._pathCache)
+
+        # the paths are resolved before anything is changed
+        for path in ("c.g", "r.CCC.f", "c.f.x", "c..f"):
+            with self.assertRaises(KeyError):
+                self.comp.updateFromDict({"c.f": 1.0, path: 1})
+            self.assertEqual(self.comp.c.f, 5.0)
+
+        # except below a choice, and invalid values are found as they are
+        # assigned, unless the update is atomic
+        with self.assertRaises(KeyError):
+            self.comp.updateFromDict({"c.f": 1.0, "r.AAA.ll.x": 1})
+        self.assertEqual(self.comp.c.f, 1.0)
+        with self.assertRaises(pexConfig.FieldValidationError):
+            self.comp.updateFromDict({"c.f": 2.0, "r.AAA.ll": [-1]})
+        self.assertEqual(self.comp.c.f, 2.0)
+        self.comp.c.f = 5.0
+        for update in ({"c.f": 1.0, "r.AAA.ll.x": 1}, {"c.f": 1.0, "r.AAA.ll": [-1]}):
+            with self.assertRaises((KeyError, pexConfig.FieldValidationError)):
+                self.comp.updateFromDict(update, atomic=True)
+            self.assertEqual(self.comp.c.f, 5.0)
+            self.assertEqual(list(self.comp.r["AAA"].ll), [4, 6])
+
     def testLoadError(self):
         """Check that loading allows errors in the file being loaded to
         propagate.
@@ -472,6 +884,96 @@ except ImportError:
         self.assertRaises(SyntaxError, self.simple.loadFromStream, "bork bork bork")
         self.assertRaises(NameError, self.simple.loadFromStream, "config.f = bork")
 
+    def testLoadCache(self):
+        """Check that loading a file again reuses its compiled code, until
+        the file changes.
+        """
+        with tempfile.TemporaryDirectory() as tempDir:
+            filename = os.path.join(tempDir, "override.py")
+            with open(filename, "w") as f:
+                f.write("config.f = 5.0\nconfig.i = 2\n")
+            self.simple.load(filename)
+            with unittest.mock.patch("builtins.compile", side_effect=AssertionError("recompiled")):
+                self.simple.f = 1.0
+                self.simple.load(filename)
+            self.assertEqual(self.simple.f, 5.0)
+            frame = self.simple.history["i"][-1][1][-1]
+            self.assertEqual((frame.filename, frame.lineno), (filename, 2))
+
+            with open(filename, "w") as f:
+                f.write("config.f = 6.0\n")
+            self.simple.load(filename)
+            self.assertEqual(self.simple.f, 6.0)
+
+            # compiled files can also be kept on disk
+            cacheDir = os.path.join(tempDir, "cache")
+            self.addCleanup(setattr, Simple, "loadCacheDir", Simple.loadCacheDir)
+            Simple.loadCacheDir = cacheDir
+            pexConfig.Config.clearLoadCache()
+            self.simple.load(filename)
+            self.assertEqual(len(os.listdir(cacheDir)), 1)
+            pexConfig.Config.clearLoadCache()
+            with unittest.mock.patch("builtins.compile", side_effect=AssertionError("recompiled")):
+                self.simple.f = 1.0
+                self.simple.load(filename)
+            self.assertEqual(self.simple.f, 6.0)
+
+            # the cache only keeps the files used most recently
+            Simple.loadCacheDir = None
+            self.addCleanup(setattr, Simple, "loadCacheSize", Simple.loadCacheSize)
+            Simple.loadCacheSize = 2
+            pexConfig.Config.clearLoadCache()
+            filenames = [os.path.join(tempDir, "override%d.py" % i) for i in range(3)]
+            for i, name in enumerate(filenames):
+                with open(name, "w") as f:
+                    f.write("config.i = %d\n" % i)
+            for name in filenames[:2] + filenames[:1] + filenames[2:]:
+                self.simple.load(name)
+            self.assertEqual(len(pexConfig.config._LOAD_CACHE), 2)
+            self.assertEqual(self.simple.i, 2)
+            with unittest.mock.patch("builtins.compile", side_effect=AssertionError("recompiled")):
+                self.simple.load(filenames[0])
+            with self.assertRaises(AssertionError):
+                with unittest.mock.patch("builtins.compile", side_effect=AssertionError("recompiled")):
+                    self.simple.load(filenames[1])
+            pexConfig.Config.clearLoadCache()
+            self.assertEqual(len(pexConfig.config._LOAD_CACHE), 0)
+
+    def testStructuredLoad(self):
+        """Check that saved configs are applied without executing them, and
+        that other files are still executed.
+        """
+        import lsst.pex.config.loader as pexLoader
+
+        self.comp.r = "BBB"
+        self.comp.p = "AAA"
+        self.comp.c.f = 5.
+        self.comp.r["AAA"].ll = [4, 5]
+        self.comp.r["AAA"].d["k2"] = "v2"
+        stream = io.StringIO()
+        self.comp.saveToStream(stream)
+        self.assertIsNotNone(pexLoader.parse(ast.parse(stream.getvalue())))
+
+        with tempfile.TemporaryDirectory() as tempDir:
+            filename = os.path.join(tempDir, "saved.py")
+            with open(filename, "w") as f:
+                f.write(stream.getvalue())
+            roundTrip = Complex()
+            with unittest.mock.patch("builtins.exec", side_effect=AssertionError("executed")):
+                roundTrip.load(filename)
+            self.assertTrue(self.comp.compare(roundTrip))
+            self.assertTrue(math.isnan(roundTrip.r["AAA"].n))
+            frame = roundTrip.c.history["f"][-1][1][-1]
+            self.assertEqual(frame.filename, filename)
+            self.assertEqual(stream.getvalue().splitlines()[frame.lineno - 1], "config.c.f=5.0")
+
+            # anything else falls back to executing the file
+            with open(filename, "w") as f:
+                f.write("for v in (1, 2):\n    config.i = v\n")
+            self.assertIsNone(pexLoader.parse(ast.parse(open(filename).read())))
+            self.simple.load(filename)
+            self.assertEqual(self.simple.i, 2)
+
     def testNames(self):
         """Check that the names() method returns valid keys.
 
@@ -484,6 +986,271 @@ except ImportError:
         for name in names:
             self.assertTrue(hasattr(self.simple, name))
 
+        # the names are those assigned by saveToStream, in the same order
+        self.comp.p = "AAA"
+        stream = io.StringIO()
+        self.comp.saveToStream(stream, skipImports=True)
+        saved = re.findall(r"^config\.([^=\n]+)=", stream.getvalue(), re.MULTILINE)
+        self.assertEqual(self.comp.names(), saved)
+        self.assertIsInstance(Complex._nameIndex, tuple)
+
+        # the names of the fields a subconfig class gains are found too
+        class Sub(pexConfig.Config):
+            a = pexConfig.Field("a", int, default=1)
+
+        class Par(pexConfig.Config):
+            s = pexConfig.ConfigField("s", Sub)
+
+        self.assertEqual(Par().names(), ["s.a"])
+        Sub.b = pexConfig.Field("b", int, default=2)
+        self.assertEqual(Par().names(), ["s.a", "s.b"])
+        self.assertEqual(self.deprecation.names(), [])
+        self.deprecation.old = 5
+        self.assertEqual(self.deprecation.names(), ["old"])
+
+    def testClone(self):
+        """Test that a clone shares values with its source until they are
+        accessed, and that each can be modified without affecting the other.
+        """
+        self.simple.ll.append(4)
+        clone = self.simple.clone()
+        self.assertIsInstance(clone, Simple)
+        self.assertIs(clone._storage["ll"], self.simple._storage["ll"])
+        self.assertEqual(clone.toDict(), self.simple.toDict())
+        self.assertEqual(clone.history["ll"], self.simple.history["ll"])
+
+        clone.ll.append(5)
+        clone.d["key"] = "value2"
+        clone.f = 4.0
+        self.assertEqual(list(self.simple.ll), [1, 2, 3, 4])
+        self.assertEqual(list(clone.ll), [1, 2, 3, 4, 5])
+        self.assertEqual(self.simple.d["key"], "value")
+        self.assertEqual(self.simple.f, 3.0)
+        self.assertEqual(len(clone.history["ll"]), len(self.simple.history["ll"]) + 1)
+        self.assertEqual(len(clone.history["f"]), len(self.simple.history["f"]) + 1)
+        self.assertIs(clone.ll.history, clone.history["ll"])
+
+        # modifying the source does not change the clone either
+        clone = self.comp.clone()
+        self.assertIs(clone._storage["c"], self.comp._storage["c"])
+        self.comp.c.f = 1.0
+        self.comp.r["AAA"].ll.append(4)
+        self.comp.r = "BBB"
+        self.assertEqual(clone.c.f, 0.0)
+        self.assertEqual(list(clone.r["AAA"].ll), [1, 2, 3])
+        self.assertEqual(clone.r.name, "AAA")
+        clone.r["BBB"].f = 2.0
+        self.assertEqual(self.comp.r["BBB"].f, 0.0)
+        self.assertEqual(clone.c._name, "c")
+
+        # clones of a frozen config can be modified, and frozen separately
+        self.comp.freeze()
+        clone = self.comp.clone()
+        self.assertIs(clone._storage["c"], self.comp._storage["c"])
+        clone.c.f = 3.0
+        self.assertEqual(self.comp.c.f, 1.0)
+        with self.assertRaises(pexConfig.FieldValidationError):
+            self.comp.c.f = 3.0
+        clone.freeze()
+        with self.assertRaises(pexConfig.FieldValidationError):
+            clone.c.f = 4.0
+        other = clone.clone()
+        other.c.f = 4.0
+        self.assertEqual(clone.c.f, 3.0)
+
+        # nor does modifying values through references taken before cloning
+        self.comp = Complex()
+        ll = self.simple.ll
+        inner = self.comp.c
+        choice = self.comp.r["AAA"]
+        clone = self.simple.clone()
+        other = self.comp.clone()
+        again = other.clone()
+        saved = (clone.toDict(), len(clone.history["ll"]), other.toDict(), len(other.history["c"]))
+        ll.append(6)
+        inner.f = 99.0
+        choice.ll.append(6)
+        self.assertEqual(list(clone.ll), [1, 2, 3, 4])
+        self.assertEqual(other.c.f, 0.0)
+        self.assertEqual(again.c.f, 0.0)
+        self.assertEqual(list(other.r["AAA"].ll), [1, 2, 3])
+        self.assertEqual(list(again.r["AAA"].ll), [1, 2, 3])
+        self.assertEqual(saved, (clone.toDict(), len(clone.history["ll"]),
+                                 other.toDict(), len(other.history["c"])))
+
+        # a clone saves and loads like its source
+        self.comp.freeze()
+        clone = self.comp.clone()
+        stream = io.StringIO()
+        clone.saveToStream(stream)
+        roundTrip = Complex()
+        roundTrip.loadFromStream(stream.getvalue())
+        self.assertEqual(self.comp, roundTrip)
+
+    def testCompact(self):
+        """Test that configs and the values of their container fields have no
+        __dict__, and that history is only allocated when it is recorded.
+        """
+        for value in (self.simple, self.simple.ll, self.simple.d, self.comp.c):
+            self.assertFalse(hasattr(value, "__dict__"), msg=type(value).__name__)
+        self.assertEqual(self.simple.ll.__doc__, "list test")
+        self.assertIsInstance(pexConfig.listField.List.__doc__, str)
+        with self.assertRaises(AttributeError):
+            self.simple.notAField = 1
+        with self.assertRaises(pexConfig.FieldValidationError):
+            self.simple.ll.notAnAttribute = 1
+
+        class QuietConfig(Simple):
+            historyMode = "off"
+
+        quiet = QuietConfig()
+        quiet.ll.append(4)
+        quiet.f = 4.0
+        self.assertEqual(len(quiet._history), 0)
+        self.assertEqual(quiet.history["f"], [])
+        self.assertEqual(quiet.ll.history, [])
+        with self.assertRaises(KeyError):
+            quiet.history["notAField"]
+        clone = quiet.clone()
+        self.assertIs(clone._imports, quiet._imports)
+        self.assertEqual(clone.ll.history, [])
+        self.assertEqual(list(clone.ll), [1, 2, 3, 4])
+
+    def testDefaultTemplate(self):
+        """Check that simple defaults are validated once per class, and give
+        the same storage and history as a validated assignment.
+        """
+        calls = []
+
+        class CountingField(pexConfig.Field):
+            def _validateValue(self, value):
+                calls.append(value)
+                pexConfig.Field._validateValue(self, value)
+
+        class TemplateConfig(pexConfig.Config):
+            a = CountingField("a", float, default=1)
+            b = CountingField("b", int, default=None, optional=True)
+            c = pexConfig.ListField("c", int, default=[1])
+
+        self.assertEqual(set(TemplateConfig._defaultTemplate), {"a", "b"})
+        self.assertEqual(calls, [1.0])
+        configs = [TemplateConfig(), TemplateConfig(b=3)]
+        self.assertEqual(calls, [1.0, 3])
+        for config in configs:
+            self.assertIsInstance(config.a, float)
+            self.assertEqual(config.a, 1.0)
+            self.assertEqual(list(config._storage), ["a", "b", "c"])
+            value, stack, label = config.history["a"][0]
+            self.assertEqual((value, label), (1.0, "default"))
+            self.assertIs(stack[-1], TemplateConfig.a.source)
+        self.assertEqual(config.history["b"][0][0], None)
+        self.assertEqual(config.history["b"][1][0], 3)
+
+        # Changing the default after the class is defined is respected
+        TemplateConfig.a.default = 2.0
+        self.assertEqual(TemplateConfig().a, 2.0)
+        TemplateConfig.a.default = "bad"
+        with self.assertRaises(pexConfig.FieldValidationError):
+            TemplateConfig()
+
+        # Invalid defaults are only reported on construction
+        class BadConfig(pexConfig.Config):
+            a = pexConfig.RangeField("a", int, default=5, max=3)
+
+        self.assertNotIn("a", BadConfig._defaultTemplate)
+        with self.assertRaises(pexConfig.FieldValidationError):
+            BadConfig()
+
+        # Fields added after the class is defined are also templated
+        BadConfig.b = pexConfig.Field("b", str, default="b")
+        self.assertIn("b", BadConfig._defaultTemplate)
+
+    def testToDictCache(self):
+        """Test that toDict is made once, and made again after any change to
+        the config or its subconfigs.
+        """
+        dict_ = self.comp.toDict()
+        self.assertIs(self.comp._getDict(), self.comp._getDict())
+        self.assertEqual(self.comp.toDict(), dict_)
+        # the result is a copy, which may be modified
+        dict_["c"]["f"] = 5.0
+        dict_["r"]["values"]["AAA"]["ll"].append(4)
+        self.assertEqual(self.comp.c.f, 0.0)
+        self.assertEqual(self.comp.toDict()["r"]["values"]["AAA"]["ll"], [1, 2, 3])
+
+        self.comp.c.f = 1.0
+        self.comp.r["AAA"].ll.append(4)
+        self.comp.r["AAA"].d["key"] = "value2"
+        self.comp.p = "AAA"
+        dict_ = self.comp.toDict()
+        self.assertEqual(dict_["c"]["f"], 1.0)
+        self.assertEqual(dict_["r"]["values"]["AAA"]["ll"], [1, 2, 3, 4])
+        self.assertEqual(dict_["r"]["values"]["AAA"]["d"], {"key": "value2"})
+        self.assertEqual(dict_["p"]["name"], "AAA")
+        del self.comp.p.name
+        self.assertIsNone(self.comp.toDict()["p"]["name"])
+        self.assertIn("'f': 1.0", str(self.comp))
+
+        # changes are seen with the history turned off too
+        self.addCleanup(setattr, pexConfig.Config, "historyMode", pexConfig.Config.historyMode)
+        pexConfig.Config.historyMode = "off"
+        self.simple.f = 4.0
+        self.assertEqual(self.simple.toDict()["f"], 4.0)
+
+        # new registry entries are included
+        registry = pexConfig.makeRegistry("")
+
+        class ChoiceConfig(pexConfig.Config):
+            r = registry.makeField("r")
+
+        choice = ChoiceConfig()
+        self.assertEqual(choice.toDict()["r"]["values"], {})
+        registry.register("a", InnerConfig, ConfigClass=InnerConfig)
+        self.assertIn("a", choice.toDict()["r"]["values"])
+
+        # a frozen config keeps its dict
+        self.comp.freeze()
+        dict_ = self.comp._getDict()
+        pexConfig.config._typemapChanged()
+        self.assertIs(self.comp._getDict(), dict_)
+
+    def testFingerprint(self):
+        """Test that configs with the same contents have the same
+        fingerprint, and that frozen configs can be used as keys.
+        """
+        other = Complex()
+        fingerprint = self.comp.fingerprint()
+        self.assertEqual(len(fingerprint), 40)
+        self.assertEqual(other.fingerprint(), fingerprint)
+        self.assertNotEqual(self.simple.fingerprint(), Simple(f=4.0).fingerprint())
+        self.assertEqual(self.simple.fingerprint(), Simple(n=-float("nan")).fingerprint())
+        self.assertEqual(Simple(f=0.0).fingerprint(), Simple(f=-0.0).fingerprint())
+
+        # a change is seen by the configs that hold the changed config, and
+        # the fingerprints of the others are kept
+        other.r["AAA"].ll.append(4)
+        self.assertIsNotNone(other.c._getCached("fingerprint"))
+        self.assertIsNone(other._getCached("fingerprint"))
+        self.assertNotEqual(other.fingerprint(), fingerprint)
+        del other.r["AAA"].ll[-1]
+        self.assertEqual(other.fingerprint(), fingerprint)
+        other.r = "BBB"
+        self.assertNotEqual(other.fingerprint(), fingerprint)
+
+        # frozen configs are hashable, and compare by fingerprint
+        with self.assertRaises(TypeError):
+            hash(self.comp)
+        configs = [Complex(), Complex(), Complex()]
+        configs[2].c.f = 1.0
+        for config in configs:
+            config.freeze()
+        self.assertEqual(len(set(configs)), 2)
+        self.assertEqual(configs[0], configs[1])
+        self.assertNotEqual(configs[0], configs[2])
+        key = Complex()
+        key.freeze()
+        self.assertIn(key, {configs[0]: 1})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -25,6 +25,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import io
 import os
 import unittest
 import lsst.pex.config as pexConfig
@@ -61,6 +62,10 @@ class Config3(pexConfig.Config):
                                     default=["AAA"], multi=True, optional=True)
 
 
+class LazyConfig3(Config3):
+    lazyChoices = True
+
+
 class ConfigChoiceFieldTest(unittest.TestCase):
     def setUp(self):
         self.config = Config3()
@@ -88,6 +93,74 @@ class ConfigChoiceFieldTest(unittest.TestCase):
         self.assertEqual(self.config.a["AAA"].f, roundtrip.a["AAA"].f)
         self.assertEqual(self.config.a["BBB"].f, roundtrip.a["BBB"].f)
 
+    def testSaveSelected(self):
+        self.config.a["AAA"].f = 1
+        self.config.a = "BBB"
+        self.config.c = ["AAA", "CCC"]
+        stream = io.StringIO()
+        self.config.saveToStream(stream, skipUnselected=True)
+        self.assertNotIn("config.a['AAA']", stream.getvalue())
+        self.assertNotIn("config.c['BBB']", stream.getvalue())
+
+        roundtrip = Config3()
+        roundtrip.loadFromStream(stream.getvalue())
+        self.assertEqual(roundtrip.a.name, "BBB")
+        self.assertEqual(roundtrip.a["AAA"].f, 4)
+        self.assertEqual(set(roundtrip.c.names), {"AAA", "CCC"})
+
+    def testLazyChoices(self):
+        """Test that choices are only made when used if the config makes
+        them lazily.
+        """
+        self.config.a["BBB"].f = 2.0
+        self.config.a["CCC"].f = 3
+        stream = io.StringIO()
+        self.config.saveToStream(stream)
+        config = LazyConfig3()
+        self.assertEqual(config.toDict()["a"]["values"], {"AAA": {"f": 4}})
+        self.assertNotIn("a['BBB'].f", config.names())
+        loaded = LazyConfig3()
+        loaded.loadFromStream(stream.getvalue().replace("Config3", "LazyConfig3"))
+        self.assertEqual(set(loaded.a._dict), {"AAA"})
+        self.assertIn("CCC", loaded.a._pending)
+
+        # the assignments are kept, saved and compared as they are
+        stream = io.StringIO()
+        loaded.saveToStream(stream)
+        self.assertIn("config.a['CCC'].f=3", stream.getvalue())
+        self.assertEqual(set(loaded.a._dict), {"AAA"})
+        self.assertEqual(loaded.toDict(), self.config.toDict())
+        self.assertEqual(loaded.a, self.config.a)
+
+        # and made when the choice is selected or accessed
+        loaded = LazyConfig3()
+        loaded.loadFromStream(stream.getvalue())
+        loaded.a = "BBB"
+        self.assertEqual(loaded.a.active.f, 2.0)
+        self.assertEqual(loaded.a["CCC"].f, 3)
+        self.assertEqual(loaded.a._pending, {})
+
+        # assignments to fields a choice does not have fail as they are loaded
+        loaded = LazyConfig3()
+        with self.assertRaises(AttributeError):
+            loaded.loadFromStream("config.a['BBB'].nope=3\n")
+
+        # and so do invalid values, which are checked before they are kept
+        loaded = LazyConfig3()
+        for override in ("config.a['BBB'].f=-1.0\n", "config.a['CCC'].f='notint'\n"):
+            with self.assertRaises(pexConfig.FieldValidationError):
+                loaded.loadFromStream(override)
+        self.assertEqual(loaded.a._pending, {})
+        loaded.loadFromStream("config.a['BBB'].f=2\n")
+        self.assertIsInstance(loaded.a["BBB"].f, float)
+        loaded.validate()
+
+        # placeholders of a frozen config are made frozen
+        config.freeze()
+        fingerprint = config.fingerprint()
+        self.assertTrue(config.a["BBB"]._frozen)
+        self.assertEqual(config.fingerprint(), fingerprint)
+
     def testValidate(self):
         self.config.validate()
         self.config.a = "AAA"
@@ -123,6 +196,18 @@ class ConfigChoiceFieldTest(unittest.TestCase):
                           setattr, self.config.c, "names", "AAA")
         self.config.c.names = ["AAA"]
 
+    def testClone(self):
+        self.config.c.names.add("BBB")
+        clone = self.config.clone()
+        clone.c.names.add("CCC")
+        clone.c["AAA"].f = 5
+        clone.a = "BBB"
+        self.assertEqual(set(self.config.c.names), {"AAA", "BBB"})
+        self.assertEqual(set(clone.c.names), {"AAA", "BBB", "CCC"})
+        self.assertEqual(self.config.c["AAA"].f, 4)
+        self.assertEqual(self.config.a.name, "AAA")
+        self.assertIs(clone.c.names._dict, clone.c)
+
     def testNoneValue(self):
         self.config.a = None
         self.assertRaises(pexConfig.FieldValidationError, self.config.validate)
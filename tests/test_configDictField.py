@@ -129,6 +129,21 @@ class ConfigDictFieldTest(unittest.TestCase):
 
         self.assertRaises(pexConfig.FieldValidationError, setattr, c.d1["a"], "f", 0)
 
+    def testClone(self):
+        c = Config2(d1={"a": Config1(f=4), "b": Config1})
+        clone = c.clone()
+        clone.d1["a"].f = 5
+        clone.d1["c"] = Config1(f=6)
+        self.assertEqual(c.d1["a"].f, 4)
+        self.assertNotIn("c", c.d1)
+        self.assertEqual(clone.d1["b"].f, 3)
+        self.assertIs(clone.d1._config, clone)
+
+    def testNames(self):
+        c = Config2(d1={"a": Config1(f=4)})
+        self.assertEqual(c.names(), ["d1", "d1['a']", "d1['a'].f"])
+        self.assertEqual(Config2().names(), ["d1"])
+
     def testNoArbitraryAttributes(self):
         c = Config2(d1={})
         self.assertRaises(pexConfig.FieldValidationError, setattr, c.d1, "should", "fail")
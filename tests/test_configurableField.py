@@ -25,8 +25,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import io
 import os
+import pickle
 import unittest
+import unittest.mock
 import lsst.pex.config as pexConf
 
 
@@ -50,6 +53,10 @@ class Config2(pexConf.Config):
     c2 = pexConf.ConfigurableField("c2", target=Target2, ConfigClass=Config1, default=Config1(f=3))
 
 
+class Config3(Config1):
+    s = pexConf.Field("s", dtype=str, default="x")
+
+
 class ConfigurableFieldTest(unittest.TestCase):
     def testConstructor(self):
         try:
@@ -114,6 +121,61 @@ class ConfigurableFieldTest(unittest.TestCase):
         self.assertEqual(f.c2.target, c.c2.target)
         self.assertEqual(f.c2.f, c.c2.f)
 
+    def testNames(self):
+        c = Config2()
+        self.assertEqual(c.names(), ["c1.f", "c2.f"])
+        c.c2.retarget(Target1, ConfigClass=Config3)
+        self.assertEqual(c.names(), ["c1.f", "c2.f", "c2.s"])
+
+    def testUpdateFromDict(self):
+        """Test that paths below a configurable are resolved against the
+        config class of its current target, and that no value is assigned
+        by an atomic update unless all of them are valid.
+        """
+        c = Config2()
+        c.updateFromDict({"c2.f": 4})
+        c.c2.retarget(Target1, ConfigClass=Config3)
+        c.updateFromDict({"c2.s": "y", "c2.f": 6})
+        self.assertEqual((c.c2.s, c.c2.f), ("y", 6))
+        with self.assertRaises(KeyError):
+            c.updateFromDict({"c1.s": "y"})
+        with self.assertRaises(pexConf.FieldValidationError):
+            c.updateFromDict({"c2.f": 7, "c2": None}, atomic=True)
+        with self.assertRaises(pexConf.FieldValidationError):
+            c.updateFromDict({"c1.f": 7, "c2.f": -1}, atomic=True)
+        self.assertEqual((c.c1.f, c.c2.f), (5, 6))
+
+    def testClone(self):
+        c = Config2()
+        c.c1.f = 2
+        clone = c.clone()
+        clone.c1.f = 3
+        clone.c2.retarget(Target1)
+        self.assertEqual(c.c1.f, 2)
+        self.assertEqual(clone.c1.f, 3)
+        self.assertEqual(c.c2.target, Target2)
+        self.assertEqual(type(clone.c2.apply()), Target1)
+
+    def testPickle(self):
+        c = Config2()
+        c.c1.f = 2
+        c.c2.retarget(Target1)
+        r = pickle.loads(pickle.dumps(c))
+        self.assertEqual(r.c1.f, 2)
+        self.assertEqual(r.c1.target, Target1)
+        self.assertEqual(r.c2.target, Target1)
+        self.assertEqual(r.c2.f, 3)
+        self.assertEqual(type(r.c2.apply()), Target1)
+        r.c2.f = 4
+        self.assertEqual(c.c2.f, 3)
+
+        # targets that cannot be pickled by reference fall back to the source
+        def localTarget(config):
+            return config.f
+
+        c.c2.retarget(localTarget, ConfigClass=Config1)
+        self.assertIs(c.__reduce__()[0], pexConf.config.unreduceConfig)
+
     def testValidate(self):
         c = Config2()
         self.assertRaises(pexConf.FieldValidationError, setattr, c.c1, "f", 0)
@@ -133,6 +195,63 @@ class ConfigurableFieldTest(unittest.TestCase):
         self.assertEqual(c.c2.f, r.c2.f)
         self.assertEqual(c.c2.target, r.c2.target)
 
+    def testSaveOnlyChanged(self):
+        c = Config2()
+        c.c1.f = 2
+        stream = io.StringIO()
+        c.saveToStream(stream, onlyChanged=True, skipImports=True)
+        self.assertEqual(stream.getvalue().count("config."), 1)
+
+        # a retarget relative to the baseline is saved with all the values
+        baseline = Config2()
+        baseline.c2.retarget(Target1)
+        stream = io.StringIO()
+        c.saveToStream(stream, onlyChanged=True, baseline=baseline)
+        self.assertIn("config.c2.retarget(", stream.getvalue())
+        baseline.loadFromStream(stream.getvalue())
+        self.assertEqual(baseline.c2.target, Target2)
+        self.assertEqual((baseline.c1.f, baseline.c2.f), (2, 3))
+
+    def testImportsCached(self):
+        c = Config2()
+        c.saveToStream(io.StringIO())
+        original = pexConf.ConfigurableField._collectImports
+        with unittest.mock.patch.object(pexConf.ConfigurableField, "_collectImports", autospec=True,
+                                        side_effect=original) as collect:
+            stream = io.StringIO()
+            c.saveToStream(stream)
+            self.assertEqual(collect.call_count, 0)
+            self.assertNotIn("import unittest.mock", stream.getvalue())
+
+            # a retarget makes the config and its parent collect again
+            c.c2.retarget(unittest.mock.Mock, ConfigClass=Config1)
+            stream = io.StringIO()
+            c.saveToStream(stream)
+            self.assertEqual(collect.call_count, 2)
+            self.assertIn("import unittest.mock", stream.getvalue())
+
+            # so does a new registry entry
+            pexConf.makeRegistry("").register("a", Target1)
+            c.saveToStream(io.StringIO())
+            self.assertEqual(collect.call_count, 4)
+
+        # clones keep the collected imports
+        stream = io.StringIO()
+        c.clone().saveToStream(stream)
+        self.assertIn("import unittest.mock", stream.getvalue())
+
+    def testFingerprint(self):
+        c = Config2()
+        fingerprint = c.fingerprint()
+        self.assertEqual(Config2().fingerprint(), fingerprint)
+        # the target is part of the fingerprint, as well as the values
+        c.c2.retarget(Target1)
+        c.c2.f = 3
+        self.assertNotEqual(c.fingerprint(), fingerprint)
+        c.c2.retarget(Target2, ConfigClass=Config1)
+        c.c2.f = 3
+        self.assertEqual(c.fingerprint(), fingerprint)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -25,15 +25,36 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import gc
 import unittest
 import lsst.pex.config as pexConfig
+import lsst.pex.config.callStack as pexConfigCallStack
 import lsst.pex.config.history as pexConfigHistory
+from lsst.pex.config.callStack import CallStack, StackFrame, getCallStack
 
 
 class PexTestConfig(pexConfig.Config):
     a = pexConfig.Field('Parameter A', float, default=1.0)
 
 
+class Configurable:
+    ConfigClass = PexTestConfig
+
+    def __init__(self, config):
+        self.config = config
+
+
+class ContainerConfig(pexConfig.Config):
+    f = pexConfig.Field("float", float, default=1.0)
+    ll = pexConfig.ListField("list", int, default=[1, 2])
+    d = pexConfig.DictField("dict", str, int, default={"a": 1})
+    sub = pexConfig.ConfigField("subconfig", PexTestConfig)
+    choice = pexConfig.ConfigChoiceField("choice", {"A": PexTestConfig}, default="A")
+    multi = pexConfig.ConfigChoiceField("multi", {"A": PexTestConfig}, multi=True)
+    target = pexConfig.ConfigurableField("configurable", Configurable)
+    cd = pexConfig.ConfigDictField("config dict", str, PexTestConfig, default={})
+
+
 class HistoryTest(unittest.TestCase):
     def testHistory(self):
         b = PexTestConfig()
@@ -78,6 +99,242 @@ class HistoryTest(unittest.TestCase):
     testMethod()
     b.update(a=4.0)""", output)
 
+    def testLazyCallStack(self):
+        def capture():
+            # getCallStack excludes its caller
+            return getCallStack()
+
+        stack = capture()
+        self.assertIsInstance(stack, CallStack)
+        # Nothing is resolved until the stack is read
+        self.assertIsNone(stack._node._element)
+        self.assertEqual(stack[-1].function, "testLazyCallStack")
+        self.assertEqual(stack[-1].content, "stack = capture()")
+        self.assertIsInstance(stack._node._element, StackFrame)
+        self.assertIs(stack[-1], stack[-1])
+
+        extra = StackFrame("dummy.py", 1, "dummy")
+        extended = [extra] + stack + [extra]
+        self.assertIsInstance(extended, CallStack)
+        self.assertEqual(len(extended), len(stack) + 2)
+        # frames are interned by their source location
+        location = (extra.filename, extra.lineno, extra.function)
+        self.assertEqual((extended[0].filename, extended[0].lineno, extended[0].function), location)
+        self.assertIs(extended[-1], extended[0])
+        self.assertEqual([f.function for f in extended[1:-1]], [f.function for f in stack])
+
+        alias = stack
+        stack += [extra]
+        self.assertIs(alias, stack)
+        self.assertIs(alias[-1], extended[0])
+
+    def testCallStackGrowth(self):
+        """Test that extending stacks only adds nodes to the process-wide
+        tree for new source locations.
+        """
+        stack = getCallStack()
+        stacks = [stack + [StackFrame("dummy.py", 2, "dummy")] for _ in range(10)]
+        self.assertTrue(all(s._node is stacks[0]._node for s in stacks))
+        children = len(stack._node.children)
+        for i in range(10):
+            other = stack + ["not a frame %d" % i]
+            self.assertEqual(other[-1], "not a frame %d" % i)
+            self.assertEqual(list(other)[:-1], list(stack))
+        self.assertEqual(len(stack._node.children), children)
+
+    def testCallStackLifetime(self):
+        """Test that the nodes and frames of stacks that are no longer held
+        are dropped from the process-wide tree.
+        """
+        stack = getCallStack()
+        locations = [(frame.filename, frame.lineno) for frame in stack]
+        config = PexTestConfig()
+        config.a = 2.0
+        gone = stack + [StackFrame("gone.py", i, "gone") for i in range(3)]
+        config.update(a=3.0, __at=gone)
+        self.assertIn(("gone.py", 0, "gone"), stack._node.children)
+        self.assertIn(("gone.py", 2, "gone"), pexConfigCallStack._FRAMES)
+        del gone
+        self.assertEqual(config.history["a"][-1][1][-1].lineno, 2)
+        del config
+        gc.collect()
+        self.assertNotIn(("gone.py", 0, "gone"), stack._node.children)
+        self.assertNotIn(("gone.py", 2, "gone"), pexConfigCallStack._FRAMES)
+        # the stacks still held are not affected
+        self.assertEqual([(frame.filename, frame.lineno) for frame in stack], locations)
+
+    def testSharedStacks(self):
+        def capture():
+            return getCallStack()
+
+        stacks = []
+        for i in range(3):
+            stacks.append(capture())
+        # Identical stacks share all of their storage
+        self.assertIs(stacks[0]._node, stacks[1]._node)
+        self.assertIs(stacks[0][-1], stacks[2][-1])
+        other = capture()
+        self.assertIsNot(other._node, stacks[0]._node)
+        # Stacks with a common prefix share the frames of that prefix
+        self.assertIs(other._node.parent, stacks[0]._node.parent)
+        for frame1, frame2 in zip(other[:-1], stacks[0][:-1]):
+            self.assertIs(frame1, frame2)
+
+        configs = []
+        for i in range(2):
+            config = PexTestConfig()
+            config.a = 3.0
+            configs.append(config)
+        history1, history2 = (c.history["a"] for c in configs)
+        for (_, stack1, _), (_, stack2, _) in zip(history1, history2):
+            self.assertIs(stack1._node, stack2._node)
+
+    def testHistoryStacks(self):
+        b = PexTestConfig()
+        b.a = 2.0
+        for value, stack, label in b.history["a"]:
+            self.assertTrue(all(isinstance(f, StackFrame) for f in stack))
+        value, stack, label = b.history["a"][-1]
+        self.assertEqual((value, label), (2.0, "assignment"))
+        self.assertEqual(stack[-1].content, "b.a = 2.0")
+
+
+class HistoryModeTest(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, pexConfig.Config, "historyMode", pexConfig.Config.historyMode)
+
+    def modify(self, config):
+        config.f = 2.0
+        config.ll.append(3)
+        config.d["b"] = 2
+        config.sub.a = 3.0
+        config.choice["A"].a = 4.0
+        config.multi.names = ["A"]
+        config.multi.names.discard("A")
+        config.target.a = 5.0
+        config.target.retarget(Configurable, PexTestConfig)
+        config.cd["x"] = PexTestConfig()
+        del config.cd["x"]
+
+    def testFull(self):
+        config = ContainerConfig()
+        self.modify(config)
+        self.assertEqual(config.history["f"][-1][0], 2.0)
+        self.assertGreater(len(config.history["f"][-1][1]), 1)
+        for name in ("ll", "d", "choice", "multi", "target", "cd"):
+            self.assertGreater(len(config.history[name]), 1, msg=name)
+
+    def testShallow(self):
+        pexConfig.Config.historyMode = "shallow"
+        config = ContainerConfig()
+        self.modify(config)
+        for name in ContainerConfig._fields:
+            for value, stack, label in config.history[name]:
+                self.assertNotIn("pex/config/", stack[0].filename)
+        value, stack, label = config.history["f"][-1]
+        self.assertEqual(len(stack), 1)
+        self.assertEqual(stack[0].content, "config.f = 2.0")
+        self.assertEqual(config.sub.history["a"][-1][1][0].content, "config.sub.a = 3.0")
+
+    def testShallowContainers(self):
+        """Test that the methods containers inherit from collections.abc are
+        not recorded as the caller.
+        """
+        pexConfig.Config.historyMode = "shallow"
+        config = ContainerConfig()
+        config.ll.append(3)
+        self.assertEqual(config.history["ll"][-1][1][0].content, "config.ll.append(3)")
+        config.ll.extend([4, 5])
+        self.assertEqual(config.history["ll"][-1][1][0].content, "config.ll.extend([4, 5])")
+        config.d.update(b=2)
+        self.assertEqual(config.history["d"][-1][1][0].content, "config.d.update(b=2)")
+        config.d.setdefault("c", 3)
+        self.assertEqual(config.history["d"][-1][1][0].content, 'config.d.setdefault("c", 3)')
+
+    def testOff(self):
+        pexConfig.Config.historyMode = "off"
+        config = ContainerConfig()
+        self.modify(config)
+        for history in (config.history, config.sub.history, config.choice["A"].history,
+                        config.target.value.history):
+            self.assertTrue(all(len(h) == 0 for h in history.values()))
+        self.assertEqual(config.ll, [1, 2, 3])
+        self.assertEqual(config.target.a, 5.0)
+
+    def testPerClass(self):
+        class QuietConfig(ContainerConfig):
+            historyMode = "off"
+
+        config = QuietConfig()
+        self.modify(config)
+        self.assertEqual(config.history["f"], [])
+        # Subconfigs follow their own class's setting
+        self.assertEqual(len(config.sub.history["a"]), 2)
+
+        QuietConfig.historyMode = "shallow"
+        config.f = 3.0
+        self.assertEqual(len(config.history["f"]), 1)
+
+    def testInvalid(self):
+        with self.assertRaises(ValueError):
+            pexConfig.Config.historyMode = "none"
+        with self.assertRaises(ValueError):
+            class BadConfig(pexConfig.Config):
+                historyMode = "partial"
+
+
+class HistoryLimitTest(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, pexConfig.Config, "historyLimit", pexConfig.Config.historyLimit)
+        pexConfigHistory.Color.colorize(False)
+
+    def testGlobalLimit(self):
+        pexConfig.Config.historyLimit = 3
+        config = ContainerConfig()
+        for i in range(10):
+            config.f = float(i)
+            config.ll.append(i)
+        history = config.history["f"]
+        self.assertEqual(len(history), 4)
+        self.assertEqual(history[0][0], 8)
+        self.assertEqual(history[0][2], "truncated")
+        self.assertEqual([h[0] for h in history[1:]], [7.0, 8.0, 9.0])
+        self.assertEqual(len(config.history["ll"]), 4)
+        self.assertEqual(config.history["ll"][0][0], 8)
+        self.assertEqual(config.ll.history[-1][0], list(config.ll))
+
+        output = config.formatHistory("f", writeSourceLine=False)
+        lines = output.split("\n")
+        self.assertEqual(lines[0], "f")
+        self.assertEqual(lines[1], "... 8 earlier entries truncated ...")
+        self.assertTrue(lines[2].startswith("7.0"))
+        self.assertIn("config.f = float(i)", output)
+
+    def testFieldLimit(self):
+        class LimitedConfig(pexConfig.Config):
+            a = pexConfig.Field("a", int, default=0)
+            b = pexConfig.Field("b", int, default=0)
+
+        LimitedConfig.a.historyLimit = 1
+        config = LimitedConfig()
+        for i in range(5):
+            config.a = i
+            config.b = i
+        self.assertEqual(config.history["a"], [(5, [], "truncated"), config.history["a"][-1]])
+        self.assertEqual(config.history["a"][-1][0], 4)
+        self.assertEqual(len(config.history["b"]), 6)
+
+        # Limit is inherited by subclasses
+        class DerivedConfig(LimitedConfig):
+            pass
+
+        self.assertEqual(DerivedConfig.a.historyLimit, 1)
+
+    def testInvalid(self):
+        for limit in (0, -1, 1.5):
+            with self.assertRaises(ValueError):
+                pexConfig.Config.historyLimit = limit
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -153,6 +153,23 @@ class ListFieldTest(unittest.TestCase):
         c = Config1()
         self.assertRaises(pexConfig.FieldValidationError, setattr, c.l1, "should", "fail")
 
+    def testCompare(self):
+        c1 = Config2(lf=[float(i) for i in range(1000)] + [float("nan")])
+        c2 = Config2(lf=list(c1.lf))
+        c2.lf[10] += 1E-12
+        self.assertTrue(c1.compare(c2))
+
+        # all the differences are reported on one line
+        for i in range(10, 1000, 10):
+            c2.lf[i] += 1.0
+        c2.ls = ["ho"]
+        output = []
+        self.assertFalse(c1.compare(c2, shortcut=False, output=output.append))
+        self.assertEqual(len(output), 2)
+        self.assertIn("lf[10, 20, 30, 40, 50, ...]: [10.0, 20.0, 30.0, 40.0, 50.0, ...] != "
+                      "[11.000000000001, 21.0, 31.0, 41.0, 51.0, ...] (99 of 1001 items differ)", output[0])
+        self.assertIn("ls[0]: 'hi' != 'ho'", output[1])
+
 
 if __name__ == "__main__":
     unittest.main()
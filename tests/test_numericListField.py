@@ -0,0 +1,163 @@
+# This file is part of pex_config.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This software is dual licensed under the GNU General Public License and also
+# under a 3-clause BSD license. Recipients may choose which of these licenses
+# to use; please see the files gpl-3.0.txt and/or bsd_license.txt,
+# respectively.  If you choose the GPL option then the following text applies
+# (but note that there is still no warranty even if you opt for BSD instead):
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import ast
+import io
+import math
+import pickle
+import unittest
+
+import numpy
+
+import lsst.pex.config as pexConfig
+from lsst.pex.config import loader
+
+
+class Config1(pexConfig.Config):
+    lf = pexConfig.NumericListField("lf", float, default=[1, 2, 3], min=0.0)
+    li = pexConfig.NumericListField("li", int, default=None, optional=True, maxLength=4)
+    lr = pexConfig.NumericListField("lr", float, default=[0.5], min=0.0, max=1.0, inclusiveMax=True,
+                                    listCheck=lambda x: numpy.all(numpy.diff(x) > 0))
+    ln = pexConfig.NumericListField("ln", float, default=[])
+
+
+class NumericListFieldTest(unittest.TestCase):
+    def testConstructor(self):
+        with self.assertRaises(ValueError):
+            class BadDtype(pexConfig.Config):
+                ll = pexConfig.NumericListField("...", str)
+        with self.assertRaises(ValueError):
+            class BadRange(pexConfig.Config):
+                ll = pexConfig.NumericListField("...", float, min=1.0, max=0.0)
+        self.assertIn("[0.0,1.0]", Config1.lr.__doc__)
+
+    def testAssignment(self):
+        c = Config1()
+        self.assertEqual(c.lf, [1.0, 2.0, 3.0])
+        self.assertIsInstance(c.lf[0], float)
+        self.assertIs(c.lf._list, Config1().lf._list)
+
+        c.li = range(3)
+        self.assertEqual(c.li, [0, 1, 2])
+        self.assertIsInstance(c.li[0], int)
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "li", [1.5])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "li", [1, None])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "li", ["1"])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "li", 1)
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "li", [[1, 2]])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "lf", [1.0, -1.0])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "lr", [0.5, 1.5])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "lr", [float("nan")])
+        self.assertEqual(c.li, [0, 1, 2])
+
+        # arrays are copied, so changing them afterwards has no effect
+        values = numpy.arange(5.0)
+        c.lf = values
+        values[0] = 10.0
+        self.assertEqual(c.lf[0], 0.0)
+
+    def testInPlaceModification(self):
+        c = Config1()
+        c.lf[2] = 10
+        c.lf.append(20)
+        c.lf.extend([4, 5])
+        del c.lf[0]
+        c.lf[0:2] = [7.0]
+        self.assertEqual(c.lf, [7.0, 20.0, 4.0, 5.0])
+        self.assertIn(20.0, c.lf)
+        self.assertEqual(c.lf[1:3], [20.0, 4.0])
+        self.assertRaises(pexConfig.FieldValidationError, c.lf.__setitem__, 0, -1.0)
+        self.assertRaises(pexConfig.FieldValidationError, c.lf.append, "x")
+        self.assertEqual(c.lf, [7.0, 20.0, 4.0, 5.0])
+        # extend makes a single change, and the history holds lists
+        self.assertEqual(len(c.history["lf"]), 6)
+        self.assertEqual(c.history["lf"][-1][0], [7.0, 20.0, 4.0, 5.0])
+        self.assertIsInstance(c.history["lf"][0][0], list)
+        self.assertRaises(pexConfig.FieldValidationError, c.lf.extend, [1.0, -1.0])
+        self.assertEqual(len(c.lf), 4)
+
+    def testArray(self):
+        c = Config1(lf=numpy.linspace(0.0, 1.0, 100))
+        array = numpy.asarray(c.lf)
+        self.assertIs(array, c.lf.list())
+        self.assertFalse(array.flags.writeable)
+        self.assertTrue(array.flags.c_contiguous)
+        self.assertEqual(memoryview(array).nbytes, 800)
+        self.assertEqual(numpy.asarray(c.lf, dtype=numpy.float32).dtype, numpy.float32)
+        with self.assertRaises(ValueError):
+            array[0] = 1.0
+
+        # a clone shares the array until either is modified
+        clone = c.clone()
+        self.assertIs(numpy.asarray(clone.lf), array)
+        clone.lf[0] = 0.5
+        self.assertEqual(c.lf[0], 0.0)
+
+    def testValidate(self):
+        c = Config1()
+        c.validate()
+        c.lr = [0.5, 0.25]
+        self.assertRaises(pexConfig.FieldValidationError, c.validate)
+        c.lr = [0.25, 0.5]
+        c.li = [1, 2, 3, 4, 5]
+        self.assertRaises(pexConfig.FieldValidationError, c.validate)
+
+    def testSave(self):
+        c = Config1(lf=[float(i) for i in range(100)] + [math.inf], li=[1, 2], ln=[0.5, float("nan")])
+        stream = io.StringIO()
+        c.saveToStream(stream)
+        text = stream.getvalue()
+        self.assertIn("config.li=[1, 2]\n", text)
+        self.assertIn("config.lf=numpy.frombuffer(base64.b64decode(", text)
+        self.assertIn("config.lr=[0.5]\n", text)
+        self.assertIn("config.ln=numpy.frombuffer(base64.b64decode(", text)
+        program = loader.parse(ast.parse(text))
+        self.assertIsNotNone(program)
+
+        for fast in (True, False):
+            loaded = Config1()
+            if fast:
+                self.assertTrue(loader.apply(program, loaded))
+            else:
+                exec(text, {"config": loaded})
+            self.assertEqual(loaded.lf, c.lf)
+            self.assertEqual(loaded.li, [1, 2])
+            self.assertEqual(loaded.ln[0], 0.5)
+            self.assertTrue(math.isnan(loaded.ln[1]))
+            self.assertEqual(loaded.toDict()["lf"], c.toDict()["lf"])
+
+    def testPickle(self):
+        c = Config1(lf=numpy.arange(50.0), li=[3])
+        c2 = pickle.loads(pickle.dumps(c))
+        self.assertEqual(c2, c)
+        self.assertFalse(numpy.asarray(c2.lf).flags.writeable)
+        c2.lf[0] = 1.0
+        self.assertEqual(c2.lf[0], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
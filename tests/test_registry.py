@@ -25,6 +25,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import inspect
 import unittest
 import lsst.pex.config as pexConfig
 
@@ -130,6 +131,63 @@ class ConfigTest(unittest.TestCase):
         c.r = "foo2"
         c.r.apply()
 
+    def testPrototype(self):
+        """Test that the configs of a registry field are clones of a config
+        made once per entry.
+        """
+        calls = []
+
+        class SubConfig(pexConfig.Config):
+            x = pexConfig.ListField("x", int, default=[1])
+
+        class ProtoConfig(pexConfig.Config):
+            f = pexConfig.Field("f", int, default=1)
+            sub = pexConfig.ConfigField("sub", SubConfig)
+
+            def setDefaults(self):
+                calls.append(self)
+                self.f = 2
+
+        registry = pexConfig.makeRegistry(doc="prototype test")
+        registry.register("proto", self.fooAlg1Class, ProtoConfig)
+
+        class C1(pexConfig.Config):
+            r = registry.makeField("registry field", default="proto")
+
+        configs = [C1() for _ in range(3)]
+        for c in configs:
+            self.assertEqual(c.r["proto"].f, 2)
+        self.assertEqual(len(calls), 1)
+        configs[0].r["proto"].f = 3
+        configs[0].r["proto"].sub.x.append(2)
+        self.assertEqual(configs[1].r["proto"].f, 2)
+        self.assertEqual(list(configs[1].r["proto"].sub.x), [1])
+        self.assertIs(configs[1].r["proto"]._parent, configs[1])
+        self.assertEqual(configs[1].r["proto"].sub._name, "r['proto'].sub")
+
+        # the subconfigs of a clone are shared until they are used
+        prototype = registry._prototypes["proto"][1]
+        choice = configs[2].r["proto"]
+        self.assertIs(choice._storage["sub"], prototype._storage["sub"])
+        choice.sub.x.append(3)
+        self.assertIsNot(choice._storage["sub"], prototype._storage["sub"])
+        self.assertEqual(choice.sub._name, "r['proto'].sub")
+        self.assertEqual(list(prototype.sub.x), [1])
+
+        # the history of each clone records where its choice was made, as
+        # for a config made for it, and not where the prototype was made
+        config, line = C1(), inspect.currentframe().f_lineno
+        choice = config.r["proto"]
+        self.assertIn(ProtoConfig.f.source, choice.history["f"][0][1])
+        for value, stack, label in choice.history["f"]:
+            lines = [frame.lineno for frame in stack if frame.function == "testPrototype"]
+            self.assertEqual(lines, [line])
+
+        # a change to the config class makes the prototype again
+        ProtoConfig.g = pexConfig.Field("g", int, default=4)
+        self.assertEqual(C1().r["proto"].g, 4)
+        self.assertEqual(len(calls), 2)
+
     def testExceptions(self):
         class C1(pexConfig.Config):
             r = self.registry.makeField("registry field", multi=True, default=[])